@@ -4,31 +4,98 @@ Orchestrates the 4-stage pipeline with memory, conditional logic, and advanced s
 """
 
 import asyncio
+import json
 import logging
+import os
+import re
+import secrets
 import time
-from typing import Dict, List, Any, Optional
-from datetime import datetime
+from typing import Dict, List, Any, Optional, Callable, Tuple, Union
 import hashlib
 
 from langchain_workflow import (
     WorkflowOrchestrator, WorkflowContext, WorkflowNode, NodeType, WorkflowStatus
 )
-from llm_clients import LLMClients
+from llm_clients import LLMClients, PROVIDERS
 from pipeline_stages import PipelineStages
 from git_github_utils import GitHubManager
 from report_generator import ReportGenerator
-from prompt_config import PromptConfigManager
+from response_cache import ResponseCache, cache_key
+from demo_mode import DemoPipeline
+
+# uvloop is optional; without it the default asyncio event loop is used
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Quality-check keywords, each matched in a single pass over the LLM response
+ANALYSIS_ELEMENTS_RE = re.compile(r'issues|recommendations|analysis', re.IGNORECASE)
+CODE_INDICATORS_RE = re.compile(r'def |class |function|import|return|[{}]')
+SUCCESS_INDICATORS_RE = re.compile(r'verified|passed|approved|quality', re.IGNORECASE)
+ANALYSIS_ELEMENT_COUNT = 3
+
+# Seconds each stage may spend on LLM calls before it is abandoned and retried
+DEFAULT_STAGE_TIMEOUTS = {
+    'stage_1': 180.0,
+    'stage_2': 240.0,
+    'stage_2_sketch': 120.0,
+    'stage_3': 240.0,
+    'stage_4': 180.0
+}
+
+# Report section name -> context key holding that stage's per-file results
+STAGE_RESPONSE_KEYS = {
+    'stage_1': 'stage_1_gemini_response',
+    'stage_2': 'stage_2_chatgpt_response',
+    'stage_3': 'stage_3_claude_response',
+    'stage_4': 'stage_4_deepseek_response'
+}
+
+
+def score_analysis_results(results: Dict[str, Any]) -> Tuple[float, int]:
+    """Score per-file analysis results in one pass.
+    
+    Returns the share of files whose analysis has the expected structure and
+    the total number of issues reported.
+    """
+    structured_count = 0
+    issues_found = 0
+    for result in results.values():
+        if not isinstance(result, dict) or result.get('status') != 'completed':
+            continue
+        analysis = result.get('analysis')
+        if not isinstance(analysis, dict) or ('issues' not in analysis and 'overall_assessment' not in analysis):
+            continue
+        structured_count += 1
+        if isinstance(analysis.get('issues'), list):
+            issues_found += len(analysis['issues'])
+    
+    quality_score = structured_count / len(results) if results else 0.0
+    return quality_score, issues_found
+
+
+def score_analysis_text(text: str) -> float:
+    """Score a free-text analysis by the share of expected elements it mentions"""
+    found_elements = {m.group(0).lower() for m in ANALYSIS_ELEMENTS_RE.finditer(text)}
+    return len(found_elements) / ANALYSIS_ELEMENT_COUNT
+
+
 class AdvancedMultiLLMPipeline:
     """Advanced Multi-LLM Pipeline with workflow orchestration"""
     
-    def __init__(self, config_file: str = "prompt_config.json", demo_mode: bool = False):
+    def __init__(self, config_file: str = "prompt_config.json", demo_mode: bool = False,
+                 prewarm_connections: bool = True, cache_dir: Optional[str] = ".llm_cache",
+                 stage_timeouts: Optional[Dict[str, float]] = None, max_concurrent_prs: int = 4):
         """Initialize the advanced pipeline"""
+        # One set of pooled provider clients shared by every stage
         self.llm_clients = LLMClients()
-        self.pipeline_stages = PipelineStages(config_file)
+        self.pipeline_stages = PipelineStages(config_file, llm_clients=self.llm_clients)
         self.demo_mode = demo_mode
+        self._connections_warm = not prewarm_connections
         
         # Initialize GitHub manager only if not in demo mode
         if not demo_mode:
@@ -40,9 +107,22 @@ class AdvancedMultiLLMPipeline:
                 self.github_manager = None
         else:
             self.github_manager = None
+        
+        # Sample files are built once and reused by every demo run
+        self._demo_files: Optional[List[Dict[str, Any]]] = None
             
         self.report_generator = ReportGenerator()
-        self.prompt_config = PromptConfigManager(config_file)
+        # Share the stages' config manager so the file is loaded once
+        self.prompt_config = self.pipeline_stages.prompt_config
+        self._project_type = self.prompt_config.config.get('active_project_type', 'general')
+        
+        # Stage responses are reused when the same files are analyzed with the same prompts
+        self.response_cache = ResponseCache(cache_dir)
+        self.prompt_version = self._compute_prompt_version()
+        
+        # A hung provider fails its stage instead of stalling the whole pipeline
+        self.stage_timeouts = {**DEFAULT_STAGE_TIMEOUTS, **(stage_timeouts or {})}
+        self.max_concurrent_prs = max_concurrent_prs
         
         # Initialize workflow orchestrator
         self.orchestrator = WorkflowOrchestrator(memory_size=1000)
@@ -53,12 +133,125 @@ class AdvancedMultiLLMPipeline:
         
         logger.info("Advanced Multi-LLM Pipeline initialized with workflow orchestration")
     
+    async def warm_up_connections(self):
+        """Open provider connections concurrently so the first stage call skips the handshake"""
+        if self._connections_warm:
+            return
+        self._connections_warm = True
+        await asyncio.gather(*(
+            self.llm_clients.awarm_up(provider) for provider in PROVIDERS
+        ))
+    
+    def _compute_prompt_version(self) -> str:
+        """Fingerprint of the active prompts, used in response cache keys"""
+        return hashlib.blake2b(
+            json.dumps(self.pipeline_stages.prompts, sort_keys=True, default=str).encode(),
+            digest_size=16
+        ).hexdigest()
+    
+    def reload_config(self):
+        """Re-read the prompt configuration and refresh everything derived from it.
+        
+        The workflow graph is rebuilt (clearing workflow memory) only when the
+        workflow profile changed.
+        """
+        self.pipeline_stages.reload_prompts()
+        self._project_type = self.prompt_config.config.get('active_project_type', 'general')
+        self.prompt_version = self._compute_prompt_version()
+        
+        if self.prompt_config.get_workflow_profile() != self.workflow_profile:
+            self.orchestrator.clear_workflow()
+            self._setup_multi_llm_workflow()
+        
+        logger.info(f"Configuration reloaded (project type: {self._project_type})")
+    
     def _generate_session_id(self) -> str:
         """Generate unique session ID"""
-        timestamp = datetime.now().isoformat()
-        return hashlib.md5(f"pipeline_{timestamp}".encode()).hexdigest()[:12]
+        return secrets.token_hex(6)
     
     def _setup_multi_llm_workflow(self):
+        """Build the workflow graph for the active project type's workflow profile"""
+        self.workflow_profile = self.prompt_config.get_workflow_profile()
+        
+        if self.workflow_profile == "analysis_only":
+            self._setup_analysis_only_workflow()
+        else:
+            self._setup_full_workflow()
+        
+        logger.info(f"Workflow built for profile: {self.workflow_profile}")
+    
+    def _setup_analysis_only_workflow(self):
+        """Setup a Gemini-only workflow for project types that need no code generation"""
+        self.orchestrator.create_transform_node(
+            node_id="file_retrieval",
+            name="File Retrieval",
+            transform_function=self._retrieve_changed_files
+        )
+        
+        self.orchestrator.create_condition_node(
+            node_id="quality_gate",
+            name="Quality Gate",
+            condition_function=self._quality_gate_check,
+            true_path="stage_1_gemini",
+            false_path="early_exit"
+        )
+        
+        self.orchestrator.create_llm_node(
+            node_id="stage_1_gemini",
+            name="Gemini Deep Analysis",
+            llm_function=self._stage_1_wrapper,
+            system_prompt="",  # Will be set dynamically
+            user_prompt_template="Analyze these files: {files_summary}",
+            include_data=True
+        )
+        
+        self.orchestrator.create_async_memory_store_node(
+            node_id="store_analysis",
+            name="Store Analysis Results",
+            key_template="{session_id}_analysis",
+            value_path="stage_1_gemini_response"
+        )
+        
+        # The analysis is the final product, so passing this check completes the pipeline
+        self.orchestrator.create_condition_node(
+            node_id="analysis_check",
+            name="Analysis Quality Check",
+            condition_function=self._analysis_only_quality_check,
+            true_path="report_generation",
+            false_path="analysis_retry"
+        )
+        
+        self.orchestrator.create_transform_node(
+            node_id="report_generation",
+            name="Report Generation",
+            transform_function=self._generate_final_report
+        )
+        
+        self.orchestrator.create_transform_node(
+            node_id="github_integration",
+            name="GitHub Integration",
+            transform_function=self._post_to_github
+        )
+        
+        self.orchestrator.create_transform_node(
+            node_id="analysis_retry",
+            name="Analysis Retry Handler",
+            transform_function=self._handle_analysis_retry
+        )
+        
+        self.orchestrator.create_transform_node(
+            node_id="early_exit",
+            name="Early Exit Handler",
+            transform_function=self._handle_early_exit
+        )
+        
+        self.orchestrator.add_edge("file_retrieval", "quality_gate")
+        self.orchestrator.add_edge("stage_1_gemini", "store_analysis")
+        self.orchestrator.add_edge("store_analysis", "analysis_check")
+        self.orchestrator.add_edge("analysis_retry", "stage_1_gemini")
+        self.orchestrator.add_edge("report_generation", "github_integration")
+    
+    def _setup_full_workflow(self):
         """Setup the complete multi-LLM workflow"""
         
         # Node 1: File Retrieval and Preprocessing
@@ -73,17 +266,33 @@ class AdvancedMultiLLMPipeline:
             node_id="quality_gate",
             name="Quality Gate",
             condition_function=self._quality_gate_check,
-            true_path="stage_1_gemini",
+            true_path="parallel_analysis",
             false_path="early_exit"
         )
         
-        # Node 3: Stage 1 - Gemini Analysis
+        # Node 3: Parallel fan-out - Gemini analysis and ChatGPT sketch share the
+        # same code files and have no data dependency on each other; Stage 2 refines
+        # the sketch, so Stage 3 depends on both through its output
+        self.orchestrator.create_parallel_node(
+            node_id="parallel_analysis",
+            name="Parallel Analysis & Sketch",
+            llm_functions={
+                "stage_1_gemini_response": self._stage_1_wrapper,
+                "stage_2_sketch": self._stage_2_sketch_wrapper
+            },
+            system_prompt="",  # Will be set dynamically
+            user_prompt_template="Analyze these files: {files_summary}",
+            include_data=True
+        )
+        
+        # Stage 1 - Gemini Analysis (standalone node used for analysis retries)
         self.orchestrator.create_llm_node(
             node_id="stage_1_gemini",
             name="Gemini Deep Analysis",
             llm_function=self._stage_1_wrapper,
             system_prompt="",  # Will be set dynamically
-            user_prompt_template="Analyze these files: {files_summary}"
+            user_prompt_template="Analyze these files: {files_summary}",
+            include_data=True
         )
         
         # Node 4: Analysis Quality Check
@@ -101,7 +310,8 @@ class AdvancedMultiLLMPipeline:
             name="ChatGPT Code Generation",
             llm_function=self._stage_2_wrapper,
             system_prompt="",  # Will be set dynamically
-            user_prompt_template="Generate improvements based on: {analysis_results}"
+            user_prompt_template="Generate improvements for: {files_summary}",
+            include_data=True
         )
         
         # Node 6: Generation Quality Check
@@ -119,7 +329,8 @@ class AdvancedMultiLLMPipeline:
             name="Claude Code Integration",
             llm_function=self._stage_3_wrapper,
             system_prompt="",  # Will be set dynamically
-            user_prompt_template="Integrate code changes: {generated_code}"
+            user_prompt_template="Integrate code changes for: {files_summary}",
+            include_data=True
         )
         
         # Node 8: Integration Quality Check
@@ -137,7 +348,8 @@ class AdvancedMultiLLMPipeline:
             name="DeepSeek Verification",
             llm_function=self._stage_4_wrapper,
             system_prompt="",  # Will be set dynamically
-            user_prompt_template="Verify integrated code: {integrated_code}"
+            user_prompt_template="Verify integrated code for: {files_summary}",
+            include_data=True
         )
         
         # Node 10: Final Quality Check
@@ -164,18 +376,19 @@ class AdvancedMultiLLMPipeline:
         )
         
         # Memory Storage Nodes
-        self.orchestrator.create_memory_store_node(
+        # Memory writes run in the background so the next LLM stage starts immediately
+        self.orchestrator.create_async_memory_store_node(
             node_id="store_analysis",
             name="Store Analysis Results",
             key_template="{session_id}_analysis",
-            value_path="stage_1_response"
+            value_path="stage_1_gemini_response"
         )
         
-        self.orchestrator.create_memory_store_node(
+        self.orchestrator.create_async_memory_store_node(
             node_id="store_generation",
             name="Store Generation Results",
             key_template="{session_id}_generation",
-            value_path="stage_2_response"
+            value_path="stage_2_chatgpt_response"
         )
         
         # Retry Nodes
@@ -204,6 +417,7 @@ class AdvancedMultiLLMPipeline:
         """Setup workflow node connections"""
         # Main pipeline flow
         self.orchestrator.add_edge("file_retrieval", "quality_gate")
+        self.orchestrator.add_edge("parallel_analysis", "store_analysis")
         self.orchestrator.add_edge("stage_1_gemini", "store_analysis")
         self.orchestrator.add_edge("store_analysis", "analysis_check")
         self.orchestrator.add_edge("stage_2_chatgpt", "store_generation")
@@ -219,21 +433,22 @@ class AdvancedMultiLLMPipeline:
         self.orchestrator.add_edge("verification_retry", "stage_4_deepseek")
     
     # Transform Functions
-    def _retrieve_changed_files(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _retrieve_changed_files(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Retrieve changed files from PR"""
         try:
             pr_number = data.get('pr_number')
             if not self.demo_mode and self.github_manager and pr_number:
-                files = self.github_manager.get_pr_changed_files(pr_number)
+                files = await self.github_manager.aget_pr_changed_files(pr_number)
+                for file_info in files:
+                    # Stages key files by 'path'; the GitHub API calls it 'filename'
+                    file_info.setdefault('path', file_info.get('filename'))
                 data['changed_files'] = files
                 data['files_count'] = len(files)
                 data['files_summary'] = f"{len(files)} files changed"
                 logger.info(f"Retrieved {len(files)} changed files from PR #{pr_number}")
             else:
                 # Demo mode - use sample files
-                from demo_mode import DemoPipeline
-                demo = DemoPipeline()
-                files = demo.create_sample_files()
+                files = list(self._get_demo_files())
                 data['changed_files'] = files
                 data['files_count'] = len(files)
                 data['files_summary'] = f"{len(files)} sample files"
@@ -245,6 +460,12 @@ class AdvancedMultiLLMPipeline:
             data['error'] = str(e)
             return data
     
+    def _get_demo_files(self) -> List[Dict[str, Any]]:
+        """Get the cached demo sample files, creating them on first use"""
+        if self._demo_files is None:
+            self._demo_files = DemoPipeline.create_sample_files()
+        return self._demo_files
+    
     def _quality_gate_check(self, data: Dict[str, Any]) -> bool:
         """Check if files meet quality gate requirements"""
         files = data.get('changed_files', [])
@@ -258,9 +479,23 @@ class AdvancedMultiLLMPipeline:
             logger.warning("Too many files changed (>50), consider splitting PR")
             data['quality_gate_warning'] = "Large PR detected"
         
-        # Check for binary files
-        code_files = [f for f in files if f.get('content') is not None]
-        if len(code_files) == 0:
+        # Classify files in one pass: readable code vs binary/removed, with size and extension stats
+        code_files = []
+        binary_count = 0
+        extension_counts: Dict[str, int] = {}
+        for file_data in files:
+            if file_data.get('content') is None:
+                binary_count += 1
+                continue
+            code_files.append(file_data)
+            path = file_data.get('path') or file_data.get('filename', '')
+            extension = os.path.splitext(path)[1].lower() or '(none)'
+            extension_counts[extension] = extension_counts.get(extension, 0) + 1
+        
+        data['binary_files_count'] = binary_count
+        data['extension_counts'] = extension_counts
+        
+        if not code_files:
             logger.warning("No readable code files found")
             return False
         
@@ -268,19 +503,42 @@ class AdvancedMultiLLMPipeline:
         logger.info(f"Quality gate passed: {len(code_files)} code files ready for analysis")
         return True
     
+    @staticmethod
+    def _completed_results(response: Any) -> List[Dict[str, Any]]:
+        """Per-file stage results that completed successfully"""
+        if not isinstance(response, dict):
+            return []
+        return [result for result in response.values()
+                if isinstance(result, dict) and result.get('status') == 'completed']
+    
+    @staticmethod
+    def _count_code_indicators(text: str, limit: int = 2) -> int:
+        """Count distinct code indicators in text, stopping once limit is reached"""
+        found_indicators = set()
+        for match in CODE_INDICATORS_RE.finditer(text):
+            found_indicators.add(match.group(0))
+            if len(found_indicators) >= limit:
+                break
+        return len(found_indicators)
+    
     def _analysis_quality_check(self, data: Dict[str, Any]) -> bool:
         """Check quality of analysis results"""
         response = data.get('stage_1_gemini_response', '')
         
-        if not response or len(response) < 100:
-            logger.warning("Analysis response too short")
-            return False
-        
-        # Check for key analysis elements
-        required_elements = ['issues', 'recommendations', 'analysis']
-        found_elements = sum(1 for elem in required_elements if elem.lower() in response.lower())
+        if isinstance(response, dict):
+            if not response:
+                logger.warning("Analysis produced no results")
+                return False
+            
+            quality_score, data['issues_found'] = score_analysis_results(response)
+        else:
+            if not response or len(response) < 100:
+                logger.warning("Analysis response too short")
+                return False
+            
+            # Free-text responses fall back to keyword matching
+            quality_score = score_analysis_text(response)
         
-        quality_score = found_elements / len(required_elements)
         data['analysis_quality_score'] = quality_score
         
         if quality_score < 0.5:
@@ -290,19 +548,27 @@ class AdvancedMultiLLMPipeline:
         logger.info(f"Analysis quality check passed: {quality_score}")
         return True
     
+    def _analysis_only_quality_check(self, data: Dict[str, Any]) -> bool:
+        """Analysis check for the analysis-only profile, where it decides pipeline success"""
+        passed = self._analysis_quality_check(data)
+        data['pipeline_success'] = passed
+        return passed
+    
     def _generation_quality_check(self, data: Dict[str, Any]) -> bool:
         """Check quality of code generation"""
         response = data.get('stage_2_chatgpt_response', '')
         
-        if not response or len(response) < 50:
+        if isinstance(response, dict):
+            generated = [result.get('generated_code') or '' for result in self._completed_results(response)]
+        else:
+            generated = [response] if response and len(response) >= 50 else []
+        
+        if not any(generated):
             logger.warning("Generation response too short")
             return False
         
         # Check for code-like content
-        code_indicators = ['def ', 'class ', 'function', 'import', 'return', '{', '}']
-        found_indicators = sum(1 for indicator in code_indicators if indicator in response)
-        
-        if found_indicators < 2:
+        if not any(self._count_code_indicators(code) >= 2 for code in generated):
             logger.warning("Generated content doesn't appear to contain code")
             return False
         
@@ -313,6 +579,9 @@ class AdvancedMultiLLMPipeline:
         """Check quality of code integration"""
         response = data.get('stage_3_claude_response', '')
         
+        if isinstance(response, dict):
+            response = self._completed_results(response)
+        
         if not response:
             logger.warning("No integration response")
             return False
@@ -324,58 +593,142 @@ class AdvancedMultiLLMPipeline:
         """Final quality check before report generation"""
         verification = data.get('stage_4_deepseek_response', '')
         
+        if isinstance(verification, dict):
+            verification = self._completed_results(verification)
+        
         if not verification:
             logger.warning("No verification response")
             return False
         
         # Check if verification indicates success
-        success_indicators = ['verified', 'passed', 'approved', 'quality']
-        has_success = any(indicator in verification.lower() for indicator in success_indicators)
+        if isinstance(verification, list):
+            has_success = any(result.get('verification_passed', False) for result in verification)
+        else:
+            has_success = SUCCESS_INDICATORS_RE.search(verification) is not None
         
         data['pipeline_success'] = has_success
         logger.info(f"Final quality check: {'passed' if has_success else 'needs review'}")
         return True
     
     # LLM Wrapper Functions
-    def _stage_1_wrapper(self, prompt: str, system_prompt: str) -> str:
+    def _stage_cache_key(self, stage: str, data: Optional[Dict[str, Any]]) -> str:
+        """Cache key for a stage run over the current code files"""
+        files = (data or {}).get('code_files', [])
+        return cache_key(stage, files, self.prompt_version)
+    
+    def _get_cached_response(self, key: str, data: Optional[Dict[str, Any]]) -> Optional[Any]:
+        """Look up a cached stage response; retries always call the LLM again"""
+        if (data or {}).get('retry_mode'):
+            return None
+        return self.response_cache.get(key)
+    
+    def _cache_stage_results(self, key: str, results: Dict[str, Any]):
+        """Cache stage results unless a file failed, so transient errors are retried"""
+        if any(result.get('status') == 'failed' for result in results.values()):
+            return
+        self.response_cache.set(key, results)
+    
+    async def _run_stage_call(self, stage: str, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Run a stage call bounded by the stage timeout; blocking calls move to a worker thread"""
+        timeout = self.stage_timeouts.get(stage)
+        try:
+            async with asyncio.timeout(timeout):
+                if asyncio.iscoroutinefunction(func):
+                    return await func(*args, **kwargs)
+                return await asyncio.to_thread(func, *args, **kwargs)
+        except TimeoutError:
+            raise TimeoutError(f"{stage} timed out after {timeout}s") from None
+    
+    @staticmethod
+    def _stage_input(data: Optional[Dict[str, Any]], key: str) -> Dict[str, Any]:
+        """Structured output of an earlier stage, or empty if it is missing or failed"""
+        value = (data or {}).get(key)
+        return value if isinstance(value, dict) else {}
+    
+    async def _stage_1_wrapper(self, prompt: str, system_prompt: str,
+                               data: Optional[Dict[str, Any]] = None) -> Union[Dict[str, Any], str]:
         """Wrapper for Stage 1 Gemini analysis"""
+        key = self._stage_cache_key("stage_1", data)
+        if (cached := self._get_cached_response(key, data)) is not None:
+            return cached
         try:
-            files = []  # Extract from context
-            results = self.pipeline_stages.stage_1_gemini_analysis(files)
-            return str(results)
+            files = (data or {}).get('code_files', [])
+            results = await self._run_stage_call(
+                "stage_1", self.pipeline_stages.stage_1_gemini_analysis, files
+            )
+            self._cache_stage_results(key, results)
+            return results
         except Exception as e:
             logger.error(f"Stage 1 failed: {e}")
             return f"Stage 1 analysis failed: {e}"
     
-    def _stage_2_wrapper(self, prompt: str, system_prompt: str) -> str:
+    async def _stage_2_wrapper(self, prompt: str, system_prompt: str,
+                               data: Optional[Dict[str, Any]] = None) -> Union[Dict[str, Any], str]:
         """Wrapper for Stage 2 ChatGPT generation"""
+        key = self._stage_cache_key("stage_2", data)
+        if (cached := self._get_cached_response(key, data)) is not None:
+            return cached
         try:
-            # Get analysis results from memory
-            analysis_results = {}
-            original_files = []
-            results = self.pipeline_stages.stage_2_chatgpt_generation(analysis_results, original_files)
-            return str(results)
+            analysis_results = self._stage_input(data, 'stage_1_gemini_response')
+            original_files = (data or {}).get('code_files', [])
+            sketch = (data or {}).get('stage_2_sketch') or ""
+            results = await self._run_stage_call(
+                "stage_2", self.pipeline_stages.stage_2_chatgpt_generation, analysis_results, original_files, sketch
+            )
+            self._cache_stage_results(key, results)
+            return results
         except Exception as e:
             logger.error(f"Stage 2 failed: {e}")
             return f"Stage 2 generation failed: {e}"
     
-    def _stage_3_wrapper(self, prompt: str, system_prompt: str) -> str:
+    async def _stage_2_sketch_wrapper(self, prompt: str, system_prompt: str,
+                                      data: Optional[Dict[str, Any]] = None) -> str:
+        """Wrapper for the ChatGPT sketch pass that runs alongside Stage 1; empty on failure"""
+        key = self._stage_cache_key("stage_2_sketch", data)
+        if (cached := self._get_cached_response(key, data)) is not None:
+            return cached
+        try:
+            files = (data or {}).get('code_files', [])
+            sketch = await self._run_stage_call(
+                "stage_2_sketch", self.pipeline_stages.stage_2_sketch, files
+            )
+            self.response_cache.set(key, sketch)
+            return sketch
+        except Exception as e:
+            logger.error(f"Stage 2 sketch failed: {e}")
+            return ""
+    
+    async def _stage_3_wrapper(self, prompt: str, system_prompt: str,
+                               data: Optional[Dict[str, Any]] = None) -> Union[Dict[str, Any], str]:
         """Wrapper for Stage 3 Claude integration"""
+        key = self._stage_cache_key("stage_3", data)
+        if (cached := self._get_cached_response(key, data)) is not None:
+            return cached
         try:
-            generated_code = {}
-            original_files = []
-            results = self.pipeline_stages.stage_3_claude_integration(generated_code, original_files)
-            return str(results)
+            generated_code = self._stage_input(data, 'stage_2_chatgpt_response')
+            original_files = (data or {}).get('code_files', [])
+            results = await self._run_stage_call(
+                "stage_3", self.pipeline_stages.stage_3_claude_integration, generated_code, original_files
+            )
+            self._cache_stage_results(key, results)
+            return results
         except Exception as e:
             logger.error(f"Stage 3 failed: {e}")
             return f"Stage 3 integration failed: {e}"
     
-    def _stage_4_wrapper(self, prompt: str, system_prompt: str) -> str:
+    async def _stage_4_wrapper(self, prompt: str, system_prompt: str,
+                               data: Optional[Dict[str, Any]] = None) -> Union[Dict[str, Any], str]:
         """Wrapper for Stage 4 DeepSeek verification"""
+        key = self._stage_cache_key("stage_4", data)
+        if (cached := self._get_cached_response(key, data)) is not None:
+            return cached
         try:
-            integrated_code = {}
-            results = self.pipeline_stages.stage_4_deepseek_verification(integrated_code)
-            return str(results)
+            integrated_code = self._stage_input(data, 'stage_3_claude_response')
+            results = await self._run_stage_call(
+                "stage_4", self.pipeline_stages.stage_4_deepseek_verification, integrated_code
+            )
+            self._cache_stage_results(key, results)
+            return results
         except Exception as e:
             logger.error(f"Stage 4 failed: {e}")
             return f"Stage 4 verification failed: {e}"
@@ -421,14 +774,14 @@ class AdvancedMultiLLMPipeline:
         try:
             # Collect all pipeline results
             pipeline_results = {
-                'stage_1_results': data.get('stage_1_gemini_response', {}),
-                'stage_2_results': data.get('stage_2_chatgpt_response', {}),
-                'stage_3_results': data.get('stage_3_claude_response', {}),
-                'stage_4_results': data.get('stage_4_deepseek_response', {}),
+                stage: data[response_key] for stage, response_key in STAGE_RESPONSE_KEYS.items()
+                if isinstance(data.get(response_key), dict)
+            }
+            pipeline_results.update({
                 'files_analyzed': data.get('files_count', 0),
                 'pipeline_success': data.get('pipeline_success', False),
                 'session_id': data.get('session_id', self.session_id)
-            }
+            })
             
             report = self.report_generator.generate_comprehensive_report(pipeline_results)
             data['final_report'] = report
@@ -469,26 +822,56 @@ class AdvancedMultiLLMPipeline:
     
     async def run_advanced_pipeline(self, pr_number: Optional[int] = None) -> Dict[str, Any]:
         """Run the advanced multi-LLM pipeline with workflow orchestration"""
+        await self.warm_up_connections()
+        return await self._run_pipeline(pr_number, self.session_id)
+    
+    async def run_advanced_pipeline_batch(self, pr_numbers: List[int]) -> List[Dict[str, Any]]:
+        """Run the pipeline for several PRs concurrently.
+        
+        Runs share the LLM connection pools, response cache and workflow memory;
+        each PR gets its own session ID and context.
+        """
+        await self.warm_up_connections()
+        semaphore = asyncio.Semaphore(self.max_concurrent_prs)
+        
+        async def run_one(pr_number: int) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._run_pipeline(pr_number, self._generate_session_id())
+        
+        outcomes = await asyncio.gather(*(run_one(pr) for pr in pr_numbers), return_exceptions=True)
+        
+        results = []
+        for pr_number, outcome in zip(pr_numbers, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Pipeline for PR #{pr_number} failed: {outcome}")
+                outcome = {'success': False, 'error': str(outcome), 'pr_number': pr_number}
+            results.append(outcome)
+        
+        logger.info(f"Batch completed: {sum(1 for r in results if r.get('success'))}/{len(results)} PRs succeeded")
+        return results
+    
+    async def _run_pipeline(self, pr_number: Optional[int], session_id: str) -> Dict[str, Any]:
+        """Execute the workflow for one PR under the given session ID"""
         
         # Create initial context
         context = WorkflowContext(
             data={
                 'pr_number': pr_number,
-                'session_id': self.session_id,
+                'session_id': session_id,
                 'start_time': time.time(),
-                'project_type': self.prompt_config.config.get('active_project_type', 'general')
+                'project_type': self._project_type
             },
             metadata={
                 'pipeline_version': '2.0.0',
                 'workflow_enabled': True,
                 'advanced_features': True
             },
-            session_id=self.session_id,
-            execution_id=f"exec_{int(time.time())}",
-            timestamp=datetime.now().isoformat()
+            session_id=session_id,
+            execution_id=f"exec_{time.monotonic_ns()}",
+            timestamp_ns=time.time_ns()
         )
         
-        logger.info(f"Starting advanced pipeline execution (session: {self.session_id})")
+        logger.info(f"Starting advanced pipeline execution (session: {session_id})")
         
         try:
             # Execute the workflow
@@ -497,18 +880,22 @@ class AdvancedMultiLLMPipeline:
                 initial_context=context,
                 max_steps=20
             )
+            await self.orchestrator.flush_pending_stores(timeout=5)
             
             # Extract results
             results = {
                 'success': not final_context.data.get('error'),
-                'session_id': self.session_id,
+                'session_id': session_id,
+                'pr_number': pr_number,
                 'execution_time': time.time() - context.data['start_time'],
                 'files_analyzed': final_context.data.get('files_count', 0),
                 'pipeline_success': final_context.data.get('pipeline_success', False),
                 'github_posted': final_context.data.get('github_posted', False),
                 'report': final_context.data.get('final_report', ''),
                 'workflow_stats': self.orchestrator.get_workflow_stats(),
-                'memory_usage': len(self.orchestrator.memory.memory)
+                'memory_usage': self.orchestrator.memory.size(),
+                'memory_bytes_estimate': self.orchestrator.memory.approx_bytes(),
+                'cache_stats': self.response_cache.get_stats()
             }
             
             logger.info(f"Advanced pipeline completed successfully in {results['execution_time']:.2f}s")
@@ -519,7 +906,8 @@ class AdvancedMultiLLMPipeline:
             return {
                 'success': False,
                 'error': str(e),
-                'session_id': self.session_id,
+                'session_id': session_id,
+                'pr_number': pr_number,
                 'workflow_stats': self.orchestrator.get_workflow_stats()
             }
     
@@ -539,6 +927,18 @@ class AdvancedMultiLLMPipeline:
         """Clear workflow memory"""
         self.orchestrator.memory.clear()
         logger.info("Workflow memory cleared")
+    
+    def close(self):
+        """Release pooled LLM and GitHub connections"""
+        self.llm_clients.close()
+        if self.github_manager:
+            self.github_manager.close()
+    
+    async def aclose(self):
+        """Release pooled LLM and GitHub connections, including the async LLM clients"""
+        await self.llm_clients.aclose()
+        if self.github_manager:
+            self.github_manager.close()
 
 
 # Demo function for advanced pipeline
@@ -593,5 +993,12 @@ async def demo_advanced_pipeline():
         traceback.print_exc()
 
 
+def run_async(coro):
+    """Run a coroutine to completion on uvloop when available"""
+    loop_factory = uvloop.new_event_loop if UVLOOP_AVAILABLE else None
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        return runner.run(coro)
+
+
 if __name__ == "__main__":
-    asyncio.run(demo_advanced_pipeline())
\ No newline at end of file
+    run_async(demo_advanced_pipeline())
\ No newline at end of file
@@ -4,16 +4,77 @@ Quick Prompt Customization Tool
 Easy way to set custom system prompts for each LLM
 """
 
-import json
 import os
+import sys
+
+import fast_json
+
+CONFIG_FILE = 'prompt_config.json'
+
+# Parsed config reused until the file's mtime changes
+_CONFIG_CACHE = {'mtime_ns': None, 'data': None}
+
+# Name and description given to the custom project type when it is first created
+CUSTOM_SKELETON = {
+    "name": "Custom Configuration",
+    "description": "User-defined custom prompts"
+}
+
+# LLM name -> (stage section, prompt field) in a project type
+STAGE_PROMPT_KEYS = {
+    'gemini': ('stage_1_gemini', 'system_instruction'),
+    'chatgpt': ('stage_2_chatgpt', 'system_prompt'),
+    'claude': ('stage_3_claude', 'system_prompt'),
+    'deepseek': ('stage_4_deepseek', 'system_prompt')
+}
+
+# Heading shown for each stage by show_current_prompts, and how much of each prompt to preview
+SHOW_LABELS = (
+    ('gemini', "🔍 Gemini (Stage 1)"),
+    ('chatgpt', "🛠️ ChatGPT (Stage 2)"),
+    ('claude', "🔗 Claude (Stage 3)"),
+    ('deepseek', "✅ DeepSeek (Stage 4)")
+)
+PREVIEW_CHARS = 100
+
+# Input prompt shown for each LLM by interactive_setup
+INPUT_LABELS = (
+    ('gemini', "\n🔍 Gemini system prompt: "),
+    ('chatgpt', "🛠️ ChatGPT system prompt: "),
+    ('claude', "🔗 Claude system prompt: "),
+    ('deepseek', "✅ DeepSeek system prompt: ")
+)
 
 def load_config():
-    """Load current prompt configuration"""
+    """Load current prompt configuration, reusing the parsed copy while the file is unchanged"""
     try:
-        with open('prompt_config.json', 'r') as f:
-            return json.load(f)
+        mtime_ns = os.stat(CONFIG_FILE).st_mtime_ns
     except FileNotFoundError:
-        return create_default_config()
+        mtime_ns = None
+    
+    if _CONFIG_CACHE['data'] is None or _CONFIG_CACHE['mtime_ns'] != mtime_ns:
+        if mtime_ns is None:
+            _CONFIG_CACHE['data'] = create_default_config()
+        else:
+            _CONFIG_CACHE['data'] = fast_json.load_file(CONFIG_FILE)
+        _CONFIG_CACHE['mtime_ns'] = mtime_ns
+    
+    return _CONFIG_CACHE['data']
+
+def save_config(config):
+    """Atomically write the prompt configuration and keep the in-memory cache in sync"""
+    # Per-process temp name so concurrent writers never share a partial file
+    tmp_path = f"{CONFIG_FILE}.{os.getpid()}.tmp"
+    try:
+        fast_json.dump_file(config, tmp_path)
+        os.replace(tmp_path, CONFIG_FILE)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    
+    _CONFIG_CACHE['data'] = config
+    _CONFIG_CACHE['mtime_ns'] = os.stat(CONFIG_FILE).st_mtime_ns
 
 def create_default_config():
     """Create default configuration if none exists"""
@@ -44,113 +105,67 @@ def create_default_config():
         "active_project_type": "custom"
     }
 
-def set_gemini_prompt(prompt_text):
-    """Set custom Gemini system prompt"""
-    config = load_config()
-    
-    if 'custom' not in config['project_types']:
-        config['project_types']['custom'] = {
-            "name": "Custom Configuration",
-            "description": "User-defined custom prompts"
-        }
+def _ensure_custom(config):
+    """Get the custom project type, creating it from the skeleton if missing"""
+    project_types = config['project_types']
+    custom = project_types.get('custom')
+    if custom is None:
+        custom = project_types['custom'] = dict(CUSTOM_SKELETON)
+    return custom
+
+def _stage_set(config, llm, prompt_text, *, flush=True):
+    """Set one LLM's prompt on the custom project type; write the file only when flush is set"""
+    stage_key, inner_key = STAGE_PROMPT_KEYS[llm]
     
-    config['project_types']['custom']['stage_1_gemini'] = {
-        "system_instruction": prompt_text
+    custom = _ensure_custom(config)
+    custom[stage_key] = {
+        inner_key: prompt_text
     }
     config['active_project_type'] = 'custom'
     
-    with open('prompt_config.json', 'w') as f:
-        json.dump(config, f, indent=2)
-    
+    if flush:
+        save_config(config)
+
+def set_gemini_prompt(prompt_text):
+    """Set custom Gemini system prompt"""
+    _stage_set(load_config(), 'gemini', prompt_text)
     print(f"✅ Gemini prompt updated")
 
 def set_chatgpt_prompt(prompt_text):
     """Set custom ChatGPT system prompt"""
-    config = load_config()
-    
-    if 'custom' not in config['project_types']:
-        config['project_types']['custom'] = {
-            "name": "Custom Configuration",
-            "description": "User-defined custom prompts"
-        }
-    
-    config['project_types']['custom']['stage_2_chatgpt'] = {
-        "system_prompt": prompt_text
-    }
-    config['active_project_type'] = 'custom'
-    
-    with open('prompt_config.json', 'w') as f:
-        json.dump(config, f, indent=2)
-    
+    _stage_set(load_config(), 'chatgpt', prompt_text)
     print(f"✅ ChatGPT prompt updated")
 
 def set_claude_prompt(prompt_text):
     """Set custom Claude system prompt"""
-    config = load_config()
-    
-    if 'custom' not in config['project_types']:
-        config['project_types']['custom'] = {
-            "name": "Custom Configuration",
-            "description": "User-defined custom prompts"
-        }
-    
-    config['project_types']['custom']['stage_3_claude'] = {
-        "system_prompt": prompt_text
-    }
-    config['active_project_type'] = 'custom'
-    
-    with open('prompt_config.json', 'w') as f:
-        json.dump(config, f, indent=2)
-    
+    _stage_set(load_config(), 'claude', prompt_text)
     print(f"✅ Claude prompt updated")
 
 def set_deepseek_prompt(prompt_text):
     """Set custom DeepSeek system prompt"""
-    config = load_config()
-    
-    if 'custom' not in config['project_types']:
-        config['project_types']['custom'] = {
-            "name": "Custom Configuration", 
-            "description": "User-defined custom prompts"
-        }
-    
-    config['project_types']['custom']['stage_4_deepseek'] = {
-        "system_prompt": prompt_text
-    }
-    config['active_project_type'] = 'custom'
-    
-    with open('prompt_config.json', 'w') as f:
-        json.dump(config, f, indent=2)
-    
+    _stage_set(load_config(), 'deepseek', prompt_text)
     print(f"✅ DeepSeek prompt updated")
 
 def set_all_prompts(gemini_prompt, chatgpt_prompt, claude_prompt, deepseek_prompt):
-    """Set all prompts at once"""
+    """Set all prompts at once with a single write"""
     config = load_config()
     
-    config['project_types']['custom'] = {
-        "name": "Custom Configuration",
-        "description": "User-defined custom prompts",
-        "stage_1_gemini": {
-            "system_instruction": gemini_prompt
-        },
-        "stage_2_chatgpt": {
-            "system_prompt": chatgpt_prompt
-        },
-        "stage_3_claude": {
-            "system_prompt": claude_prompt
-        },
-        "stage_4_deepseek": {
-            "system_prompt": deepseek_prompt
-        }
-    }
-    config['active_project_type'] = 'custom'
+    config['project_types']['custom'] = dict(CUSTOM_SKELETON)
+    _stage_set(config, 'gemini', gemini_prompt, flush=False)
+    _stage_set(config, 'chatgpt', chatgpt_prompt, flush=False)
+    _stage_set(config, 'claude', claude_prompt, flush=False)
+    _stage_set(config, 'deepseek', deepseek_prompt, flush=False)
     
-    with open('prompt_config.json', 'w') as f:
-        json.dump(config, f, indent=2)
+    save_config(config)
     
     print("✅ All prompts updated successfully!")
 
+def _preview(text):
+    """Shorten a prompt for display, adding an ellipsis only when it was cut"""
+    if len(text) <= PREVIEW_CHARS:
+        return text
+    return f"{text[:PREVIEW_CHARS]}..."
+
 def show_current_prompts():
     """Display current prompt configuration"""
     config = load_config()
@@ -165,25 +180,12 @@ def show_current_prompts():
     print(f"\n📋 Current Prompts ({active_type}):")
     print("=" * 50)
     
-    if 'stage_1_gemini' in prompts:
-        gemini_prompt = prompts['stage_1_gemini'].get('system_instruction', 'Not set')
-        print(f"\n🔍 Gemini (Stage 1):")
-        print(f"{gemini_prompt[:100]}...")
-    
-    if 'stage_2_chatgpt' in prompts:
-        chatgpt_prompt = prompts['stage_2_chatgpt'].get('system_prompt', 'Not set')
-        print(f"\n🛠️ ChatGPT (Stage 2):")
-        print(f"{chatgpt_prompt[:100]}...")
-    
-    if 'stage_3_claude' in prompts:
-        claude_prompt = prompts['stage_3_claude'].get('system_prompt', 'Not set')
-        print(f"\n🔗 Claude (Stage 3):")
-        print(f"{claude_prompt[:100]}...")
-    
-    if 'stage_4_deepseek' in prompts:
-        deepseek_prompt = prompts['stage_4_deepseek'].get('system_prompt', 'Not set')
-        print(f"\n✅ DeepSeek (Stage 4):")
-        print(f"{deepseek_prompt[:100]}...")
+    for llm, label in SHOW_LABELS:
+        stage_key, inner_key = STAGE_PROMPT_KEYS[llm]
+        stage = prompts.get(stage_key)
+        if stage is not None:
+            print(f"\n{label}:")
+            print(_preview(stage.get(inner_key, 'Not set')))
 
 def interactive_setup():
     """Interactive prompt setup"""
@@ -193,51 +195,25 @@ def interactive_setup():
     print("\nEnter custom prompts for each LLM:")
     print("(Press Enter to skip any prompt)")
     
-    gemini_prompt = input("\n🔍 Gemini system prompt: ").strip()
-    chatgpt_prompt = input("🛠️ ChatGPT system prompt: ").strip()
-    claude_prompt = input("🔗 Claude system prompt: ").strip()
-    deepseek_prompt = input("✅ DeepSeek system prompt: ").strip()
+    prompts = {llm: input(label).strip() for llm, label in INPUT_LABELS}
     
     config = load_config()
     
-    if 'custom' not in config['project_types']:
-        config['project_types']['custom'] = {
-            "name": "Custom Configuration",
-            "description": "User-defined custom prompts"
-        }
-    
-    # Update only non-empty prompts
-    if gemini_prompt:
-        config['project_types']['custom']['stage_1_gemini'] = {
-            "system_instruction": gemini_prompt
-        }
-    
-    if chatgpt_prompt:
-        config['project_types']['custom']['stage_2_chatgpt'] = {
-            "system_prompt": chatgpt_prompt
-        }
-    
-    if claude_prompt:
-        config['project_types']['custom']['stage_3_claude'] = {
-            "system_prompt": claude_prompt
-        }
-    
-    if deepseek_prompt:
-        config['project_types']['custom']['stage_4_deepseek'] = {
-            "system_prompt": deepseek_prompt
-        }
+    # Update only non-empty prompts, then write once
+    for llm, prompt_text in prompts.items():
+        if prompt_text:
+            _stage_set(config, llm, prompt_text, flush=False)
     
+    _ensure_custom(config)
     config['active_project_type'] = 'custom'
     
-    with open('prompt_config.json', 'w') as f:
-        json.dump(config, f, indent=2)
+    save_config(config)
     
     print("\n✅ Custom prompts saved!")
     print("Run the pipeline to use your custom prompts.")
 
-def create_janusai_prompts():
-    """Create JanusAI_V2 specific prompts"""
-    gemini_prompt = """You are an expert multimodal AI analyst specializing in vision-language models. 
+# JanusAI_V2 multimodal preset prompts
+JANUSAI_GEMINI_PROMPT = """You are an expert multimodal AI analyst specializing in vision-language models. 
 
 Focus on JanusAI_V2 specific issues:
 1. **Multimodal Architecture**: Cross-modal attention mechanisms, vision-language alignment
@@ -248,7 +224,7 @@ Focus on JanusAI_V2 specific issues:
 
 Analyze code for multimodal AI patterns and provide actionable recommendations."""
 
-    chatgpt_prompt = """You are an expert multimodal AI engineer for vision-language models.
+JANUSAI_CHATGPT_PROMPT = """You are an expert multimodal AI engineer for vision-language models.
 
 Generate improved code for JanusAI_V2 that:
 1. Optimizes cross-modal attention and fusion mechanisms
@@ -259,7 +235,7 @@ Generate improved code for JanusAI_V2 that:
 
 Focus on creating robust, efficient multimodal AI systems."""
 
-    claude_prompt = """You are an expert multimodal system integrator for JanusAI_V2.
+JANUSAI_CLAUDE_PROMPT = """You are an expert multimodal system integrator for JanusAI_V2.
 
 Ensure multimodal improvements maintain:
 1. Consistent vision-language data flow and tensor operations
@@ -270,7 +246,7 @@ Ensure multimodal improvements maintain:
 
 Integrate code while preserving multimodal architecture consistency."""
 
-    deepseek_prompt = """You are a senior multimodal AI quality engineer for JanusAI_V2.
+JANUSAI_DEEPSEEK_PROMPT = """You are a senior multimodal AI quality engineer for JanusAI_V2.
 
 Verify multimodal code for:
 1. Cross-modal alignment correctness and mathematical validity
@@ -282,13 +258,27 @@ Verify multimodal code for:
 
 Provide multimodal-specific quality assessment and recommendations."""
 
-    set_all_prompts(gemini_prompt, chatgpt_prompt, claude_prompt, deepseek_prompt)
+def create_janusai_prompts():
+    """Create JanusAI_V2 specific prompts"""
+    set_all_prompts(JANUSAI_GEMINI_PROMPT, JANUSAI_CHATGPT_PROMPT,
+                    JANUSAI_CLAUDE_PROMPT, JANUSAI_DEEPSEEK_PROMPT)
     print("✅ JanusAI_V2 multimodal prompts configured!")
 
+# CLI commands that take no arguments, and the per-LLM prompt setters that take the prompt text
+COMMANDS = {
+    'show': show_current_prompts,
+    'interactive': interactive_setup,
+    'janusai': create_janusai_prompts
+}
+PROMPT_SETTERS = {
+    'gemini': set_gemini_prompt,
+    'chatgpt': set_chatgpt_prompt,
+    'claude': set_claude_prompt,
+    'deepseek': set_deepseek_prompt
+}
+
 def main():
     """Main CLI interface"""
-    import sys
-    
     if len(sys.argv) < 2:
         print("Usage:")
         print("  python customize_prompts.py show                    # Show current prompts")
@@ -302,27 +292,17 @@ def main():
     
     command = sys.argv[1].lower()
     
-    if command == 'show':
-        show_current_prompts()
-    elif command == 'interactive':
-        interactive_setup()
-    elif command == 'janusai':
-        create_janusai_prompts()
-    elif command in ['gemini', 'chatgpt', 'claude', 'deepseek']:
+    handler = COMMANDS.get(command)
+    setter = PROMPT_SETTERS.get(command)
+    
+    if handler is not None:
+        handler()
+    elif setter is not None:
         if len(sys.argv) < 3:
             print(f"❌ Please provide prompt text for {command}")
             return
         
-        prompt_text = sys.argv[2]
-        
-        if command == 'gemini':
-            set_gemini_prompt(prompt_text)
-        elif command == 'chatgpt':
-            set_chatgpt_prompt(prompt_text)
-        elif command == 'claude':
-            set_claude_prompt(prompt_text)
-        elif command == 'deepseek':
-            set_deepseek_prompt(prompt_text)
+        setter(sys.argv[2])
     else:
         print(f"❌ Unknown command: {command}")
 
@@ -7,8 +7,11 @@ Demonstrates the pipeline functionality with sample code files
 import os
 import sys
 import json
+import time
+import asyncio
 import logging
-from typing import Dict, Any, List
+from functools import cached_property
+from typing import Dict, Any, List, Tuple
 
 from pipeline_stages import PipelineStages
 from report_generator import ReportGenerator
@@ -21,50 +24,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-class DemoPipeline:
-    def __init__(self):
-        """Initialize the Demo Pipeline"""
-        self.pipeline_stages = PipelineStages()
-        self.report_generator = ReportGenerator()
-        self.security_utils = SecurityUtils()
-        
-        # Pipeline state
-        self.pipeline_state = {
-            'stage': 'initialization',
-            'status': 'running',
-            'results': {},
-            'errors': [],
-            'start_time': None,
-            'end_time': None
-        }
-    
-    def validate_environment(self) -> bool:
-        """Validate that all required API keys are available"""
-        required_vars = [
-            'GEMINI_API_KEY', 
-            'OPENAI_API_KEY',
-            'ANTHROPIC_API_KEY',
-            'DEEPSEEK_API_KEY'
-        ]
-        
-        missing_vars = []
-        for var in required_vars:
-            if not os.getenv(var):
-                missing_vars.append(var)
-        
-        if missing_vars:
-            logger.error(f"Missing required API keys: {missing_vars}")
-            return False
-        
-        logger.info("Environment validation passed")
-        return True
-    
-    def create_sample_files(self) -> List[Dict[str, Any]]:
-        """Create sample code files for demonstration"""
-        sample_files = [
-            {
-                'path': 'calculator.py',
-                'content': '''def divide(a, b):
+# API keys that must be set (and non-empty) for the pipeline to run
+REQUIRED_API_KEYS = (
+    'GEMINI_API_KEY',
+    'OPENAI_API_KEY',
+    'ANTHROPIC_API_KEY',
+    'DEEPSEEK_API_KEY'
+)
+
+# Source of the sample files analyzed in demo mode
+CALCULATOR_SOURCE = '''def divide(a, b):
     return a / b
 
 def calculate_average(numbers):
@@ -83,14 +52,9 @@ class Calculator:
         return result
     
     def get_history(self):
-        return self.history''',
-                'status': 'modified',
-                'additions': 20,
-                'deletions': 0
-            },
-            {
-                'path': 'user_auth.py',
-                'content': '''import hashlib
+        return self.history'''
+
+USER_AUTH_SOURCE = '''import hashlib
 
 def authenticate_user(username, password):
     # Simple authentication - not secure!
@@ -115,47 +79,169 @@ class User:
         if authenticate_user(self.username, self.password):
             self.is_admin = True
             return "Login successful"
-        return "Login failed"''',
-                'status': 'added',
-                'additions': 25,
-                'deletions': 0
+        return "Login failed"'''
+
+# Sample files used by demo mode, stored as parallel tuples (path, content, diff metadata)
+SAMPLE_PATHS = ('calculator.py', 'user_auth.py')
+SAMPLE_CONTENTS = (CALCULATOR_SOURCE, USER_AUTH_SOURCE)
+SAMPLE_META = (('modified', 20, 0), ('added', 25, 0))
+
+# Upper bound on files pushed through the pipeline at the same time
+MAX_FILE_WORKERS = 8
+
+# Fixed text printed around the demo run, built once at import
+DEMO_BANNER = (
+    f"{'=' * 80}\n"
+    "🚀 Multi-LLM Code Quality Pipeline - DEMO MODE\n"
+    f"{'=' * 80}\n"
+    "Demonstrating 4-stage AI-powered code analysis:\n"
+    "1. 🔍 Gemini Analysis - Deep code analysis\n"
+    "2. 🛠️ ChatGPT Generation - Code improvements\n"
+    "3. 🔗 Claude Integration - Seamless integration\n"
+    "4. ✅ DeepSeek Verification - Quality assurance\n"
+    f"{'-' * 80}\n"
+)
+REPORT_HEADER = (
+    f"\n{'=' * 80}\n"
+    "🎯 MULTI-LLM PIPELINE COMPLETE - FINAL REPORT\n"
+    f"{'=' * 80}\n"
+)
+
+# Emoji shown next to each stage status in print_stage_update
+STATUS_EMOJI = {
+    'running': '🔄',
+    'completed': '✅',
+    'failed': '❌',
+    'skipped': '⏭️'
+}
+
+class DemoPipeline:
+    def __init__(self):
+        """Initialize the Demo Pipeline; stages and helpers are built on first use"""
+        # Pipeline state
+        self.pipeline_state = {
+            'stage': 'initialization',
+            'status': 'running',
+            'results': {},
+            'errors': [],
+            'elapsed_ns': None
+        }
+    
+    @cached_property
+    def pipeline_stages(self) -> PipelineStages:
+        """Pipeline stages and their LLM clients, created only after validation passes"""
+        return PipelineStages()
+    
+    @cached_property
+    def report_generator(self) -> ReportGenerator:
+        """Report generator, created on first use"""
+        return ReportGenerator()
+    
+    @cached_property
+    def security_utils(self) -> SecurityUtils:
+        """Security helpers, created on first use"""
+        return SecurityUtils()
+    
+    def validate_environment(self) -> bool:
+        """Validate that all required API keys are available"""
+        env = os.environ
+        if all(env.get(var) for var in REQUIRED_API_KEYS):
+            logger.info("Environment validation passed")
+            return True
+        
+        # Only build the list of missing keys on the failure path
+        missing_vars = [var for var in REQUIRED_API_KEYS if not env.get(var)]
+        logger.error(f"Missing required API keys: {missing_vars}")
+        return False
+    
+    @staticmethod
+    def create_sample_files() -> List[Dict[str, Any]]:
+        """Create sample code files for demonstration"""
+        sample_files = [
+            {
+                'path': path,
+                'content': content,
+                'status': status,
+                'additions': additions,
+                'deletions': deletions
             }
+            for path, content, (status, additions, deletions)
+            in zip(SAMPLE_PATHS, SAMPLE_CONTENTS, SAMPLE_META)
         ]
         
         logger.info(f"Created {len(sample_files)} sample files for demonstration")
         return sample_files
     
     def print_stage_update(self, stage_name: str, status: str, details: str = ""):
-        """Print stage update information"""
-        status_emoji = {
-            'running': '🔄',
-            'completed': '✅',
-            'failed': '❌',
-            'skipped': '⏭️'
-        }
+        """Print stage update information in a single write"""
+        details_line = f"Details: {details}\n" if details else ""
+        sys.stdout.write(
+            f"\n{STATUS_EMOJI.get(status, '🔄')} Multi-LLM Pipeline - Stage: {stage_name}\n"
+            f"Status: {status.title()}\n"
+            f"{details_line}"
+            f"{'-' * 60}\n"
+        )
+    
+    async def process_file(self, file_info: Dict[str, Any]) -> Tuple[Dict[str, Any], ...]:
+        """Run all four stages on a single file, in stage order"""
+        files = [file_info]
+        analysis = await self.pipeline_stages.stage_1_gemini_analysis(files)
+        generation = await self.pipeline_stages.stage_2_chatgpt_generation(analysis, files)
+        integration = await self.pipeline_stages.stage_3_claude_integration(generation, files)
+        verification = await self.pipeline_stages.stage_4_deepseek_verification(integration)
+        return analysis, generation, integration, verification
+    
+    async def process_files(self, sample_files: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], ...]:
+        """Run the per-file pipelines concurrently and merge results in file order"""
+        per_file = {}
+        slots = asyncio.Semaphore(MAX_FILE_WORKERS)
+        
+        async def run_file(file_info: Dict[str, Any]) -> Tuple[str, Tuple[Dict[str, Any], ...]]:
+            async with slots:
+                return file_info['path'], await self.process_file(file_info)
+        
+        for finished in asyncio.as_completed([run_file(f) for f in sample_files]):
+            file_path, results = await finished
+            per_file[file_path] = results
+            passed = per_file[file_path][3].get(file_path, {}).get('verification_passed', False)
+            print(f"   {'✅' if passed else '⚠️'} {file_path}: all stages finished")
+        
+        merged = ({}, {}, {}, {})
+        for f in sample_files:
+            for stage_results, file_results in zip(merged, per_file[f['path']]):
+                stage_results.update(file_results)
+        return merged
+    
+    @staticmethod
+    def count_outcomes(analysis_results: Dict[str, Any], generation_results: Dict[str, Any],
+                       integration_results: Dict[str, Any],
+                       verification_results: Dict[str, Any]) -> Dict[str, int]:
+        """Tally issues and per-stage successes in a single pass over the analyzed files"""
+        issues = improved = integrated = verified = 0
+        
+        for file_path, analysis in analysis_results.items():
+            if analysis.get('status') == 'completed':
+                issues += len(analysis.get('analysis', {}).get('issues', ()))
+            if generation_results.get(file_path, {}).get('status') == 'completed':
+                improved += 1
+            if integration_results.get(file_path, {}).get('status') == 'completed':
+                integrated += 1
+            if verification_results.get(file_path, {}).get('verification_passed', False):
+                verified += 1
         
-        print(f"\n{status_emoji.get(status, '🔄')} Multi-LLM Pipeline - Stage: {stage_name}")
-        print(f"Status: {status.title()}")
-        if details:
-            print(f"Details: {details}")
-        print("-" * 60)
+        return {
+            'issues': issues,
+            'improved': improved,
+            'integrated': integrated,
+            'verified': verified
+        }
     
     def run_demo(self):
         """Run the complete multi-LLM pipeline demonstration"""
-        import time
-        
-        self.pipeline_state['start_time'] = time.time()
+        start_ns = time.perf_counter_ns()
         
         try:
-            print("="*80)
-            print("🚀 Multi-LLM Code Quality Pipeline - DEMO MODE")
-            print("="*80)
-            print("Demonstrating 4-stage AI-powered code analysis:")
-            print("1. 🔍 Gemini Analysis - Deep code analysis")
-            print("2. 🛠️ ChatGPT Generation - Code improvements")  
-            print("3. 🔗 Claude Integration - Seamless integration")
-            print("4. ✅ DeepSeek Verification - Quality assurance")
-            print("-" * 80)
+            sys.stdout.write(DEMO_BANNER)
             
             # Validate environment
             if not self.validate_environment():
@@ -166,61 +252,35 @@ class User:
             sample_files = self.create_sample_files()
             print(f"📁 Analyzing {len(sample_files)} sample code files...")
             
-            # Stage 1: Gemini Analysis
-            self.print_stage_update('1 - Gemini Analysis', 'running', 
-                                  'Analyzing code for bugs, performance issues, and improvements...')
+            # Each file goes through all four stages independently, so files run concurrently
+            self.print_stage_update('1-4 - Per-file Pipeline', 'running',
+                                  'Analyzing, improving, integrating and verifying each file concurrently...')
             
-            analysis_results = self.pipeline_stages.stage_1_gemini_analysis(sample_files)
+            (analysis_results, generation_results,
+             integration_results, verification_results) = asyncio.run(self.process_files(sample_files))
             self.pipeline_state['results']['stage_1'] = analysis_results
+            self.pipeline_state['results']['stage_2'] = generation_results
+            self.pipeline_state['results']['stage_3'] = integration_results
+            self.pipeline_state['results']['stage_4'] = verification_results
             
-            total_issues = sum(len(result.get('analysis', {}).get('issues', [])) 
-                             for result in analysis_results.values() 
-                             if result.get('status') == 'completed')
+            counts = self.count_outcomes(analysis_results, generation_results,
+                                         integration_results, verification_results)
             
+            # Stage 1: Gemini Analysis
             self.print_stage_update('1 - Gemini Analysis', 'completed', 
-                                  f'Found {total_issues} issues across {len(analysis_results)} files')
+                                  f"Found {counts['issues']} issues across {len(analysis_results)} files")
             
             # Stage 2: ChatGPT Generation
-            self.print_stage_update('2 - ChatGPT Generation', 'running',
-                                  'Generating improved code based on analysis...')
-            
-            generation_results = self.pipeline_stages.stage_2_chatgpt_generation(
-                analysis_results, sample_files)
-            self.pipeline_state['results']['stage_2'] = generation_results
-            
-            files_improved = sum(1 for result in generation_results.values() 
-                               if result.get('status') == 'completed')
-            
             self.print_stage_update('2 - ChatGPT Generation', 'completed',
-                                  f'Generated improvements for {files_improved} files')
+                                  f"Generated improvements for {counts['improved']} files")
             
             # Stage 3: Claude Integration
-            self.print_stage_update('3 - Claude Integration', 'running',
-                                  'Integrating improved code while maintaining consistency...')
-            
-            integration_results = self.pipeline_stages.stage_3_claude_integration(
-                generation_results, sample_files)
-            self.pipeline_state['results']['stage_3'] = integration_results
-            
-            files_integrated = sum(1 for result in integration_results.values() 
-                                 if result.get('status') == 'completed')
-            
             self.print_stage_update('3 - Claude Integration', 'completed',
-                                  f'Successfully integrated {files_integrated} files')
+                                  f"Successfully integrated {counts['integrated']} files")
             
             # Stage 4: DeepSeek Verification
-            self.print_stage_update('4 - DeepSeek Verification', 'running',
-                                  'Performing final quality assurance and verification...')
-            
-            verification_results = self.pipeline_stages.stage_4_deepseek_verification(
-                integration_results)
-            self.pipeline_state['results']['stage_4'] = verification_results
-            
-            verification_passed = sum(1 for result in verification_results.values()
-                                    if result.get('verification_passed', False))
-            
             self.print_stage_update('4 - DeepSeek Verification', 'completed',
-                                  f'Verification passed for {verification_passed}/{len(verification_results)} files')
+                                  f"Verification passed for {counts['verified']}/{len(verification_results)} files")
             
             # Generate final report
             print("\n📋 Generating comprehensive final report...")
@@ -228,25 +288,25 @@ class User:
                 self.pipeline_state['results']
             )
             
+            elapsed_ns = time.perf_counter_ns() - start_ns
             self.pipeline_state['status'] = 'completed'
-            self.pipeline_state['end_time'] = time.time()
+            self.pipeline_state['elapsed_ns'] = elapsed_ns
             
             # Display results
-            print("\n" + "="*80)
-            print("🎯 MULTI-LLM PIPELINE COMPLETE - FINAL REPORT")
-            print("="*80)
-            print(final_report)
-            print("\n" + "="*80)
-            print("✅ Demo completed successfully!")
-            print(f"⏱️ Total processing time: {self.pipeline_state['end_time'] - self.pipeline_state['start_time']:.2f} seconds")
-            print("="*80)
+            sys.stdout.write(
+                f"{REPORT_HEADER}{final_report}\n"
+                f"\n{'=' * 80}\n"
+                "✅ Demo completed successfully!\n"
+                f"⏱️ Total processing time: {elapsed_ns / 1e9:.2f} seconds\n"
+                f"{'=' * 80}\n"
+            )
             
         except Exception as e:
             logger.error(f"Demo failed: {e}")
             print(f"\n❌ Demo failed: {str(e)}")
             
             self.pipeline_state['status'] = 'failed'
-            self.pipeline_state['end_time'] = time.time()
+            self.pipeline_state['elapsed_ns'] = time.perf_counter_ns() - start_ns
             
             return
 
@@ -13,14 +13,22 @@ from prompt_config import PromptConfigManager, ProjectType
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Display names for the keys returned by PromptConfigManager.get_active_prompts
+STAGE_NAMES = {
+    "stage_1_system_instruction": "Stage 1 - Gemini Analysis",
+    "stage_2_system_prompt": "Stage 2 - ChatGPT Generation",
+    "stage_3_system_prompt": "Stage 3 - Claude Integration",
+    "stage_4_system_prompt": "Stage 4 - DeepSeek Verification"
+}
+
 def demo_prompt_customization():
     """Demonstrate the prompt customization system"""
     print("=" * 80)
     print("Multi-LLM Pipeline: Customizable Prompt System Demo")
     print("=" * 80)
     
-    # Initialize prompt configuration manager
-    config_manager = PromptConfigManager("demo_prompt_config.json")
+    # Initialize prompt configuration manager; the demo's edits are written once before export
+    config_manager = PromptConfigManager("demo_prompt_config.json", autosave=False)
     
     print("\n1. Available Project Types:")
     print("-" * 40)
@@ -48,15 +56,8 @@ def demo_prompt_customization():
     print("-" * 40)
     ai_ml_prompts = config_manager.get_active_prompts()
     
-    stage_names = {
-        "stage_1_system_instruction": "Stage 1 - Gemini Analysis",
-        "stage_2_system_prompt": "Stage 2 - ChatGPT Generation", 
-        "stage_3_system_prompt": "Stage 3 - Claude Integration",
-        "stage_4_system_prompt": "Stage 4 - DeepSeek Verification"
-    }
-    
     for key, prompt in ai_ml_prompts.items():
-        stage_name = stage_names.get(key, key)
+        stage_name = STAGE_NAMES.get(key, key)
         print(f"\n{stage_name}:")
         preview = prompt[:150] + "..." if len(prompt) > 150 else prompt
         print(f"   {preview}")
@@ -112,6 +113,7 @@ Provide blockchain-focused analysis with emphasis on economic security and gas e
     
     print("\n9. Exporting Configuration:")
     print("-" * 40)
+    config_manager.save()
     config_manager.export_prompts("exported_prompts.json")
     print("Configuration exported to exported_prompts.json")
     
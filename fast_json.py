@@ -0,0 +1,103 @@
+"""
+JSON helpers for configuration files and streamed LLM output
+Uses orjson when installed and falls back to the standard library json module
+"""
+
+import json
+from typing import Any, List, Optional, Tuple, Union
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse a JSON document"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, pretty: bool = True) -> bytes:
+    """Serialize an object as UTF-8 JSON, indented by two spaces unless pretty is off"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else None)
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def load_file(path: str) -> Any:
+    """Read and parse a JSON file"""
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def dump_file(obj: Any, path: str, pretty: bool = True):
+    """Serialize an object to a JSON file"""
+    with open(path, 'wb') as f:
+        f.write(dumps(obj, pretty))
+
+
+class StreamingObjectParser:
+    """Incrementally parse a top-level JSON object, returning each member as soon as its value is complete"""
+    
+    def __init__(self):
+        """Start with an empty buffer, before the opening brace"""
+        self._buffer = ""
+        self._started = False
+        self._decoder = json.JSONDecoder()
+    
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """Add streamed text and return the members completed by it"""
+        self._buffer += text
+        members = []
+        while (member := self._next_member()) is not None:
+            members.append(member)
+        return members
+    
+    def _skip(self, pos: int, chars: str = " \t\r\n") -> int:
+        """Advance past any of the given characters"""
+        while pos < len(self._buffer) and self._buffer[pos] in chars:
+            pos += 1
+        return pos
+    
+    def _next_member(self) -> Optional[Tuple[str, Any]]:
+        """Decode the next complete member from the buffer, or None if more text is needed"""
+        buffer = self._buffer
+        pos = self._skip(0)
+        if not self._started:
+            if pos == len(buffer):
+                return None
+            if buffer[pos] != '{':
+                raise ValueError("Streamed JSON is not an object")
+            self._started = True
+            self._buffer = buffer = buffer[pos + 1:]
+            pos = 0
+        
+        pos = self._skip(pos, " \t\r\n,")
+        if pos == len(buffer) or buffer[pos] == '}':
+            self._buffer = buffer[pos:]
+            return None
+        
+        try:
+            key, pos = self._decoder.raw_decode(buffer, pos)
+            pos = self._skip(pos)
+            if pos == len(buffer):
+                return None
+            if buffer[pos] != ':':
+                raise ValueError("Malformed member in streamed JSON object")
+            pos = self._skip(pos + 1)
+            value, end = self._decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            return None
+        
+        # A number cut off by the end of a chunk may still have digits or an exponent in flight
+        if (isinstance(value, (int, float)) and not isinstance(value, bool)
+                and (end == len(buffer) or buffer[end] in "+-.eE")):
+            return None
+        
+        self._buffer = buffer[end:]
+        return key, value
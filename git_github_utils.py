@@ -4,23 +4,142 @@ Handles GitHub API interactions using GitPython and GitHub REST API
 """
 
 import os
+import time
+import asyncio
 import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+import httpx
 import requests
-from typing import List, Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import List, Dict, Any, Optional, Tuple, Callable
 from git import Repo, GitCommandError
 import json
 import base64
 from datetime import datetime
 
+import fast_json
+
 logger = logging.getLogger(__name__)
 
+# h2 is optional; without it the async client falls back to HTTP/1.1
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Seconds a metadata lookup (PR, repository, commit, branch) is served from memory
+METADATA_TTL = 60
+
+def ttl_cached(method):
+    """Cache a GitHubManager getter's non-empty results per arguments for METADATA_TTL seconds"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        now = time.monotonic()
+        entry = self._metadata_cache.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        
+        value = method(self, *args, **kwargs)
+        if value:
+            self._metadata_cache[key] = (now + METADATA_TTL, value)
+        return value
+    return wrapper
+
+# Upper bound on simultaneous GitHub connections when fetching PR file contents
+MAX_CONCURRENT_REQUESTS = 20
+
+# Items per page for list endpoints (the API maximum)
+PAGE_SIZE = 100
+
+# Rotate to the next token once a token's remaining request budget drops to this
+RATE_LIMIT_FLOOR = 50
+
+# Longest wait in seconds for a rate limit to lift before a request is retried once
+MAX_RATE_LIMIT_WAIT = 300
+
+# Media type that makes the contents API return the file body itself instead of base64 JSON
+RAW_CONTENT_ACCEPT = "application/vnd.github.raw"
+
+# Local files larger than this are skipped rather than read into memory
+MAX_LOCAL_FILE_BYTES = 1_000_000
+
+# Suffixes treated as binary without reading the file; others are sniffed for NUL bytes
+BINARY_EXTENSIONS = frozenset({
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.webp', '.pdf',
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.tar', '.jar', '.whl', '.egg',
+    '.so', '.dylib', '.dll', '.exe', '.bin', '.o', '.a', '.pyc', '.class',
+    '.woff', '.woff2', '.ttf', '.otf', '.eot',
+    '.mp3', '.mp4', '.wav', '.avi', '.mov', '.webm',
+    '.pt', '.pth', '.ckpt', '.safetensors', '.onnx', '.h5', '.npy', '.npz', '.pkl'
+})
+BINARY_SNIFF_BYTES = 4096
+
+def has_binary_extension(file_path: str) -> bool:
+    """True when the path's suffix marks a known binary format"""
+    return os.path.splitext(file_path)[1].lower() in BINARY_EXTENSIONS
+
+# PR file listing for GraphQL; blobs are then fetched in aliased batches of GRAPHQL_ALIAS_BATCH
+GRAPHQL_PR_FILES_QUERY = """
+query($owner: String!, $name: String!, $number: Int!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    pullRequest(number: $number) {
+      headRefOid
+      files(first: 100, after: $cursor) {
+        nodes { path additions deletions changeType }
+        pageInfo { hasNextPage endCursor }
+      }
+    }
+  }
+}
+"""
+GRAPHQL_ALIAS_BATCH = 50
+
+# Selections resolved per alias by the batched commit and branch lookups
+GRAPHQL_COMMIT_FIELDS = "... on Commit { oid message author { name date } changedFilesIfAvailable }"
+GRAPHQL_BRANCH_FIELDS = "name branchProtectionRule { id } target { oid ... on Commit { message } }"
+
+# Pipeline states accepted by update_pr_status, mapped to GitHub commit status states
+STATUS_STATE_MAP = {
+    'pending': 'pending',
+    'running': 'pending',
+    'success': 'success',
+    'completed': 'success',
+    'failed': 'failure',
+    'failure': 'failure',
+    'error': 'error'
+}
+
+# GraphQL PatchStatus values mapped to the REST API's file status names
+CHANGE_TYPE_STATUS = {
+    'ADDED': 'added',
+    'MODIFIED': 'modified',
+    'DELETED': 'removed',
+    'RENAMED': 'renamed',
+    'COPIED': 'copied',
+    'CHANGED': 'changed'
+}
+
+# Fields copied verbatim from a PR files API entry into a changed-file dict
+FILE_FIELDS = ('filename', 'status', 'additions', 'deletions', 'changes', 'sha', 'blob_url')
+_get_file_fields = itemgetter(*FILE_FIELDS)
+
 class GitHubManager:
     def __init__(self):
         """Initialize GitHub client with GitPython and REST API"""
         try:
-            self.github_token = os.getenv('GITHUB_TOKEN')
+            # GITHUB_TOKENS (comma-separated) spreads calls over several rate-limit budgets
+            tokens = [t.strip() for t in os.getenv('GITHUB_TOKENS', '').split(',') if t.strip()]
+            self.github_token = tokens[0] if tokens else os.getenv('GITHUB_TOKEN')
             if not self.github_token:
                 raise ValueError("GITHUB_TOKEN not found")
+            self._tokens = tokens or [self.github_token]
+            self._token_index = 0
+            self._token_reset: Dict[str, float] = {}  # token -> epoch seconds its budget resets
             
             self.repository = os.getenv('REPOSITORY')
             if not self.repository:
@@ -39,34 +158,65 @@ class GitHubManager:
             
             # GitHub API base URL
             self.api_base = "https://api.github.com"
+            self.repo_url = f"{self.api_base}/repos/{self.owner}/{self.repo_name}"
             self.headers = {
                 "Authorization": f"token {self.github_token}",
                 "Accept": "application/vnd.github.v3+json",
                 "X-GitHub-Api-Version": "2022-11-28"
             }
             
+            # One pooled keep-alive session for every REST and GraphQL call
+            self.session = requests.Session()
+            self.session.headers.update(self.headers)
+            adapter = HTTPAdapter(
+                pool_connections=10,
+                pool_maxsize=MAX_CONCURRENT_REQUESTS,
+                # Gateway errors are retried only for idempotent calls; a retried POST could
+                # post a comment or review twice. Rate limits (403/429) are left to _send, and
+                # once retries run out the last response is returned rather than RetryError
+                max_retries=Retry(
+                    total=5,
+                    backoff_factor=0.5,
+                    status_forcelist=(502, 503, 504),
+                    allowed_methods=frozenset(('GET', 'PATCH', 'DELETE')),
+                    respect_retry_after_header=True,
+                    raise_on_status=False
+                )
+            )
+            self.session.mount("https://", adapter)
+            
+            # url -> (etag, parsed body, next page url); a 304 reply to If-None-Match
+            # reuses the body and does not count against the rate limit
+            self._etag_cache: Dict[str, Tuple[str, Any, Optional[str]]] = {}
+            
+            # (getter, args, kwargs) -> (expires_at, value) for the @ttl_cached getters
+            self._metadata_cache: Dict[Tuple, Tuple[float, Any]] = {}
+            
             logger.info(f"GitHub client initialized for repository: {self.repository}")
             
         except Exception as e:
             logger.error(f"Failed to initialize GitHub client: {e}")
             raise
 
-    def _make_api_request(self, method: str, endpoint: str, data: Dict = None) -> Dict[str, Any]:
-        """Make authenticated GitHub API request"""
-        url = f"{self.api_base}{endpoint}"
-        
+    def _make_api_request(self, method: str, url: str, data: Dict = None) -> Dict[str, Any]:
+        """Make authenticated GitHub API request to an absolute API URL"""
         try:
             if method.upper() == 'GET':
-                response = requests.get(url, headers=self.headers)
+                response = self._send('GET', url, headers=self._conditional_headers(url))
+                if response.status_code == 304:
+                    return self._etag_cache[url][1]
             elif method.upper() == 'POST':
-                response = requests.post(url, headers=self.headers, json=data)
+                response = self._send('POST', url, json=data)
             elif method.upper() == 'PATCH':
-                response = requests.patch(url, headers=self.headers, json=data)
+                response = self._send('PATCH', url, json=data)
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
             
             response.raise_for_status()
-            return response.json()
+            result = fast_json.loads(response.content)
+            if method.upper() == 'GET':
+                self._remember_etag(url, response, result)
+            return result
             
         except requests.exceptions.RequestException as e:
             logger.error(f"GitHub API request failed: {e}")
@@ -74,35 +224,226 @@ class GitHubManager:
                 logger.error(f"Response: {e.response.text}")
             raise
 
-    def get_pr_changed_files(self, pr_number: int) -> List[Dict[str, Any]]:
-        """Get list of changed files in a pull request"""
+    def _current_token(self) -> str:
+        """Next token whose rate-limit budget is not exhausted (or the one that resets first)"""
+        now = time.time()
+        for offset in range(len(self._tokens)):
+            index = (self._token_index + offset) % len(self._tokens)
+            if self._token_reset.get(self._tokens[index], 0) <= now:
+                self._token_index = index
+                return self._tokens[index]
+        return min(self._tokens, key=lambda token: self._token_reset[token])
+
+    def _track_rate_limit(self, token: str, response: Any) -> bool:
+        """Record a token's remaining budget; True when the request should be retried on another token"""
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        if remaining is None or int(remaining) > RATE_LIMIT_FLOOR:
+            return False
+        
+        self._token_reset[token] = float(response.headers.get('X-RateLimit-Reset', time.time() + 60))
+        self._token_index = (self._token_index + 1) % len(self._tokens)
+        logger.warning(f"GitHub token #{self._tokens.index(token) + 1} has {remaining} requests left, rotating")
+        return response.status_code in (403, 429) and len(self._tokens) > 1
+
+    def _send(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+              **kwargs) -> requests.Response:
+        """Send a request on the pooled session, rotating tokens when one runs out of budget"""
+        for attempt in range(2):
+            for _ in range(len(self._tokens)):
+                token = self._current_token()
+                request_headers = {**(headers or {}), "Authorization": f"token {token}"}
+                response = self.session.request(method, url, headers=request_headers, **kwargs)
+                if not self._track_rate_limit(token, response):
+                    break
+            
+            wait = self._rate_limit_wait(response)
+            if attempt or wait is None:
+                break
+            time.sleep(wait)
+        return response
+
+    def _rate_limit_wait(self, response: Any) -> Optional[float]:
+        """Seconds to wait before retrying a rate-limited response, or None when it should not be retried"""
+        if response.status_code not in (403, 429):
+            return None
+        
+        retry_after = response.headers.get('Retry-After')
+        if retry_after is not None:
+            wait = float(retry_after)
+        elif response.headers.get('X-RateLimit-Remaining') == '0':
+            wait = max(0.0, float(response.headers.get('X-RateLimit-Reset', 0)) - time.time())
+        else:
+            return None
+        
+        if wait > MAX_RATE_LIMIT_WAIT:
+            logger.error(f"GitHub rate limit lifts in {wait:.0f}s, not waiting")
+            return None
+        logger.warning(f"GitHub rate limit hit, retrying in {wait:.0f}s")
+        return wait
+
+    def _invalidate_pr_info(self, pr_number: int):
+        """Drop the cached get_pr_info result after a write to the PR"""
+        self._metadata_cache.pop(('get_pr_info', (pr_number,), ()), None)
+
+    def _conditional_headers(self, url: str) -> Dict[str, str]:
+        """Extra request headers: If-None-Match when a response for the URL is cached"""
+        cached = self._etag_cache.get(url)
+        if cached is None:
+            return {}
+        return {"If-None-Match": cached[0]}
+
+    def _remember_etag(self, url: str, response: Any, body: Any):
+        """Cache a successful GET body, and its next-page link, under its ETag"""
+        etag = response.headers.get('ETag')
+        if etag:
+            self._etag_cache[url] = (etag, body, response.links.get('next', {}).get('url'))
+
+    def _get_page(self, url: str) -> Tuple[Any, Optional[str]]:
+        """Conditional GET of one list page; returns (items, next page url)"""
+        cached = self._etag_cache.get(url)
+        response = self._send('GET', url, headers=self._conditional_headers(url))
+        if response.status_code == 304:
+            return cached[1], cached[2]
+        
+        response.raise_for_status()
+        body = fast_json.loads(response.content)
+        self._remember_etag(url, response, body)
+        return body, response.links.get('next', {}).get('url')
+
+    def _paginate(self, url: str, per_page: int = PAGE_SIZE, limit: Optional[int] = None):
+        """Yield items of a list endpoint page by page, stopping once limit items were yielded"""
+        if limit is not None:
+            per_page = min(per_page, limit)
+        url = f"{url}?per_page={per_page}"
+        count = 0
+        while url:
+            items, url = self._get_page(url)
+            for item in items:
+                yield item
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+
+    def _graphql(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a GitHub GraphQL query and return its data, raising on any reported error"""
+        response = self._send('POST', f"{self.api_base}/graphql",
+                              json={"query": query, "variables": variables})
+        response.raise_for_status()
+        result = fast_json.loads(response.content)
+        if result.get('errors'):
+            raise RuntimeError(f"GraphQL errors: {result['errors']}")
+        return result['data']
+
+    def get_pr_changed_files(self, pr_number: int,
+                             content_filter: Optional[Callable[[str], bool]] = None) -> List[Dict[str, Any]]:
+        """Get changed files in a pull request via GraphQL with a REST fallback; content is fetched only for paths content_filter accepts"""
         try:
-            endpoint = f"/repos/{self.owner}/{self.repo_name}/pulls/{pr_number}/files"
-            files_data = self._make_api_request('GET', endpoint)
-            
-            changed_files = []
-            for file_data in files_data:
-                file_info = {
-                    'filename': file_data['filename'],
-                    'status': file_data['status'],  # added, modified, removed
-                    'additions': file_data['additions'],
-                    'deletions': file_data['deletions'],
-                    'changes': file_data['changes'],
-                    'patch': file_data.get('patch', ''),
-                    'sha': file_data['sha'],
-                    'blob_url': file_data['blob_url']
-                }
-                
-                # Get file content if it's not deleted
-                if file_data['status'] != 'removed':
-                    try:
-                        content = self.get_file_content(file_data['filename'])
-                        file_info['content'] = content
-                    except Exception as e:
-                        logger.warning(f"Could not get content for {file_data['filename']}: {e}")
-                        file_info['content'] = None
-                
-                changed_files.append(file_info)
+            changed_files = self._get_pr_changed_files_graphql(pr_number, content_filter)
+            logger.info(f"Retrieved {len(changed_files)} changed files from PR #{pr_number} via GraphQL")
+            return changed_files
+        except Exception as e:
+            logger.warning(f"GraphQL file fetch failed for PR #{pr_number}, falling back to REST: {e}")
+        
+        return self._get_pr_changed_files_rest(pr_number, content_filter)
+
+    def _get_pr_changed_files_graphql(self, pr_number: int,
+                                      content_filter: Optional[Callable[[str], bool]]) -> List[Dict[str, Any]]:
+        """Fetch the PR file list and the head blob of every file in a few GraphQL round trips"""
+        variables = {"owner": self.owner, "name": self.repo_name, "number": pr_number, "cursor": None}
+        nodes = []
+        while True:
+            pr = self._graphql(GRAPHQL_PR_FILES_QUERY, variables)['repository']['pullRequest']
+            nodes.extend(pr['files']['nodes'])
+            if not pr['files']['pageInfo']['hasNextPage']:
+                break
+            variables["cursor"] = pr['files']['pageInfo']['endCursor']
+        
+        head_oid = pr['headRefOid']
+        changed_files = []
+        for node in nodes:
+            changed_files.append({
+                'filename': node['path'],
+                'status': CHANGE_TYPE_STATUS.get(node['changeType'], node['changeType'].lower()),
+                'additions': node['additions'],
+                'deletions': node['deletions'],
+                'changes': node['additions'] + node['deletions'],
+                'patch': '',  # GraphQL does not expose diffs
+                'sha': None,
+                'blob_url': f"https://github.com/{self.repository}/blob/{head_oid}/{node['path']}"
+            })
+        
+        # Local checkout first, like get_file_content; the rest come from the PR head in batches
+        remote = []
+        for file_info in changed_files:
+            if not self._wants_content(file_info, content_filter):
+                continue
+            if has_binary_extension(file_info['filename']):
+                file_info['content'] = None
+                continue
+            if self.git_repo:
+                found, content = self._read_local_file(file_info['filename'])
+                if found:
+                    file_info['content'] = content
+                    continue
+            remote.append(file_info)
+        
+        blobs = self._graphql_aliases([
+            f"object(expression: {json.dumps(head_oid + ':' + file_info['filename'])}) "
+            "{ ... on Blob { oid text isBinary isTruncated } }"
+            for file_info in remote
+        ])
+        truncated = []
+        for file_info, blob in zip(remote, blobs):
+            blob = blob or {}
+            file_info['sha'] = blob.get('oid')
+            file_info['content'] = None if blob.get('isBinary') else blob.get('text')
+            if blob.get('isTruncated') and not blob.get('isBinary'):
+                truncated.append(file_info)
+        
+        # GraphQL cuts the text of large blobs short; fetch those in full from the REST contents API
+        if truncated:
+            with ThreadPoolExecutor(max_workers=min(len(truncated), MAX_CONCURRENT_REQUESTS)) as executor:
+                contents = executor.map(lambda file_info: self.get_file_content(file_info['filename'], ref=head_oid),
+                                        truncated)
+                for file_info, content in zip(truncated, contents):
+                    file_info['content'] = content
+        
+        return changed_files
+
+    def _graphql_aliases(self, selections: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Resolve repository field selections in aliased batches; results follow selection order"""
+        batches = [selections[start:start + GRAPHQL_ALIAS_BATCH]
+                   for start in range(0, len(selections), GRAPHQL_ALIAS_BATCH)]
+        if len(batches) <= 1:
+            return [result for batch in batches for result in self._graphql_alias_batch(batch)]
+        
+        # Large PRs span several batches; send them concurrently over the pooled session
+        with ThreadPoolExecutor(max_workers=min(len(batches), MAX_CONCURRENT_REQUESTS)) as executor:
+            return [result for batch_results in executor.map(self._graphql_alias_batch, batches)
+                    for result in batch_results]
+
+    def _graphql_alias_batch(self, batch: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Resolve one batch of repository field selections in a single aliased query"""
+        aliases = " ".join(f"a{i}: {selection}" for i, selection in enumerate(batch))
+        query = ("query($owner: String!, $name: String!) { repository(owner: $owner, name: $name) { "
+                 + aliases + " } }")
+        repository = self._graphql(query, {"owner": self.owner, "name": self.repo_name})['repository']
+        return [repository.get(f"a{i}") for i in range(len(batch))]
+
+    def _get_pr_changed_files_rest(self, pr_number: int,
+                                   content_filter: Optional[Callable[[str], bool]]) -> List[Dict[str, Any]]:
+        """Get changed files through the REST API, fetching file contents on a thread pool"""
+        try:
+            url = f"{self.repo_url}/pulls/{pr_number}/files"
+            changed_files = [self._file_info(file_data) for file_data in self._paginate(url)]
+            
+            # Get file content if it's not deleted or filtered out; requests releases the GIL
+            # while waiting on the socket and the session pool holds MAX_CONCURRENT_REQUESTS connections
+            pending = [f for f in changed_files if self._wants_content(f, content_filter)]
+            with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+                contents = executor.map(self.get_file_content, [f['filename'] for f in pending])
+                for file_info, content in zip(pending, contents):
+                    file_info['content'] = content
             
             logger.info(f"Retrieved {len(changed_files)} changed files from PR #{pr_number}")
             return changed_files
@@ -111,50 +452,210 @@ class GitHubManager:
             logger.error(f"Failed to get PR changed files: {e}")
             return []
 
+    async def aget_pr_changed_files(self, pr_number: int,
+                                    content_filter: Optional[Callable[[str], bool]] = None) -> List[Dict[str, Any]]:
+        """Get changed files in a pull request, fetching all file contents concurrently"""
+        try:
+            limits = httpx.Limits(max_connections=MAX_CONCURRENT_REQUESTS,
+                                  max_keepalive_connections=MAX_CONCURRENT_REQUESTS)
+            # Over HTTP/2 the concurrent content requests share one multiplexed connection
+            async with httpx.AsyncClient(base_url=self.api_base, headers=self.headers,
+                                         limits=limits, http2=HTTP2_AVAILABLE) as client:
+                changed_files = []
+                url = f"{self.repo_url}/pulls/{pr_number}/files?per_page={PAGE_SIZE}"
+                while url:
+                    files_data, url = await self._aget_page(client, url)
+                    changed_files.extend(self._file_info(file_data) for file_data in files_data)
+                
+                pending = [f for f in changed_files if self._wants_content(f, content_filter)]
+                contents = await asyncio.gather(
+                    *(self._aget_file_content(client, f['filename']) for f in pending)
+                )
+                for file_info, content in zip(pending, contents):
+                    file_info['content'] = content
+            
+            logger.info(f"Retrieved {len(changed_files)} changed files from PR #{pr_number}")
+            return changed_files
+        
+        except Exception as e:
+            logger.error(f"Failed to get PR changed files: {e}")
+            return []
+
+    @staticmethod
+    def _wants_content(file_info: Dict[str, Any], content_filter: Optional[Callable[[str], bool]]) -> bool:
+        """True when a changed file's content should be fetched: not removed and accepted by the filter"""
+        if file_info['status'] == 'removed':
+            return False
+        return content_filter is None or content_filter(file_info['filename'])
+
+    def _file_info(self, file_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Map a PR files API entry to the changed-file dict used by the pipeline"""
+        file_info = dict(zip(FILE_FIELDS, _get_file_fields(file_data)))
+        file_info['patch'] = file_data.get('patch', '')
+        return file_info
+
+    def _read_local_file(self, file_path: str) -> Tuple[bool, Optional[str]]:
+        """Read a file from the local checkout; returns (found, content)"""
+        try:
+            size = os.stat(file_path).st_size
+        except FileNotFoundError:
+            logger.warning(f"File not found locally: {file_path}")
+            return False, None
+        
+        # Same cap as the contents API, which refuses files above 1 MB
+        if size > MAX_LOCAL_FILE_BYTES:
+            logger.warning(f"Skipping large file ({size} bytes): {file_path}")
+            return True, None
+        
+        try:
+            with open(file_path, 'rb') as f:
+                head = f.read(BINARY_SNIFF_BYTES)
+                # A NUL byte in the first block marks a binary file without reading the rest
+                if b'\0' not in head:
+                    return True, (head + f.read()).decode('utf-8')
+        except UnicodeDecodeError:
+            pass
+        
+        logger.warning(f"Binary file detected: {file_path}")
+        return True, None
+
+    def _decode_file_data(self, file_path: str, file_data: Dict[str, Any]) -> Optional[str]:
+        """Decode the content of a contents API response"""
+        if file_data.get('type') != 'file':
+            logger.warning(f"Path is not a file: {file_path}")
+            return None
+        
+        # The API wraps base64 at 60 columns; the non-validating decoder skips the
+        # newlines in C, so no separate strip pass over the payload is needed
+        raw = base64.b64decode(file_data['content'].encode('ascii'), validate=False)
+        try:
+            return raw.decode('utf-8')
+        except UnicodeDecodeError:
+            logger.warning(f"Binary file detected: {file_path}")
+            return None
+
     def get_file_content(self, file_path: str, ref: str = None) -> Optional[str]:
         """Get content of a file from the repository"""
+        if has_binary_extension(file_path):
+            return None
+        
         try:
             # Use GitPython if available and no specific ref requested
             if self.git_repo and ref is None:
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        return f.read()
-                except FileNotFoundError:
-                    logger.warning(f"File not found locally: {file_path}")
-                except UnicodeDecodeError:
-                    logger.warning(f"Binary file detected: {file_path}")
-                    return None
+                found, content = self._read_local_file(file_path)
+                if found:
+                    return content
             
             # Fallback to GitHub API
-            endpoint = f"/repos/{self.owner}/{self.repo_name}/contents/{file_path}"
+            url = f"{self.repo_url}/contents/{file_path}"
             if ref:
-                endpoint += f"?ref={ref}"
-            
-            file_data = self._make_api_request('GET', endpoint)
+                url += f"?ref={ref}"
             
-            if file_data.get('type') == 'file':
-                content = base64.b64decode(file_data['content']).decode('utf-8')
-                return content
-            else:
-                logger.warning(f"Path is not a file: {file_path}")
-                return None
-                
+            headers = {**self._conditional_headers(url), "Accept": RAW_CONTENT_ACCEPT}
+            response = self._send('GET', url, headers=headers)
+            return self._raw_content_result(url, file_path, response)
+        
+        except Exception as e:
+            logger.error(f"Failed to get file content for {file_path}: {e}")
+            return None
+
+    def _raw_content_result(self, url: str, file_path: str, response: Any) -> Optional[str]:
+        """File content from a raw-media contents response, or the cached content on a 304"""
+        if response.status_code == 304:
+            return self._etag_cache[url][1]
+        
+        response.raise_for_status()
+        # Directories and submodules come back as JSON metadata even with the raw media type
+        if response.headers.get('Content-Type', '').startswith('application/json'):
+            content = self._decode_file_data(file_path, fast_json.loads(response.content))
+        else:
+            try:
+                content = response.content.decode('utf-8')
+            except UnicodeDecodeError:
+                logger.warning(f"Binary file detected: {file_path}")
+                content = None
+        
+        self._remember_etag(url, response, content)
+        return content
+
+    async def _asend(self, client: httpx.AsyncClient, url: str, headers: Dict[str, str]) -> httpx.Response:
+        """Async GET that rotates tokens and waits out rate limits like _send"""
+        for attempt in range(2):
+            for _ in range(len(self._tokens)):
+                token = self._current_token()
+                response = await client.get(url, headers={**headers, "Authorization": f"token {token}"})
+                if not self._track_rate_limit(token, response):
+                    break
+            
+            wait = self._rate_limit_wait(response)
+            if attempt or wait is None:
+                break
+            await asyncio.sleep(wait)
+        return response
+
+    async def _aget_page(self, client: httpx.AsyncClient, url: str) -> Tuple[Any, Optional[str]]:
+        """Async conditional GET; returns (body, next page url)"""
+        response = await self._asend(client, url, self._conditional_headers(url))
+        if response.status_code == 304:
+            _, body, next_url = self._etag_cache[url]
+            return body, next_url
+        
+        response.raise_for_status()
+        body = fast_json.loads(response.content)
+        self._remember_etag(url, response, body)
+        return body, response.links.get('next', {}).get('url')
+
+    async def _aget_file_content(self, client: httpx.AsyncClient, file_path: str) -> Optional[str]:
+        """Async counterpart of get_file_content for the current checkout or default branch"""
+        if has_binary_extension(file_path):
+            return None
+        
+        try:
+            if self.git_repo:
+                found, content = self._read_local_file(file_path)
+                if found:
+                    return content
+            
+            url = f"{self.repo_url}/contents/{file_path}"
+            headers = {**self._conditional_headers(url), "Accept": RAW_CONTENT_ACCEPT}
+            response = await self._asend(client, url, headers)
+            return self._raw_content_result(url, file_path, response)
+        
         except Exception as e:
             logger.error(f"Failed to get file content for {file_path}: {e}")
             return None
 
     def post_comment(self, pr_number: int, comment: str) -> bool:
         """Post a comment on a pull request"""
+        return self.create_comment(pr_number, comment) is not None
+
+    def create_comment(self, pr_number: int, comment: str) -> Optional[int]:
+        """Post a comment on a pull request and return its id so it can be edited later"""
         try:
-            endpoint = f"/repos/{self.owner}/{self.repo_name}/issues/{pr_number}/comments"
+            url = f"{self.repo_url}/issues/{pr_number}/comments"
             data = {"body": comment}
             
-            self._make_api_request('POST', endpoint, data)
+            result = self._make_api_request('POST', url, data)
             logger.info(f"Posted comment on PR #{pr_number}")
+            self._invalidate_pr_info(pr_number)
+            return result.get('id')
+        
+        except Exception as e:
+            logger.error(f"Failed to post comment on PR #{pr_number}: {e}")
+            return None
+
+    def update_comment(self, comment_id: int, comment: str) -> bool:
+        """Replace the body of an existing pull request comment"""
+        try:
+            url = f"{self.repo_url}/issues/comments/{comment_id}"
+            data = {"body": comment}
+            
+            self._make_api_request('PATCH', url, data)
+            logger.info(f"Updated comment {comment_id}")
             return True
             
         except Exception as e:
-            logger.error(f"Failed to post comment on PR #{pr_number}: {e}")
+            logger.error(f"Failed to update comment {comment_id}: {e}")
             return False
 
     def update_pr_status(self, pr_number: int, state: str, description: str, 
@@ -162,31 +663,33 @@ class GitHubManager:
         """Update PR status check"""
         try:
             # Get the PR to find the head SHA
-            pr_endpoint = f"/repos/{self.owner}/{self.repo_name}/pulls/{pr_number}"
-            pr_data = self._make_api_request('GET', pr_endpoint)
+            pr_url = f"{self.repo_url}/pulls/{pr_number}"
+            pr_data = self._make_api_request('GET', pr_url)
             sha = pr_data['head']['sha']
             
             # Create status check
-            endpoint = f"/repos/{self.owner}/{self.repo_name}/statuses/{sha}"
+            url = f"{self.repo_url}/statuses/{sha}"
             data = {
-                "state": state,  # pending, success, error, failure
+                "state": STATUS_STATE_MAP.get(state, 'pending'),  # pending, success, error, failure
                 "description": description,
                 "context": context
             }
             
-            self._make_api_request('POST', endpoint, data)
+            self._make_api_request('POST', url, data)
             logger.info(f"Updated PR #{pr_number} status: {state}")
+            self._invalidate_pr_info(pr_number)
             return True
             
         except Exception as e:
             logger.error(f"Failed to update PR status: {e}")
             return False
 
+    @ttl_cached
     def get_pr_info(self, pr_number: int) -> Dict[str, Any]:
         """Get pull request information"""
         try:
-            endpoint = f"/repos/{self.owner}/{self.repo_name}/pulls/{pr_number}"
-            pr_data = self._make_api_request('GET', endpoint)
+            url = f"{self.repo_url}/pulls/{pr_number}"
+            pr_data = self._make_api_request('GET', url)
             
             return {
                 'number': pr_data['number'],
@@ -198,7 +701,11 @@ class GitHubManager:
                 'head_sha': pr_data['head']['sha'],
                 'author': pr_data['user']['login'],
                 'created_at': pr_data['created_at'],
-                'updated_at': pr_data['updated_at']
+                'updated_at': pr_data['updated_at'],
+                'commits': pr_data.get('commits'),
+                'additions': pr_data.get('additions'),
+                'deletions': pr_data.get('deletions'),
+                'changed_files': pr_data.get('changed_files')
             }
             
         except Exception as e:
@@ -208,11 +715,12 @@ class GitHubManager:
     def add_pr_label(self, pr_number: int, label: str) -> bool:
         """Add a label to a pull request"""
         try:
-            endpoint = f"/repos/{self.owner}/{self.repo_name}/issues/{pr_number}/labels"
+            url = f"{self.repo_url}/issues/{pr_number}/labels"
             data = {"labels": [label]}
             
-            self._make_api_request('POST', endpoint, data)
+            self._make_api_request('POST', url, data)
             logger.info(f"Added label '{label}' to PR #{pr_number}")
+            self._invalidate_pr_info(pr_number)
             return True
             
         except Exception as e:
@@ -222,14 +730,12 @@ class GitHubManager:
     def remove_pr_label(self, pr_number: int, label: str) -> bool:
         """Remove a label from a pull request"""
         try:
-            endpoint = f"/repos/{self.owner}/{self.repo_name}/issues/{pr_number}/labels/{label}"
-            response = requests.delete(
-                f"{self.api_base}{endpoint}",
-                headers=self.headers
-            )
+            url = f"{self.repo_url}/issues/{pr_number}/labels/{label}"
+            response = self._send('DELETE', url)
             response.raise_for_status()
             
             logger.info(f"Removed label '{label}' from PR #{pr_number}")
+            self._invalidate_pr_info(pr_number)
             return True
             
         except Exception as e:
@@ -239,25 +745,27 @@ class GitHubManager:
     def create_pr_review(self, pr_number: int, body: str, event: str = "COMMENT") -> bool:
         """Create a review on a pull request"""
         try:
-            endpoint = f"/repos/{self.owner}/{self.repo_name}/pulls/{pr_number}/reviews"
+            url = f"{self.repo_url}/pulls/{pr_number}/reviews"
             data = {
                 "body": body,
                 "event": event  # APPROVE, REQUEST_CHANGES, COMMENT
             }
             
-            self._make_api_request('POST', endpoint, data)
+            self._make_api_request('POST', url, data)
             logger.info(f"Created review on PR #{pr_number}")
+            self._invalidate_pr_info(pr_number)
             return True
             
         except Exception as e:
             logger.error(f"Failed to create review: {e}")
             return False
 
+    @ttl_cached
     def get_repository_info(self) -> Dict[str, Any]:
         """Get repository information"""
         try:
-            endpoint = f"/repos/{self.owner}/{self.repo_name}"
-            repo_data = self._make_api_request('GET', endpoint)
+            url = f"{self.repo_url}"
+            repo_data = self._make_api_request('GET', url)
             
             return {
                 'name': repo_data['name'],
@@ -267,44 +775,68 @@ class GitHubManager:
                 'default_branch': repo_data['default_branch'],
                 'private': repo_data['private'],
                 'created_at': repo_data['created_at'],
-                'updated_at': repo_data['updated_at']
+                'updated_at': repo_data['updated_at'],
+                'size': repo_data.get('size'),
+                'stars': repo_data.get('stargazers_count'),
+                'forks': repo_data.get('forks_count'),
+                'open_issues': repo_data.get('open_issues_count')
             }
             
         except Exception as e:
             logger.error(f"Failed to get repository info: {e}")
             return {}
 
+    @ttl_cached
     def get_commit_info(self, sha: str = None) -> Dict[str, Any]:
         """Get commit information using GitPython or GitHub API"""
         try:
             if self.git_repo and sha is None:
                 # Get latest commit from GitPython
                 commit = self.git_repo.head.commit
+                # A name-only diff counts files without computing the per-file line stats; like
+                # commit.stats it compares against the first parent, so PR merge commits count too
+                if commit.parents:
+                    changed_paths = self.git_repo.git.diff('--name-only', commit.parents[0].hexsha, commit.hexsha)
+                else:
+                    changed_paths = self.git_repo.git.diff_tree('--no-commit-id', '--name-only', '-r', '--root', commit.hexsha)
                 return {
                     'sha': commit.hexsha,
                     'message': commit.message.strip(),
-                    'author': str(commit.author),
+                    'author': commit.author.name,
                     'date': commit.committed_datetime.isoformat(),
-                    'files_changed': len(commit.stats.files)
+                    'files_changed': len(changed_paths.splitlines())
                 }
             else:
                 # Use GitHub API
                 sha = sha or "HEAD"
-                endpoint = f"/repos/{self.owner}/{self.repo_name}/commits/{sha}"
-                commit_data = self._make_api_request('GET', endpoint)
+                return self.get_commits_info([sha]).get(sha, {})
                 
-                return {
-                    'sha': commit_data['sha'],
-                    'message': commit_data['commit']['message'],
-                    'author': commit_data['commit']['author']['name'],
-                    'date': commit_data['commit']['author']['date'],
-                    'files_changed': len(commit_data.get('files', []))
+        except Exception as e:
+            logger.error(f"Failed to get commit info: {e}")
+            return {}
+
+    def get_commits_info(self, shas: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get information for several commits in batched GraphQL queries, keyed by the requested SHA"""
+        try:
+            commits = self._graphql_aliases(
+                [f"object(expression: {json.dumps(sha)}) {{ {GRAPHQL_COMMIT_FIELDS} }}" for sha in shas]
+            )
+            return {
+                sha: {
+                    'sha': commit['oid'],
+                    'message': commit['message'],
+                    'author': commit['author']['name'],
+                    'date': commit['author']['date'],
+                    'files_changed': commit.get('changedFilesIfAvailable') or 0
                 }
-                
+                for sha, commit in zip(shas, commits) if commit
+            }
+            
         except Exception as e:
             logger.error(f"Failed to get commit info: {e}")
             return {}
 
+    @ttl_cached
     def get_branch_info(self, branch_name: str = None) -> Dict[str, Any]:
         """Get branch information"""
         try:
@@ -313,14 +845,27 @@ class GitHubManager:
                 branch_name = self.git_repo.active_branch.name
             
             branch_name = branch_name or "main"
-            endpoint = f"/repos/{self.owner}/{self.repo_name}/branches/{branch_name}"
-            branch_data = self._make_api_request('GET', endpoint)
+            return self.get_branches_info([branch_name]).get(branch_name, {})
             
+        except Exception as e:
+            logger.error(f"Failed to get branch info: {e}")
+            return {}
+
+    def get_branches_info(self, branch_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get information for several branches in batched GraphQL queries, keyed by branch name"""
+        try:
+            refs = self._graphql_aliases([
+                f"ref(qualifiedName: {json.dumps('refs/heads/' + name)}) {{ {GRAPHQL_BRANCH_FIELDS} }}"
+                for name in branch_names
+            ])
             return {
-                'name': branch_data['name'],
-                'sha': branch_data['commit']['sha'],
-                'protected': branch_data['protected'],
-                'commit_message': branch_data['commit']['commit']['message']
+                name: {
+                    'name': ref['name'],
+                    'sha': ref['target']['oid'],
+                    'protected': ref['branchProtectionRule'] is not None,
+                    'commit_message': ref['target'].get('message')
+                }
+                for name, ref in zip(branch_names, refs) if ref
             }
             
         except Exception as e:
@@ -330,27 +875,27 @@ class GitHubManager:
     def list_recent_commits(self, limit: int = 10) -> List[Dict[str, Any]]:
         """List recent commits"""
         try:
-            endpoint = f"/repos/{self.owner}/{self.repo_name}/commits"
-            params = f"?per_page={limit}"
-            
-            response = requests.get(
-                f"{self.api_base}{endpoint}{params}",
-                headers=self.headers
-            )
-            response.raise_for_status()
-            commits_data = response.json()
+            url = f"{self.repo_url}/commits"
+            commits_data = self._paginate(url, limit=limit)
             
-            commits = []
-            for commit_data in commits_data:
-                commits.append({
-                    'sha': commit_data['sha'][:8],  # Short SHA
-                    'message': commit_data['commit']['message'].split('\n')[0],  # First line
-                    'author': commit_data['commit']['author']['name'],
-                    'date': commit_data['commit']['author']['date']
-                })
-            
-            return commits
+            return [self._commit_summary(commit_data) for commit_data in commits_data]
             
         except Exception as e:
             logger.error(f"Failed to list recent commits: {e}")
-            return []
\ No newline at end of file
+            return []
+
+    @staticmethod
+    def _commit_summary(commit_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Short SHA, first message line, author and date of a commits API entry"""
+        commit = commit_data['commit']
+        author = commit['author']
+        return {
+            'sha': commit_data['sha'][:8],
+            'message': commit['message'].partition('\n')[0],
+            'author': author['name'],
+            'date': author['date']
+        }
+
+    def close(self):
+        """Release pooled GitHub connections"""
+        self.session.close()
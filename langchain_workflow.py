@@ -3,20 +3,93 @@ LangChain-Inspired Workflow Management for Multi-LLM Pipeline
 Advanced orchestration, memory management, and chain-of-thought capabilities
 """
 
-import json
 import logging
 import asyncio
-from typing import Dict, List, Any, Optional, Callable, Union
+import itertools
+import sys
+import string
+from collections import ChainMap, OrderedDict, defaultdict, deque
+from typing import Dict, List, Any, Optional, Callable, Set, Tuple, Union, MutableMapping, Deque
 from dataclasses import dataclass, asdict
 from enum import Enum
 import time
+import random
 from datetime import datetime
+import secrets
 import hashlib
+import zlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import fast_json
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Marks a key absent from a context when diffing a branch context against its fork
+_MISSING = object()
+
+# Layers a context may stack through copy() before they are flattened back into one dict
+MAX_CONTEXT_LAYERS = 16
+
+# Default cap on workflow nodes running at the same time
+MAX_PARALLEL_NODES = 8
+
+# Executions kept in an orchestrator's history before the oldest are dropped
+MAX_EXECUTION_HISTORY = 10000
+
+# Programming errors that fail the same way on every attempt, so nodes raise them without retrying
+NON_RETRYABLE_EXCEPTIONS = (TypeError, KeyError, IndexError, AttributeError, NameError, NotImplementedError)
+
+# Memoized condition results kept per orchestrator, apart from workflow memory
+MAX_CONDITION_MEMO = 256
+
+# Memory values are stored compressed once a string exceeds this many characters
+COMPRESS_THRESHOLD = 4096
+
+# Shared parser for the str.format templates compiled by compile_template
+_FORMATTER = string.Formatter()
+
+# Batched LLM nodes wait this long for sibling calls before sending a batch, unless it fills up first
+BATCH_WINDOW_MS = 20
+MAX_BATCH_SIZE = 32
+
+
+def compile_template(template: str) -> Callable[[Dict[str, Any]], str]:
+    """Parse a str.format template once; the renderer looks up only the fields it uses"""
+    parts = list(_FORMATTER.parse(template))
+    if all(field_name is None for _, field_name, _, _ in parts):
+        text = "".join(literal for literal, _, _, _ in parts)
+        return lambda data: text
+    
+    def render(data: Dict[str, Any]) -> str:
+        pieces = []
+        for literal, field_name, format_spec, conversion in parts:
+            pieces.append(literal)
+            if field_name is not None:
+                value, _ = _FORMATTER.get_field(field_name, (), data)
+                if conversion:
+                    value = _FORMATTER.convert_field(value, conversion)
+                pieces.append(format(value, format_spec))
+        return "".join(pieces)
+    
+    return render
+
+
+def fork_mapping(values: MutableMapping[str, Any]) -> ChainMap:
+    """Layer a fresh dict over a mapping so writes land on top and reads fall through to it"""
+    layers = values.maps if isinstance(values, ChainMap) else [values]
+    if len(layers) >= MAX_CONTEXT_LAYERS:
+        layers = [dict(values)]
+    return ChainMap({}, *layers)
+
 
 class WorkflowStatus(Enum):
     """Workflow execution status"""
@@ -39,27 +112,42 @@ class NodeType(Enum):
     MEMORY_RETRIEVE = "memory_retrieve"
 
 
-@dataclass
+# Enum members and values read on every step or history entry, resolved once
+_STATUS_RUNNING = WorkflowStatus.RUNNING.value
+_STATUS_COMPLETED = WorkflowStatus.COMPLETED.value
+_STATUS_FAILED = WorkflowStatus.FAILED.value
+_NT_CONDITION = NodeType.CONDITION
+
+
+@dataclass(slots=True)
 class WorkflowContext:
     """Context passed between workflow nodes"""
-    data: Dict[str, Any]
-    metadata: Dict[str, Any]
+    data: MutableMapping[str, Any]
+    metadata: MutableMapping[str, Any]  # also maps each node id to the status dict of its latest run
     session_id: str
     execution_id: str
-    timestamp: str
+    timestamp: str = ""
+    timestamp_ns: int = 0
     
     def copy(self) -> 'WorkflowContext':
-        """Create a copy of the context"""
+        """Create a copy-on-write copy of the context; the copy's writes never reach this context"""
         return WorkflowContext(
-            data=self.data.copy(),
-            metadata=self.metadata.copy(),
+            data=fork_mapping(self.data),
+            metadata=fork_mapping(self.metadata),
             session_id=self.session_id,
             execution_id=self.execution_id,
-            timestamp=self.timestamp
+            timestamp=self.timestamp,
+            timestamp_ns=self.timestamp_ns
         )
+    
+    def get_timestamp(self) -> str:
+        """ISO timestamp of the context, formatted from timestamp_ns on first use"""
+        if not self.timestamp and self.timestamp_ns:
+            self.timestamp = datetime.fromtimestamp(self.timestamp_ns / 1e9).isoformat()
+        return self.timestamp
 
 
-@dataclass
+@dataclass(slots=True)
 class WorkflowNode:
     """Base workflow node"""
     node_id: str
@@ -71,6 +159,9 @@ class WorkflowNode:
     retry_count: int = 3
     timeout: int = 300  # 5 minutes
     dependencies: Optional[List[str]] = None
+    retryable: Tuple[type, ...] = (Exception,)  # exception types worth another attempt
+    successors: Tuple[str, ...] = ()  # frozen copy of the node's edges, set by finalize()
+    execution_hint: str = "io"  # "cpu" nodes run their function in the orchestrator's process pool
     
     def __post_init__(self):
         if self.parameters is None:
@@ -83,34 +174,74 @@ class WorkflowMemory:
     """Advanced memory management for workflows"""
     
     def __init__(self, max_entries: int = 1000):
-        self.memory: Dict[str, Any] = {}
+        # Kept in least- to most-recently-used order, so eviction pops from the front
+        self.memory: OrderedDict[str, Any] = OrderedDict()
         self.max_entries = max_entries
         self.access_count: Dict[str, int] = {}
-        self.timestamps: Dict[str, float] = {}
+        # Lowercased keys and a trigram -> keys index over them, so search only checks likely matches
+        self._key_lower: Dict[str, str] = {}
+        self._trigrams: Dict[str, Set[str]] = defaultdict(set)
         
+    @staticmethod
+    def _key_trigrams(text: str) -> Set[str]:
+        """All three-character substrings of a lowercased key or query"""
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+    
     def store(self, key: str, value: Any, metadata: Optional[Dict[str, Any]] = None):
         """Store data in memory with metadata"""
-        if len(self.memory) >= self.max_entries:
-            self._evict_oldest()
+        if key in self.memory:
+            self.memory.move_to_end(key)
+        else:
+            if len(self.memory) >= self.max_entries:
+                self._evict_oldest()
+            key_lower = key.lower()
+            self._key_lower[key] = key_lower
+            for trigram in self._key_trigrams(key_lower):
+                self._trigrams[trigram].add(key)
             
+        codec = None
+        if isinstance(value, str) and len(value) > COMPRESS_THRESHOLD:
+            value, codec = self._compress(value)
+        
         self.memory[key] = {
             'value': value,
+            'codec': codec,
             'metadata': metadata if metadata is not None else {},
             'stored_at': time.time()
         }
         self.access_count[key] = 0
-        self.timestamps[key] = time.time()
         
-        logger.debug(f"Stored in memory: {key}")
+        logger.debug("Stored in memory: %s", key)
+    
+    async def astore(self, key: str, value: Any, metadata: Optional[Dict[str, Any]] = None):
+        """Store data in memory from a background task"""
+        self.store(key, value, metadata)
     
     def retrieve(self, key: str) -> Any:
         """Retrieve data from memory"""
         if key in self.memory:
             self.access_count[key] += 1
-            self.timestamps[key] = time.time()
-            return self.memory[key]['value']
+            self.memory.move_to_end(key)
+            entry = self.memory[key]
+            if entry['codec'] is not None:
+                return self._decompress(entry['value'], entry['codec'])
+            return entry['value']
         return None
     
+    @staticmethod
+    def _compress(text: str) -> Tuple[bytes, str]:
+        """Compress a long string with zstd when installed, zlib otherwise"""
+        if ZSTD_AVAILABLE:
+            return zstandard.ZstdCompressor(level=3).compress(text.encode('utf-8')), 'zstd'
+        return zlib.compress(text.encode('utf-8'), 1), 'zlib'
+    
+    @staticmethod
+    def _decompress(payload: bytes, codec: str) -> str:
+        """Restore a string stored by _compress"""
+        if codec == 'zstd':
+            return zstandard.ZstdDecompressor().decompress(payload).decode('utf-8')
+        return zlib.decompress(payload).decode('utf-8')
+    
     def get_metadata(self, key: str) -> Dict[str, Any]:
         """Get metadata for a memory entry"""
         if key in self.memory:
@@ -119,93 +250,241 @@ class WorkflowMemory:
     
     def search(self, query: str) -> List[str]:
         """Search memory keys by query"""
-        matching_keys = []
         query_lower = query.lower()
+        if len(query_lower) < 3:
+            candidates = self.memory.keys()
+        else:
+            # Only keys sharing every trigram of the query can contain it
+            candidates = set.intersection(*(self._trigrams.get(trigram, set())
+                                            for trigram in self._key_trigrams(query_lower)))
         
-        for key in self.memory.keys():
-            if query_lower in key.lower():
-                matching_keys.append(key)
-                
-        return sorted(matching_keys, key=lambda k: self.access_count.get(k, 0), reverse=True)
+        matching_keys = [key for key in candidates if query_lower in self._key_lower[key]]
+        return sorted(matching_keys, key=lambda k: (-self.access_count.get(k, 0), k))
+    
+    def size(self) -> int:
+        """Number of entries currently stored"""
+        return len(self.memory)
+    
+    def approx_bytes(self, sample_size: int = 100) -> int:
+        """Estimate memory footprint by sampling entries instead of walking all of them"""
+        entry_count = len(self.memory)
+        if entry_count == 0:
+            return 0
+        
+        sample = list(itertools.islice(self.memory.items(), sample_size))
+        sampled_bytes = sum(
+            sys.getsizeof(key) + sys.getsizeof(entry['value']) + sys.getsizeof(entry['metadata'])
+            for key, entry in sample
+        )
+        return int(sampled_bytes * entry_count / len(sample))
     
     def _evict_oldest(self):
-        """Evict the oldest, least accessed entry"""
+        """Evict the least recently used entry"""
         if not self.memory:
             return
-            
-        # Find least accessed, oldest entry
-        min_access = min(self.access_count.values())
-        oldest_candidates = [k for k, v in self.access_count.items() if v == min_access]
         
-        if oldest_candidates:
-            oldest_key = min(oldest_candidates, key=lambda k: self.timestamps[k])
-            del self.memory[oldest_key]
-            del self.access_count[oldest_key]
-            del self.timestamps[oldest_key]
-            logger.debug(f"Evicted from memory: {oldest_key}")
+        oldest_key, _ = self.memory.popitem(last=False)
+        del self.access_count[oldest_key]
+        for trigram in self._key_trigrams(self._key_lower.pop(oldest_key)):
+            keys = self._trigrams[trigram]
+            keys.discard(oldest_key)
+            if not keys:
+                del self._trigrams[trigram]
+        logger.debug("Evicted from memory: %s", oldest_key)
     
     def clear(self):
         """Clear all memory"""
         self.memory.clear()
         self.access_count.clear()
-        self.timestamps.clear()
+        self._key_lower.clear()
+        self._trigrams.clear()
         logger.info("Memory cleared")
 
 
+class BatchedLLMClient:
+    """Coalesces LLM calls submitted within a short window into one call of a batch function.
+    
+    The batch function receives one list per argument (prompts, system prompts and
+    any extra arguments) and returns the responses in the same order.
+    """
+    
+    def __init__(self, batch_function: Callable, max_wait_ms: float = BATCH_WINDOW_MS,
+                 max_batch_size: int = MAX_BATCH_SIZE):
+        self.batch_function = batch_function
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._queue: List[Tuple[tuple, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._batch_tasks: Set[asyncio.Task] = set()
+    
+    async def submit(self, *args: Any) -> Any:
+        """Queue one call and wait for its slice of the batched response"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append((args, future))
+        
+        if len(self._queue) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush)
+        return await future
+    
+    def _flush(self):
+        """Send everything queued so far as one batch"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        batch, self._queue = self._queue, []
+        if batch:
+            task = asyncio.create_task(self._run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+    
+    async def _run_batch(self, batch: List[Tuple[tuple, asyncio.Future]]):
+        """Call the batch function and scatter its responses to the waiting callers"""
+        argument_lists = [list(values) for values in zip(*(args for args, _ in batch))]
+        try:
+            if asyncio.iscoroutinefunction(self.batch_function):
+                responses = await self.batch_function(*argument_lists)
+            else:
+                responses = await asyncio.to_thread(self.batch_function, *argument_lists)
+            if len(responses) != len(batch):
+                raise ValueError(f"Batch function returned {len(responses)} responses for {len(batch)} prompts")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        logger.debug("Batched LLM call served %s prompts", len(batch))
+        for (_, future), response in zip(batch, responses):
+            if not future.done():
+                future.set_result(response)
+
+
 class WorkflowOrchestrator:
     """Advanced workflow orchestration engine"""
     
-    def __init__(self, memory_size: int = 1000):
+    def __init__(self, memory_size: int = 1000, max_history: int = MAX_EXECUTION_HISTORY):
         self.nodes: Dict[str, WorkflowNode] = {}
-        self.edges: Dict[str, List[str]] = {}  # node_id -> [next_node_ids]
+        self.edges: Dict[str, List[str]] = defaultdict(list)  # node_id -> [next_node_ids]
         self.workflows: Dict[str, Dict[str, Any]] = {}
         self.memory = WorkflowMemory(memory_size)
-        self.execution_history: List[Dict[str, Any]] = []
-        
+        self.execution_history: Deque[Dict[str, Any]] = deque(maxlen=max_history)
+        self._pending_stores: Set[asyncio.Task] = set()
+        # One batcher per batch function, shared by every LLM node that uses it
+        self._batchers: Dict[Callable, BatchedLLMClient] = {}
+        # Bumped on every graph change so derived views can be cached
+        self._graph_version = 0
+        self._visualization_cache: Optional[tuple] = None
+        # (graph version, start node -> forward descendants of each reachable node)
+        self._topo_cache: Optional[Tuple[int, Dict[str, Dict[str, frozenset]]]] = None
+        self._finalized_version = -1
+        # Worker processes for CPU-bound transforms, started on first use
+        self._cpu_pool: Optional[ProcessPoolExecutor] = None
+        # condition node -> taken path -> (nodes reachable along it, nodes only the other path reaches)
+        self._branch_reach: Dict[str, Dict[str, Tuple[frozenset, frozenset]]] = {}
+        # (condition node, digest of its cache_keys inputs) -> result; kept out of self.memory so
+        # branch decisions never evict stored responses or show up in stats and search
+        self._condition_memo: OrderedDict[Tuple[str, str], Any] = OrderedDict()
+    
     def add_node(self, node: WorkflowNode) -> 'WorkflowOrchestrator':
         """Add a node to the workflow"""
         self.nodes[node.node_id] = node
-        if node.node_id not in self.edges:
-            self.edges[node.node_id] = []
-        logger.info(f"Added workflow node: {node.name} ({node.node_id})")
+        self.edges.setdefault(node.node_id, [])
+        self._graph_version += 1
+        logger.info("Added workflow node: %s (%s)", node.name, node.node_id)
         return self
     
     def add_edge(self, from_node: str, to_node: str) -> 'WorkflowOrchestrator':
         """Add an edge between nodes"""
-        if from_node not in self.edges:
-            self.edges[from_node] = []
         self.edges[from_node].append(to_node)
-        logger.debug(f"Added edge: {from_node} -> {to_node}")
+        self._graph_version += 1
+        logger.debug("Added edge: %s -> %s", from_node, to_node)
         return self
     
+    def finalize(self):
+        """Freeze each node's edges into its successors tuple; a no-op until the graph changes"""
+        if self._finalized_version == self._graph_version:
+            return
+        self._branch_reach = {}
+        for node_id, node in self.nodes.items():
+            node.successors = tuple(self.edges.get(node_id, ()))
+            if node.node_type is _NT_CONDITION:
+                true_path, false_path = node.parameters["true_path"], node.parameters["false_path"]
+                reach_true, reach_false = self._reachable(true_path), self._reachable(false_path)
+                self._branch_reach[node_id] = {
+                    false_path: (reach_false, reach_true - reach_false),
+                    true_path: (reach_true, reach_false - reach_true)
+                }
+        self._finalized_version = self._graph_version
+    
+    def _reachable(self, start_node: str) -> frozenset:
+        """Every node reachable from start_node, including itself"""
+        seen = {start_node}
+        stack = [start_node]
+        while stack:
+            for successor in self._successors(stack.pop()):
+                if successor not in seen:
+                    seen.add(successor)
+                    stack.append(successor)
+        return frozenset(seen)
+    
+    async def _call_llm_function(self, llm_function: Callable, prompt: str, system_prompt: str,
+                                 *extra_args: Any) -> Any:
+        """Await coroutine LLM functions; run blocking ones in a worker thread"""
+        if asyncio.iscoroutinefunction(llm_function):
+            return await llm_function(prompt, system_prompt, *extra_args)
+        return await asyncio.to_thread(llm_function, prompt, system_prompt, *extra_args)
+    
     def create_llm_node(self, node_id: str, name: str, llm_function: Callable, 
-                       system_prompt: str = "", user_prompt_template: str = ""):
-        """Create an LLM processing node"""
-        def llm_wrapper(context: WorkflowContext) -> WorkflowContext:
+                       system_prompt: str = "", user_prompt_template: str = "",
+                       include_data: bool = False, llm_function_batch: Optional[Callable] = None):
+        """Create an LLM processing node.
+        
+        With ``include_data`` the LLM function also receives the context data
+        as a third argument. With ``llm_function_batch`` calls from concurrently
+        running nodes sharing that function are sent together through a
+        BatchedLLMClient instead of calling ``llm_function``.
+        """
+        if llm_function_batch is not None and llm_function_batch not in self._batchers:
+            self._batchers[llm_function_batch] = BatchedLLMClient(llm_function_batch)
+        batcher = self._batchers.get(llm_function_batch)
+        render_user_prompt = compile_template(user_prompt_template)
+        
+        async def llm_wrapper(context: WorkflowContext) -> WorkflowContext:
+            node_status = context.metadata[node_id] = {}
             try:
                 # Format prompts with context data
-                formatted_user_prompt = user_prompt_template.format(**context.data)
+                formatted_user_prompt = render_user_prompt(context.data)
                 
-                # Call LLM function
-                response = llm_function(formatted_user_prompt, system_prompt)
+                # Call LLM function without blocking the event loop
+                extra_args = (context.data,) if include_data else ()
+                if batcher is not None:
+                    response = await batcher.submit(formatted_user_prompt, system_prompt, *extra_args)
+                else:
+                    response = await self._call_llm_function(
+                        llm_function, formatted_user_prompt, system_prompt, *extra_args
+                    )
                 
                 # Store response in context
                 context.data[f"{node_id}_response"] = response
-                context.metadata[f"{node_id}_completed"] = True
+                node_status["completed"] = True
                 
                 # Store in memory for future reference
                 self.memory.store(
                     f"{context.session_id}_{node_id}_response",
                     response,
-                    {"node_id": node_id, "timestamp": context.timestamp}
+                    {"node_id": node_id, "timestamp_ns": context.timestamp_ns}
                 )
                 
-                logger.info(f"LLM node {name} completed successfully")
+                logger.info("LLM node %s completed successfully", name)
                 return context
                 
             except Exception as e:
-                logger.error(f"LLM node {name} failed: {e}")
-                context.metadata[f"{node_id}_error"] = str(e)
+                logger.error("LLM node %s failed: %s", name, e)
+                node_status["error"] = str(e)
                 raise
         
         node = WorkflowNode(
@@ -214,49 +493,174 @@ class WorkflowOrchestrator:
             name=name,
             description=f"LLM processing: {name}",
             function=llm_wrapper,
-            parameters={"system_prompt": system_prompt, "user_prompt_template": user_prompt_template}
+            parameters={
+                "system_prompt": system_prompt,
+                "user_prompt_template": user_prompt_template,
+                "include_data": include_data,
+                "batched": batcher is not None
+            }
+        )
+        
+        return self.add_node(node)
+    
+    def create_parallel_node(self, node_id: str, name: str, llm_functions: Dict[str, Callable],
+                             system_prompt: str = "", user_prompt_template: str = "",
+                             include_data: bool = False):
+        """Create a node that runs several independent LLM calls concurrently.
+        
+        ``llm_functions`` maps the context key each result is joined into to the
+        LLM function producing it. ``include_data`` behaves as in create_llm_node.
+        """
+        render_user_prompt = compile_template(user_prompt_template)
+        
+        async def parallel_wrapper(context: WorkflowContext) -> WorkflowContext:
+            node_status = context.metadata[node_id] = {}
+            try:
+                formatted_user_prompt = render_user_prompt(context.data)
+                
+                extra_args = (context.data,) if include_data else ()
+                
+                # A failing branch cancels its siblings instead of letting them run on
+                async with asyncio.TaskGroup() as task_group:
+                    tasks = {
+                        output_key: task_group.create_task(self._call_llm_function(
+                            llm_function, formatted_user_prompt, system_prompt, *extra_args
+                        ))
+                        for output_key, llm_function in llm_functions.items()
+                    }
+                
+                # Join branch results back into the shared context
+                for output_key, task in tasks.items():
+                    response = task.result()
+                    context.data[output_key] = response
+                    self.memory.store(
+                        f"{context.session_id}_{output_key}",
+                        response,
+                        {"node_id": node_id, "timestamp_ns": context.timestamp_ns}
+                    )
+                
+                node_status["completed"] = True
+                logger.info("Parallel node %s completed %s branches", name, len(tasks))
+                return context
+            
+            except Exception as e:
+                logger.error("Parallel node %s failed: %s", name, e)
+                node_status["error"] = str(e)
+                raise
+        
+        node = WorkflowNode(
+            node_id=node_id,
+            node_type=NodeType.PARALLEL,
+            name=name,
+            description=f"Parallel LLM processing: {name}",
+            function=parallel_wrapper,
+            parameters={
+                "branches": list(llm_functions.keys()),
+                "system_prompt": system_prompt,
+                "user_prompt_template": user_prompt_template,
+                "include_data": include_data
+            }
         )
         
         return self.add_node(node)
     
-    def create_transform_node(self, node_id: str, name: str, transform_function: Callable):
-        """Create a data transformation node"""
+    def _get_cpu_pool(self) -> ProcessPoolExecutor:
+        """Process pool for CPU-bound transforms, created on first use"""
+        if self._cpu_pool is None:
+            self._cpu_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+        return self._cpu_pool
+    
+    def create_transform_node(self, node_id: str, name: str, transform_function: Callable,
+                              cpu_bound: bool = False):
+        """Create a data transformation node; coroutine transforms are awaited on the event loop.
+        
+        A cpu_bound transform runs in a worker process so it cannot stall concurrent LLM calls;
+        it must be a picklable module-level function and receives a plain-dict copy of the data.
+        """
         def transform_wrapper(context: WorkflowContext) -> WorkflowContext:
+            node_status = context.metadata[node_id] = {}
             try:
                 result = transform_function(context.data)
                 context.data.update(result)
-                context.metadata[f"{node_id}_completed"] = True
-                logger.info(f"Transform node {name} completed successfully")
+                node_status["completed"] = True
+                logger.info("Transform node %s completed successfully", name)
+                return context
+            except Exception as e:
+                logger.error("Transform node %s failed: %s", name, e)
+                node_status["error"] = str(e)
+                raise
+        
+        async def async_transform_wrapper(context: WorkflowContext) -> WorkflowContext:
+            node_status = context.metadata[node_id] = {}
+            try:
+                result = await transform_function(context.data)
+                context.data.update(result)
+                node_status["completed"] = True
+                logger.info("Transform node %s completed successfully", name)
                 return context
             except Exception as e:
-                logger.error(f"Transform node {name} failed: {e}")
-                context.metadata[f"{node_id}_error"] = str(e)
+                logger.error("Transform node %s failed: %s", name, e)
+                node_status["error"] = str(e)
                 raise
         
+        async def process_transform_wrapper(context: WorkflowContext) -> WorkflowContext:
+            node_status = context.metadata[node_id] = {}
+            try:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._get_cpu_pool(), transform_function, dict(context.data))
+                context.data.update(result)
+                node_status["completed"] = True
+                logger.info("Transform node %s completed successfully", name)
+                return context
+            except Exception as e:
+                logger.error("Transform node %s failed: %s", name, e)
+                node_status["error"] = str(e)
+                raise
+        
+        if asyncio.iscoroutinefunction(transform_function):
+            function = async_transform_wrapper
+        elif cpu_bound:
+            function = process_transform_wrapper
+        else:
+            function = transform_wrapper
         node = WorkflowNode(
             node_id=node_id,
             node_type=NodeType.TRANSFORM,
             name=name,
             description=f"Data transformation: {name}",
-            function=transform_wrapper
+            function=function,
+            execution_hint="cpu" if function is process_transform_wrapper else "io"
         )
         
         return self.add_node(node)
     
     def create_condition_node(self, node_id: str, name: str, condition_function: Callable,
-                            true_path: str, false_path: str):
-        """Create a conditional branching node"""
+                            true_path: str, false_path: str, cache_keys: Optional[List[str]] = None):
+        """Create a conditional branching node; a pure condition given cache_keys is memoized on those data keys"""
         def condition_wrapper(context: WorkflowContext) -> WorkflowContext:
+            node_status = context.metadata[node_id] = {}
             try:
-                result = condition_function(context.data)
+                if cache_keys is None:
+                    result = condition_function(context.data)
+                else:
+                    inputs = repr(tuple(context.data.get(key) for key in cache_keys))
+                    memo_key = (node_id, hashlib.blake2b(inputs.encode(), digest_size=16).hexdigest())
+                    result = self._condition_memo.get(memo_key)
+                    if result is None:
+                        result = condition_function(context.data)
+                        self._condition_memo[memo_key] = result
+                        if len(self._condition_memo) > MAX_CONDITION_MEMO:
+                            self._condition_memo.popitem(last=False)
+                    else:
+                        self._condition_memo.move_to_end(memo_key)
                 context.data[f"{node_id}_condition_result"] = result
-                context.metadata[f"{node_id}_branch"] = true_path if result else false_path
-                context.metadata[f"{node_id}_completed"] = True
-                logger.info(f"Condition node {name} evaluated to {result}")
+                node_status["branch"] = true_path if result else false_path
+                node_status["completed"] = True
+                logger.info("Condition node %s evaluated to %s", name, result)
                 return context
             except Exception as e:
-                logger.error(f"Condition node {name} failed: {e}")
-                context.metadata[f"{node_id}_error"] = str(e)
+                logger.error("Condition node %s failed: %s", name, e)
+                node_status["error"] = str(e)
                 raise
         
         node = WorkflowNode(
@@ -265,7 +669,7 @@ class WorkflowOrchestrator:
             name=name,
             description=f"Conditional branch: {name}",
             function=condition_wrapper,
-            parameters={"true_path": true_path, "false_path": false_path}
+            parameters={"true_path": true_path, "false_path": false_path, "cache_keys": cache_keys}
         )
         
         return self.add_node(node)
@@ -273,24 +677,27 @@ class WorkflowOrchestrator:
     def create_memory_store_node(self, node_id: str, name: str, key_template: str, 
                                 value_path: str):
         """Create a node that stores data in memory"""
+        render_key = compile_template(key_template)
+        
         def memory_store_wrapper(context: WorkflowContext) -> WorkflowContext:
+            node_status = context.metadata[node_id] = {}
             try:
-                key = key_template.format(**context.data)
+                key = render_key(context.data)
                 value = context.data.get(value_path)
                 
                 self.memory.store(key, value, {
                     "node_id": node_id,
                     "session_id": context.session_id,
-                    "timestamp": context.timestamp
+                    "timestamp_ns": context.timestamp_ns
                 })
                 
-                context.metadata[f"{node_id}_stored_key"] = key
-                context.metadata[f"{node_id}_completed"] = True
-                logger.info(f"Memory store node {name} stored: {key}")
+                node_status["stored_key"] = key
+                node_status["completed"] = True
+                logger.info("Memory store node %s stored: %s", name, key)
                 return context
             except Exception as e:
-                logger.error(f"Memory store node {name} failed: {e}")
-                context.metadata[f"{node_id}_error"] = str(e)
+                logger.error("Memory store node %s failed: %s", name, e)
+                node_status["error"] = str(e)
                 raise
         
         node = WorkflowNode(
@@ -304,26 +711,84 @@ class WorkflowOrchestrator:
         
         return self.add_node(node)
     
+    def create_async_memory_store_node(self, node_id: str, name: str, key_template: str,
+                                      value_path: str):
+        """Create a node that stores data in memory without blocking the next node.
+        
+        The store runs as a background task; call flush_pending_stores() before
+        relying on the stored value.
+        """
+        render_key = compile_template(key_template)
+        
+        async def async_memory_store_wrapper(context: WorkflowContext) -> WorkflowContext:
+            node_status = context.metadata[node_id] = {}
+            try:
+                key = render_key(context.data)
+                value = context.data.get(value_path)
+                
+                task = asyncio.create_task(self.memory.astore(key, value, {
+                    "node_id": node_id,
+                    "session_id": context.session_id,
+                    "timestamp_ns": context.timestamp_ns
+                }))
+                self._pending_stores.add(task)
+                task.add_done_callback(self._pending_stores.discard)
+                
+                node_status["stored_key"] = key
+                node_status["completed"] = True
+                logger.info("Memory store node %s scheduled: %s", name, key)
+                return context
+            except Exception as e:
+                logger.error("Memory store node %s failed: %s", name, e)
+                node_status["error"] = str(e)
+                raise
+        
+        node = WorkflowNode(
+            node_id=node_id,
+            node_type=NodeType.MEMORY_STORE,
+            name=name,
+            description=f"Background memory storage: {name}",
+            function=async_memory_store_wrapper,
+            parameters={"key_template": key_template, "value_path": value_path, "background": True}
+        )
+        
+        return self.add_node(node)
+    
+    async def flush_pending_stores(self, timeout: float = 5.0):
+        """Wait for background memory stores to finish"""
+        if not self._pending_stores:
+            return
+        
+        done, pending = await asyncio.wait(set(self._pending_stores), timeout=timeout)
+        for task in done:
+            if task.exception():
+                logger.error("Background memory store failed: %s", task.exception())
+        if pending:
+            logger.warning("%s memory stores still pending after %ss", len(pending), timeout)
+    
     def create_memory_retrieve_node(self, node_id: str, name: str, key_template: str,
                                   output_key: str):
         """Create a node that retrieves data from memory"""
+        render_key = compile_template(key_template)
+        
         def memory_retrieve_wrapper(context: WorkflowContext) -> WorkflowContext:
+            node_status = context.metadata[node_id] = {}
             try:
-                key = key_template.format(**context.data)
+                key = render_key(context.data)
                 value = self.memory.retrieve(key)
                 
                 if value is not None:
                     context.data[output_key] = value
-                    context.metadata[f"{node_id}_retrieved"] = True
+                    node_status["retrieved"] = True
                 else:
-                    context.metadata[f"{node_id}_not_found"] = True
+                    node_status["not_found"] = True
                 
-                context.metadata[f"{node_id}_completed"] = True
-                logger.info(f"Memory retrieve node {name} processed key: {key}")
+                node_status["completed"] = True
+                logger.info("Memory retrieve node %s processed key: %s", name, key)
                 return context
             except Exception as e:
-                logger.error(f"Memory retrieve node {name} failed: {e}")
-                context.metadata[f"{node_id}_error"] = str(e)
+                logger.error("Memory retrieve node %s failed: %s", name, e)
+                node_status["error"] = str(e)
                 raise
         
         node = WorkflowNode(
@@ -338,134 +803,312 @@ class WorkflowOrchestrator:
         return self.add_node(node)
     
     async def execute_workflow(self, start_node: str, initial_context: WorkflowContext,
-                             max_steps: int = 100) -> WorkflowContext:
-        """Execute workflow starting from a specific node"""
-        execution_id = hashlib.md5(f"{start_node}_{time.time()}".encode()).hexdigest()[:8]
+                             max_steps: int = 100, max_parallel: int = MAX_PARALLEL_NODES) -> WorkflowContext:
+        """Execute workflow starting from a specific node.
+        
+        Nodes are dispatched as soon as they become ready, up to ``max_parallel`` at
+        a time; ``max_steps`` bounds the total number of node executions.
+        """
+        execution_id = secrets.token_hex(4)
         initial_context.execution_id = execution_id
         
-        logger.info(f"Starting workflow execution {execution_id} from node: {start_node}")
+        logger.info("Starting workflow execution %s from node: %s", execution_id, start_node)
         
         execution_log = {
             "execution_id": execution_id,
             "start_node": start_node,
             "start_time": time.time(),
             "steps": [],
-            "status": WorkflowStatus.RUNNING.value
+            "status": _STATUS_RUNNING
         }
         
+        self.finalize()
         current_context = initial_context.copy()
-        current_nodes = [start_node]
+        pending = [start_node]
+        # task -> (node id, forked context it was given; None when it runs on current_context)
+        inflight: Dict[asyncio.Task, Tuple[str, Optional[WorkflowContext]]] = {}
+        descendants = self._descendants_from(start_node)
+        # Nodes only reachable through a condition's untaken branch; they are dropped if another path enqueues them
+        pruned: Set[str] = set()
         step_count = 0
+        failure: Optional[BaseException] = None
         
         try:
-            while current_nodes and step_count < max_steps:
-                step_count += 1
-                next_nodes = []
-                
-                for node_id in current_nodes:
-                    if node_id not in self.nodes:
-                        logger.warning(f"Node {node_id} not found, skipping")
-                        continue
+            while pending or inflight:
+                if failure is None:
+                    # A node reached twice runs once, and a node downstream of another pending or
+                    # running node waits for it so fan-in nodes see every branch before running
+                    pending = [node_id for node_id in dict.fromkeys(pending) if node_id not in pruned]
+                    running = [node_id for node_id, _ in inflight.values()]
+                    blockers = pending + running
+                    ready = []
+                    held_nodes = []
+                    for node_id in pending:
+                        if node_id not in self.nodes:
+                            logger.warning("Node %s not found, skipping", node_id)
+                            continue
+                        if (node_id in running
+                                or any(node_id in descendants.get(other, ()) for other in blockers)
+                                or len(ready) + len(inflight) >= max_parallel
+                                or step_count + len(ready) >= max_steps):
+                            held_nodes.append(node_id)
+                            continue
+                        ready.append(node_id)
+                    pending = held_nodes
                     
-                    node = self.nodes[node_id]
-                    step_start = time.time()
-                    
-                    logger.info(f"Executing node: {node.name} ({node_id})")
-                    
-                    try:
-                        # Execute node function with retry logic
-                        for retry in range(node.retry_count):
-                            try:
-                                if node.function:
-                                    # Check if function is async
-                                    if asyncio.iscoroutinefunction(node.function):
-                                        current_context = await asyncio.wait_for(
-                                            node.function(current_context),
-                                            timeout=node.timeout
-                                        )
-                                    else:
-                                        # Execute sync function
-                                        current_context = node.function(current_context)
-                                break
-                            except Exception as e:
-                                if retry < node.retry_count - 1:
-                                    logger.warning(f"Node {node_id} retry {retry + 1}/{node.retry_count}: {e}")
-                                    await asyncio.sleep(2 ** retry)  # Exponential backoff
-                                else:
-                                    raise
-                        
-                        step_duration = time.time() - step_start
-                        
-                        step_log = {
-                            "step": step_count,
-                            "node_id": node_id,
-                            "node_name": node.name,
-                            "duration": step_duration,
-                            "status": "completed",
-                            "timestamp": datetime.now().isoformat()
-                        }
-                        
-                        execution_log["steps"].append(step_log)
-                        
-                        # Determine next nodes
-                        if node.node_type == NodeType.CONDITION:
-                            # Branch based on condition result
-                            branch = current_context.metadata.get(f"{node_id}_branch")
-                            if branch:
-                                next_nodes.append(branch)
+                    # A lone node runs in place; concurrent nodes each get a copy of the context
+                    # and sync functions move to worker threads so they can overlap
+                    in_place = len(ready) == 1 and not inflight
+                    for node_id in ready:
+                        step_count += 1
+                        if in_place:
+                            coroutine = self._run_node(node_id, current_context, step_count,
+                                                       execution_log["steps"])
+                            forked_context = None
                         else:
-                            # Add all connected nodes
-                            next_nodes.extend(self.edges.get(node_id, []))
-                        
-                        logger.info(f"Node {node.name} completed in {step_duration:.2f}s")
-                        
-                    except Exception as e:
-                        step_log = {
-                            "step": step_count,
-                            "node_id": node_id,
-                            "node_name": node.name,
-                            "status": "failed",
-                            "error": str(e),
-                            "timestamp": datetime.now().isoformat()
-                        }
-                        execution_log["steps"].append(step_log)
-                        logger.error(f"Node {node.name} failed: {e}")
-                        raise
+                            forked_context = current_context.copy()
+                            coroutine = self._run_node(node_id, forked_context, step_count,
+                                                       execution_log["steps"], in_thread=True)
+                        inflight[asyncio.create_task(coroutine)] = (node_id, forked_context)
+                    if ready and not in_place:
+                        # Move merges onto a new top layer so they stay invisible to running forks
+                        current_context = current_context.copy()
                 
-                current_nodes = next_nodes
+                if not inflight:
+                    break
+                
+                # Resume as soon as any node finishes so its successors start immediately
+                done, _ = await asyncio.wait(inflight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    node_id, forked_context = inflight.pop(task)
+                    try:
+                        branch_context, next_nodes = task.result()
+                    except Exception as e:
+                        # Stop dispatching, let running nodes finish, then fail the workflow
+                        failure = failure or e
+                        continue
+                    if forked_context is None:
+                        current_context = branch_context
+                    else:
+                        self._merge_context(current_context, forked_context, branch_context)
+                    if next_nodes and node_id in self._branch_reach:
+                        # Reopen what the taken branch reaches, prune what only the other branch reaches
+                        reach_taken, exclusive_other = self._branch_reach[node_id][next_nodes[0]]
+                        pruned -= reach_taken
+                        pruned |= exclusive_other
+                    pending.extend(next_nodes)
+            
+            if failure is not None:
+                raise failure
             
-            execution_log["status"] = WorkflowStatus.COMPLETED.value
+            execution_log["status"] = _STATUS_COMPLETED
             execution_log["end_time"] = time.time()
             execution_log["total_duration"] = execution_log["end_time"] - execution_log["start_time"]
             
-            logger.info(f"Workflow execution {execution_id} completed successfully in {step_count} steps")
+            logger.info("Workflow execution %s completed successfully in %s steps", execution_id, step_count)
             
         except Exception as e:
-            execution_log["status"] = WorkflowStatus.FAILED.value
+            execution_log["status"] = _STATUS_FAILED
             execution_log["error"] = str(e)
             execution_log["end_time"] = time.time()
-            logger.error(f"Workflow execution {execution_id} failed: {e}")
+            logger.error("Workflow execution %s failed: %s", execution_id, e)
             raise
         
         finally:
+            for task in inflight:
+                task.cancel()
             self.execution_history.append(execution_log)
         
         return current_context
     
+    def _successors(self, node_id: str) -> List[str]:
+        """Nodes a node can hand over to: its edges, plus both branches of a condition"""
+        successors = list(self.edges.get(node_id, []))
+        node = self.nodes.get(node_id)
+        if node is not None and node.node_type is _NT_CONDITION:
+            successors += [node.parameters["true_path"], node.parameters["false_path"]]
+        return successors
+    
+    def _descendants_from(self, start_node: str) -> Dict[str, frozenset]:
+        """Forward descendants of every node reachable from start_node, cached until the graph changes.
+        
+        Retry loops make the graph cyclic, so edges back into the current DFS path are
+        set aside first; the remaining DAG is topologically ordered with Kahn's algorithm
+        and descendant sets are accumulated in reverse order.
+        """
+        if self._topo_cache is None or self._topo_cache[0] != self._graph_version:
+            self._topo_cache = (self._graph_version, {})
+        plans = self._topo_cache[1]
+        if start_node in plans:
+            return plans[start_node]
+        
+        # Iterative DFS separating forward edges from back edges
+        forward: Dict[str, List[str]] = {}
+        back_edges = []
+        on_path: Set[str] = set()
+        stack = [(start_node, iter(self._successors(start_node)))]
+        forward[start_node] = []
+        on_path.add(start_node)
+        while stack:
+            node_id, successors = stack[-1]
+            for successor in successors:
+                if successor in on_path:
+                    back_edges.append((node_id, successor))
+                    continue
+                forward[node_id].append(successor)
+                if successor not in forward:
+                    forward[successor] = []
+                    on_path.add(successor)
+                    stack.append((successor, iter(self._successors(successor))))
+                    break
+            else:
+                stack.pop()
+                on_path.discard(node_id)
+        
+        if back_edges:
+            logger.debug("Workflow from %s loops back through: %s", start_node, back_edges)
+        
+        # Kahn's algorithm over the forward edges
+        dep_count = {node_id: 0 for node_id in forward}
+        for successors in forward.values():
+            for successor in successors:
+                dep_count[successor] += 1
+        ready = deque([start_node])
+        order = []
+        while ready:
+            node_id = ready.popleft()
+            order.append(node_id)
+            for successor in forward[node_id]:
+                dep_count[successor] -= 1
+                if dep_count[successor] == 0:
+                    ready.append(successor)
+        
+        descendants: Dict[str, frozenset] = {}
+        for node_id in reversed(order):
+            reached = set(forward[node_id])
+            for successor in forward[node_id]:
+                reached |= descendants[successor]
+            descendants[node_id] = frozenset(reached)
+        
+        plans[start_node] = descendants
+        return descendants
+    
+    async def _run_node(self, node_id: str, context: WorkflowContext, step: int,
+                        steps: List[Dict[str, Any]], in_thread: bool = False) -> Tuple[WorkflowContext, Tuple[str, ...]]:
+        """Run one node with retries, logging the step; returns (context, next node ids).
+        
+        With ``in_thread`` a sync node function runs in a worker thread so it can
+        overlap with the other nodes of its wavefront.
+        """
+        node = self.nodes[node_id]
+        # Wall-clock start for the log (rendered to ISO only when history is read), monotonic for duration
+        started_at = time.time()
+        step_start = time.perf_counter()
+        
+        logger.info("Executing node: %s (%s)", node.name, node_id)
+        
+        try:
+            # Execute node function with retry logic
+            for retry in range(node.retry_count):
+                try:
+                    if node.function:
+                        # Check if function is async
+                        if asyncio.iscoroutinefunction(node.function):
+                            context = await asyncio.wait_for(
+                                node.function(context),
+                                timeout=node.timeout
+                            )
+                        elif in_thread:
+                            context = await asyncio.to_thread(node.function, context)
+                        else:
+                            # Execute sync function
+                            context = node.function(context)
+                    break
+                except Exception as e:
+                    if (retry < node.retry_count - 1 and isinstance(e, node.retryable)
+                            and not isinstance(e, NON_RETRYABLE_EXCEPTIONS)):
+                        logger.warning("Node %s retry %s/%s: %s", node_id, retry + 1, node.retry_count, e)
+                        # Exponential backoff, jittered so nodes failing together retry apart
+                        await asyncio.sleep(2 ** retry * random.uniform(0.5, 1.5))
+                    else:
+                        raise
+            
+            step_duration = time.perf_counter() - step_start
+            
+            steps.append({
+                "step": step,
+                "node_id": node_id,
+                "node_name": node.name,
+                "duration": step_duration,
+                "status": _STATUS_COMPLETED,
+                "timestamp": started_at
+            })
+            
+            # Determine next nodes
+            if node.node_type is _NT_CONDITION:
+                # Branch based on condition result
+                branch = context.metadata.get(node_id, {}).get("branch")
+                next_nodes = (branch,) if branch else ()
+            else:
+                # Add all connected nodes
+                next_nodes = node.successors
+            
+            logger.info("Node %s completed in %.2fs", node.name, step_duration)
+            return context, next_nodes
+        
+        except Exception as e:
+            steps.append({
+                "step": step,
+                "node_id": node_id,
+                "node_name": node.name,
+                "status": _STATUS_FAILED,
+                "error": str(e),
+                "timestamp": started_at
+            })
+            logger.error("Node %s failed: %s", node.name, e)
+            raise
+    
+    @staticmethod
+    def _merge_context(target: WorkflowContext, forked: WorkflowContext, branch: WorkflowContext):
+        """Copy the data and metadata entries a branch wrote over its forked context into target"""
+        for branch_values, forked_values, target_values in ((branch.data, forked.data, target.data),
+                                                            (branch.metadata, forked.metadata, target.metadata)):
+            if branch_values is forked_values:
+                # The branch wrote into the fork's top layer, which holds exactly its changes
+                target_values.update(forked_values.maps[0])
+                continue
+            shared_values = forked_values.parents
+            for key, value in branch_values.items():
+                if shared_values.get(key, _MISSING) is not value:
+                    target_values[key] = value
+    
     def get_execution_history(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get recent execution history"""
-        return self.execution_history[-limit:]
+        """Get recent execution history, with step timestamps rendered as ISO strings"""
+        return [
+            {**execution, "steps": [
+                {**step, "timestamp": datetime.fromtimestamp(step["timestamp"]).isoformat()}
+                for step in execution["steps"]
+            ]}
+            for execution in itertools.islice(self.execution_history,
+                                              max(0, len(self.execution_history) - limit), None)
+        ]
     
     def get_workflow_stats(self) -> Dict[str, Any]:
         """Get workflow statistics"""
         total_executions = len(self.execution_history)
-        successful = sum(1 for ex in self.execution_history if ex["status"] == WorkflowStatus.COMPLETED.value)
-        failed = sum(1 for ex in self.execution_history if ex["status"] == WorkflowStatus.FAILED.value)
-        
-        avg_duration = 0
-        if self.execution_history:
-            durations = [ex.get("total_duration", 0) for ex in self.execution_history if "total_duration" in ex]
-            avg_duration = sum(durations) / len(durations) if durations else 0
+        successful = failed = timed = 0
+        duration_sum = 0.0
+        for ex in self.execution_history:
+            status = ex["status"]
+            if status == _STATUS_COMPLETED:
+                successful += 1
+            elif status == _STATUS_FAILED:
+                failed += 1
+            duration = ex.get("total_duration")
+            if duration is not None:
+                duration_sum += duration
+                timed += 1
+        avg_duration = duration_sum / timed if timed else 0
         
         return {
             "total_nodes": len(self.nodes),
@@ -475,11 +1118,14 @@ class WorkflowOrchestrator:
             "failed_executions": failed,
             "success_rate": successful / total_executions if total_executions > 0 else 0,
             "average_duration": avg_duration,
-            "memory_entries": len(self.memory.memory)
+            "memory_entries": self.memory.size()
         }
     
     def visualize_workflow(self) -> str:
-        """Generate a text visualization of the workflow"""
+        """Generate a text visualization of the workflow, cached until the graph changes"""
+        if self._visualization_cache and self._visualization_cache[0] == self._graph_version:
+            return self._visualization_cache[1]
+        
         lines = ["Workflow Graph:"]
         lines.append("=" * 50)
         
@@ -497,11 +1143,13 @@ class WorkflowOrchestrator:
             
             lines.append("")
         
-        return "\n".join(lines)
+        visualization = "\n".join(lines)
+        self._visualization_cache = (self._graph_version, visualization)
+        return visualization
     
-    def export_workflow(self, filename: str):
-        """Export workflow configuration to JSON"""
-        workflow_data = {
+    def _export_data(self) -> Dict[str, Any]:
+        """Workflow configuration as a JSON-serializable dict"""
+        return {
             "nodes": {node_id: {
                 "node_type": node.node_type.value,
                 "name": node.name,
@@ -509,22 +1157,34 @@ class WorkflowOrchestrator:
                 "parameters": node.parameters,
                 "retry_count": node.retry_count,
                 "timeout": node.timeout,
-                "dependencies": node.dependencies
+                "dependencies": node.dependencies,
+                "execution_hint": node.execution_hint
             } for node_id, node in self.nodes.items()},
-            "edges": self.edges,
+            "edges": dict(self.edges),
             "exported_at": datetime.now().isoformat()
         }
-        
-        with open(filename, 'w') as f:
-            json.dump(workflow_data, f, indent=2)
-        
-        logger.info(f"Workflow exported to {filename}")
+    
+    def export_workflow(self, filename: str):
+        """Export workflow configuration to JSON"""
+        fast_json.dump_file(self._export_data(), filename)
+        logger.info("Workflow exported to %s", filename)
+    
+    async def aexport_workflow(self, filename: str):
+        """Export workflow configuration to JSON, writing the file off the event loop"""
+        workflow_data = self._export_data()
+        await asyncio.to_thread(fast_json.dump_file, workflow_data, filename)
+        logger.info("Workflow exported to %s", filename)
     
     def clear_workflow(self):
         """Clear all workflow nodes and edges"""
         self.nodes.clear()
         self.edges.clear()
+        self._graph_version += 1
         self.memory.clear()
+        self._condition_memo.clear()
+        if self._cpu_pool is not None:
+            self._cpu_pool.shutdown(wait=False)
+            self._cpu_pool = None
         logger.info("Workflow cleared")
 
 
@@ -581,7 +1241,8 @@ def create_parallel_workflow(orchestrator: WorkflowOrchestrator,
                 name=config["name"],
                 llm_function=config["function"],
                 system_prompt=config.get("system_prompt", ""),
-                user_prompt_template=config.get("user_prompt_template", "")
+                user_prompt_template=config.get("user_prompt_template", ""),
+                llm_function_batch=config.get("batch_function")
             )
         
         start_nodes.append(node_id)
@@ -6,21 +6,155 @@ Handles communication with Gemini, ChatGPT, Claude, and DeepSeek
 import os
 import json
 import time
+import random
+import asyncio
 import logging
-from typing import Dict, Any, List, Optional
-import requests
+import inspect
+import functools
+import importlib.util
+from typing import AsyncIterator, Awaitable, Callable, Dict, Any, List, Optional
+import httpx
 
 # Import LLM SDKs
-from openai import OpenAI
-from anthropic import Anthropic
+import openai
+import anthropic
+from openai import OpenAI, AsyncOpenAI
+from anthropic import Anthropic, AsyncAnthropic
 from google import genai
 from google.genai import types
+from google.genai import errors as genai_errors
+
+from response_cache import ResponseCache, request_key
 
 logger = logging.getLogger(__name__)
 
+PROVIDERS = ('gemini', 'openai', 'anthropic', 'deepseek')
+
+# HTTP/2 multiplexing is only available when the optional h2 package is installed
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Requests in flight per provider when stages fan out over files
+MAX_CONCURRENT_CALLS = 8
+
+# DeepSeek pool size; one pooled client serves every concurrent file and retry
+DEEPSEEK_POOL_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=100)
+
+# Analysis (Gemini) and verification (DeepSeek) sample greedily so repeated requests are cacheable
+ANALYSIS_TEMPERATURE = 0.0
+
+# Provider calls are attempted this many times; only transient failures are retried
+MAX_RETRIES = 5
+
+# Full-jitter backoff: retry n sleeps a random time up to min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**n)
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+
+# Rate limiting and server-side failures; other 4xx responses mean the request itself is wrong
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+class EmptyResponseError(ValueError):
+    """A provider answered without any content; treated as transient"""
+
+def is_retryable(error: Exception) -> bool:
+    """True for timeouts, dropped connections, rate limits and 5xx responses"""
+    if isinstance(error, (EmptyResponseError, httpx.TransportError,
+                          openai.APIConnectionError, anthropic.APIConnectionError)):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    if isinstance(error, (openai.APIStatusError, anthropic.APIStatusError)):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    if isinstance(error, genai_errors.APIError):
+        return error.code in RETRYABLE_STATUS_CODES
+    return False
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff so concurrent callers hitting the same limit retry apart"""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+def with_retries(request: Callable[[], str], provider_name: str) -> str:
+    """Run a provider request, retrying transient failures with jittered backoff"""
+    for attempt in range(MAX_RETRIES):
+        try:
+            return request()
+        except Exception as e:
+            logger.warning(f"{provider_name} API attempt {attempt + 1} failed: {e}")
+            if attempt == MAX_RETRIES - 1 or not is_retryable(e):
+                raise
+            time.sleep(backoff_delay(attempt))
+
+async def awith_retries(request: Callable[[], Awaitable[str]], provider_name: str) -> str:
+    """Run an async provider request, retrying transient failures with jittered backoff"""
+    for attempt in range(MAX_RETRIES):
+        try:
+            return await request()
+        except Exception as e:
+            logger.warning(f"{provider_name} API attempt {attempt + 1} failed: {e}")
+            if attempt == MAX_RETRIES - 1 or not is_retryable(e):
+                raise
+            await asyncio.sleep(backoff_delay(attempt))
+
+async def join_stream(chunks: AsyncIterator[str], provider_name: str) -> str:
+    """Collect a streamed completion into one string"""
+    text = "".join([chunk async for chunk in chunks])
+    if not text:
+        raise EmptyResponseError(f"Empty response from {provider_name}")
+    return text
+
+def cached_response(request_for: Callable[..., Dict[str, Any]]):
+    """Serve repeated identical provider requests from the client's response cache"""
+    def decorator(func):
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def stream_wrapper(self, *args, **kwargs):
+                key = self._response_key(request_for, args, kwargs)
+                if key is not None and (cached := self.response_cache.get(key)) is not None:
+                    yield cached
+                    return
+                chunks = []
+                async for chunk in func(self, *args, **kwargs):
+                    chunks.append(chunk)
+                    yield chunk
+                # Only complete, non-empty streams are cached
+                if key is not None and chunks:
+                    self.response_cache.set(key, "".join(chunks))
+            return stream_wrapper
+        
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                key = self._response_key(request_for, args, kwargs)
+                if key is not None and (cached := self.response_cache.get(key)) is not None:
+                    return cached
+                response = await func(self, *args, **kwargs)
+                if key is not None:
+                    self.response_cache.set(key, response)
+                return response
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            key = self._response_key(request_for, args, kwargs)
+            if key is not None and (cached := self.response_cache.get(key)) is not None:
+                return cached
+            response = func(self, *args, **kwargs)
+            if key is not None:
+                self.response_cache.set(key, response)
+            return response
+        return wrapper
+    return decorator
+
 class LLMClients:
-    def __init__(self):
-        """Initialize all LLM clients"""
+    def __init__(self, response_cache: Optional[ResponseCache] = None):
+        """Initialize all LLM clients, optionally caching responses to identical requests"""
+        self.response_cache = response_cache
+        # Shared keep-alive pool so repeated stage calls reuse TCP/TLS connections
+        self.http_client = httpx.Client(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            timeout=httpx.Timeout(60.0, connect=10.0)
+        )
+        self._call_slots = {provider: asyncio.Semaphore(MAX_CONCURRENT_CALLS) for provider in PROVIDERS}
         self.setup_openai()
         self.setup_anthropic()
         self.setup_gemini()
@@ -33,7 +167,9 @@ class LLMClients:
             if not api_key:
                 raise ValueError("OPENAI_API_KEY not found")
             
-            self.openai_client = OpenAI(api_key=api_key)
+            # Retries are handled by with_retries/awith_retries rather than inside the SDK
+            self.openai_client = OpenAI(api_key=api_key, max_retries=0)
+            self.async_openai_client = AsyncOpenAI(api_key=api_key, max_retries=0)
             logger.info("OpenAI client initialized")
         except Exception as e:
             logger.error(f"Failed to initialize OpenAI client: {e}")
@@ -46,7 +182,8 @@ class LLMClients:
             if not api_key:
                 raise ValueError("ANTHROPIC_API_KEY not found")
             
-            self.anthropic_client = Anthropic(api_key=api_key)
+            self.anthropic_client = Anthropic(api_key=api_key, max_retries=0)
+            self.async_anthropic_client = AsyncAnthropic(api_key=api_key, max_retries=0)
             # The newest Anthropic model is "claude-sonnet-4-20250514", not "claude-3-7-sonnet-20250219", "claude-3-5-sonnet-20241022" nor "claude-3-sonnet-20240229"
             self.claude_model = "claude-sonnet-4-20250514"
             logger.info("Anthropic client initialized")
@@ -78,148 +215,295 @@ class LLMClients:
             
             self.deepseek_api_key = api_key
             self.deepseek_base_url = "https://api.deepseek.com/v1"
+            self.deepseek_http = httpx.AsyncClient(
+                base_url=self.deepseek_base_url,
+                headers={"Authorization": f"Bearer {api_key}"},
+                http2=HTTP2_AVAILABLE,
+                limits=DEEPSEEK_POOL_LIMITS,
+                timeout=httpx.Timeout(60.0, connect=5.0)
+            )
             logger.info("DeepSeek client initialized")
         except Exception as e:
             logger.error(f"Failed to initialize DeepSeek client: {e}")
             raise
     
-    def call_gemini(self, prompt: str, system_instruction: str = "") -> str:
+    @staticmethod
+    def _gemini_config(system_instruction: str, response_format: str = "text") -> types.GenerateContentConfig:
+        """Generation config for a Gemini call"""
+        config = types.GenerateContentConfig(temperature=ANALYSIS_TEMPERATURE)
+        if system_instruction:
+            config.system_instruction = system_instruction
+        if response_format == "json":
+            config.response_mime_type = "application/json"
+        return config
+    
+    @staticmethod
+    def _chatgpt_kwargs(prompt: str, system_prompt: str, response_format: str,
+                        prompt_cache_key: Optional[str]) -> Dict[str, Any]:
+        """Request arguments for a ChatGPT call"""
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        
+        kwargs = {
+            # The newest OpenAI model is "gpt-4o" which was released May 13, 2024
+            "model": "gpt-4o",
+            "messages": messages,
+            "max_tokens": 4000
+        }
+        
+        if response_format == "json":
+            kwargs["response_format"] = {"type": "json_object"}
+        
+        if prompt_cache_key:
+            # Routes requests sharing a prompt prefix to OpenAI's server-side prompt cache
+            kwargs["extra_body"] = {"prompt_cache_key": prompt_cache_key}
+        return kwargs
+    
+    def _claude_kwargs(self, prompt: str, system_prompt: str = "") -> Dict[str, Any]:
+        """Request arguments for a Claude call"""
+        kwargs = {
+            "model": self.claude_model,
+            "max_tokens": 4000,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        
+        if system_prompt:
+            kwargs["system"] = system_prompt
+        return kwargs
+    
+    def _deepseek_payload(self, prompt: str, system_prompt: str = "") -> Dict[str, Any]:
+        """JSON payload for a DeepSeek call"""
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        
+        return {
+            "model": "deepseek-chat",
+            "messages": messages,
+            "max_tokens": 4000,
+            "temperature": ANALYSIS_TEMPERATURE
+        }
+    
+    def _deepseek_request(self, prompt: str, system_prompt: str) -> Dict[str, Any]:
+        """URL, headers and JSON payload for a blocking DeepSeek call"""
+        return {
+            "url": f"{self.deepseek_base_url}/chat/completions",
+            "headers": {
+                "Authorization": f"Bearer {self.deepseek_api_key}",
+                "Content-Type": "application/json"
+            },
+            "json": self._deepseek_payload(prompt, system_prompt)
+        }
+    
+    def _response_key(self, request_for: Callable[..., Dict[str, Any]], args: tuple,
+                      kwargs: Dict[str, Any]) -> Optional[str]:
+        """Cache key for a call, or None when caching is disabled"""
+        if self.response_cache is None:
+            return None
+        return request_key(request_for(self, *args, **kwargs))
+    
+    def forget_response(self, provider: str, *args: Any, **kwargs: Any):
+        """Drop a cached response that failed parsing or validation so the next run asks the provider again"""
+        request_for = {'gemini': LLMClients._gemini_request, 'deepseek': LLMClients._deepseek_payload}[provider]
+        key = self._response_key(request_for, args, kwargs)
+        if key is not None:
+            self.response_cache.delete(key)
+    
+    def _gemini_request(self, prompt: str, system_instruction: str = "",
+                        response_format: str = "text") -> Dict[str, Any]:
+        """Cache identity of a Gemini call"""
+        return {
+            "model": self.gemini_model,
+            "system_instruction": system_instruction,
+            "prompt": prompt,
+            "response_format": response_format,
+            "temperature": ANALYSIS_TEMPERATURE
+        }
+    
+    @cached_response(_gemini_request)
+    def call_gemini(self, prompt: str, system_instruction: str = "", response_format: str = "text") -> str:
         """Call Gemini API with retry logic"""
-        max_retries = 3
-        retry_delay = 2
+        def request() -> str:
+            response = self.gemini_client.models.generate_content(
+                model=self.gemini_model,
+                contents=prompt,
+                config=self._gemini_config(system_instruction, response_format)
+            )
+            
+            if response.text:
+                return response.text
+            raise EmptyResponseError("Empty response from Gemini")
         
-        for attempt in range(max_retries):
-            try:
-                config = types.GenerateContentConfig()
-                if system_instruction:
-                    config.system_instruction = system_instruction
-                
-                response = self.gemini_client.models.generate_content(
-                    model=self.gemini_model,
-                    contents=prompt,
-                    config=config
-                )
-                
-                if response.text:
-                    return response.text
-                else:
-                    raise ValueError("Empty response from Gemini")
-                    
-            except Exception as e:
-                logger.warning(f"Gemini API attempt {attempt + 1} failed: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay * (attempt + 1))
-                else:
-                    raise
-    
-    def call_chatgpt(self, prompt: str, system_prompt: str = "", response_format: str = "text") -> str:
+        return with_retries(request, "Gemini")
+    
+    @cached_response(_gemini_request)
+    async def astream_gemini(self, prompt: str, system_instruction: str = "",
+                             response_format: str = "text") -> AsyncIterator[str]:
+        """Stream a Gemini completion as text chunks"""
+        async with self._call_slots['gemini']:
+            stream = await self.gemini_client.aio.models.generate_content_stream(
+                model=self.gemini_model,
+                contents=prompt,
+                config=self._gemini_config(system_instruction, response_format)
+            )
+            async for chunk in stream:
+                if chunk.text:
+                    yield chunk.text
+    
+    async def acall_gemini(self, prompt: str, system_instruction: str = "", response_format: str = "text") -> str:
+        """Call Gemini API with retry logic without blocking the event loop"""
+        async def request() -> str:
+            return await join_stream(self.astream_gemini(prompt, system_instruction, response_format), "Gemini")
+        
+        return await awith_retries(request, "Gemini")
+    
+    # ChatGPT and Claude generate at the provider's default temperature, so their
+    # responses are not cached: one sampled generation would be replayed on every re-run
+    def call_chatgpt(self, prompt: str, system_prompt: str = "", response_format: str = "text",
+                     prompt_cache_key: Optional[str] = None) -> str:
         """Call ChatGPT API with retry logic"""
-        max_retries = 3
-        retry_delay = 2
+        def request() -> str:
+            response = self.openai_client.chat.completions.create(
+                **self._chatgpt_kwargs(prompt, system_prompt, response_format, prompt_cache_key)
+            )
+            
+            if response.choices and response.choices[0].message.content:
+                return response.choices[0].message.content
+            raise EmptyResponseError("Empty response from ChatGPT")
+        
+        return with_retries(request, "ChatGPT")
+    
+    async def astream_chatgpt(self, prompt: str, system_prompt: str = "", response_format: str = "text",
+                              prompt_cache_key: Optional[str] = None) -> AsyncIterator[str]:
+        """Stream a ChatGPT completion as text chunks"""
+        kwargs = self._chatgpt_kwargs(prompt, system_prompt, response_format, prompt_cache_key)
+        async with self._call_slots['openai']:
+            stream = await self.async_openai_client.chat.completions.create(**kwargs, stream=True)
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+    
+    async def acall_chatgpt(self, prompt: str, system_prompt: str = "", response_format: str = "text",
+                            prompt_cache_key: Optional[str] = None) -> str:
+        """Call ChatGPT API with retry logic without blocking the event loop"""
+        async def request() -> str:
+            return await join_stream(
+                self.astream_chatgpt(prompt, system_prompt, response_format, prompt_cache_key), "ChatGPT"
+            )
         
-        for attempt in range(max_retries):
-            try:
-                messages = []
-                if system_prompt:
-                    messages.append({"role": "system", "content": system_prompt})
-                messages.append({"role": "user", "content": prompt})
-                
-                kwargs = {
-                    # The newest OpenAI model is "gpt-4o" which was released May 13, 2024
-                    "model": "gpt-4o",
-                    "messages": messages,
-                    "max_tokens": 4000
-                }
-                
-                if response_format == "json":
-                    kwargs["response_format"] = {"type": "json_object"}
-                
-                response = self.openai_client.chat.completions.create(**kwargs)
-                
-                if response.choices and response.choices[0].message.content:
-                    return response.choices[0].message.content
-                else:
-                    raise ValueError("Empty response from ChatGPT")
-                    
-            except Exception as e:
-                logger.warning(f"ChatGPT API attempt {attempt + 1} failed: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay * (attempt + 1))
-                else:
-                    raise
+        return await awith_retries(request, "ChatGPT")
     
     def call_claude(self, prompt: str, system_prompt: str = "") -> str:
         """Call Claude API with retry logic"""
-        max_retries = 3
-        retry_delay = 2
+        def request() -> str:
+            response = self.anthropic_client.messages.create(**self._claude_kwargs(prompt, system_prompt))
+            
+            if response.content and len(response.content) > 0:
+                return response.content[0].text
+            raise EmptyResponseError("Empty response from Claude")
+        
+        return with_retries(request, "Claude")
+    
+    async def astream_claude(self, prompt: str, system_prompt: str = "") -> AsyncIterator[str]:
+        """Stream a Claude completion as text chunks"""
+        async with self._call_slots['anthropic']:
+            async with self.async_anthropic_client.messages.stream(
+                **self._claude_kwargs(prompt, system_prompt)
+            ) as stream:
+                async for text in stream.text_stream:
+                    yield text
+    
+    async def acall_claude(self, prompt: str, system_prompt: str = "") -> str:
+        """Call Claude API with retry logic without blocking the event loop"""
+        async def request() -> str:
+            return await join_stream(self.astream_claude(prompt, system_prompt), "Claude")
         
-        for attempt in range(max_retries):
-            try:
-                kwargs = {
-                    "model": self.claude_model,
-                    "max_tokens": 4000,
-                    "messages": [{"role": "user", "content": prompt}]
-                }
-                
-                if system_prompt:
-                    kwargs["system"] = system_prompt
-                
-                response = self.anthropic_client.messages.create(**kwargs)
-                
-                if response.content and len(response.content) > 0:
-                    return response.content[0].text
-                else:
-                    raise ValueError("Empty response from Claude")
-                    
-            except Exception as e:
-                logger.warning(f"Claude API attempt {attempt + 1} failed: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay * (attempt + 1))
-                else:
-                    raise
+        return await awith_retries(request, "Claude")
     
+    @cached_response(_deepseek_payload)
     def call_deepseek(self, prompt: str, system_prompt: str = "") -> str:
         """Call DeepSeek API with retry logic"""
-        max_retries = 3
-        retry_delay = 2
+        def request() -> str:
+            response = self.http_client.post(**self._deepseek_request(prompt, system_prompt))
+            
+            response.raise_for_status()
+            result = response.json()
+            
+            if result.get("choices") and len(result["choices"]) > 0:
+                return result["choices"][0]["message"]["content"]
+            raise EmptyResponseError("Empty response from DeepSeek")
         
-        for attempt in range(max_retries):
-            try:
-                headers = {
-                    "Authorization": f"Bearer {self.deepseek_api_key}",
-                    "Content-Type": "application/json"
-                }
-                
-                messages = []
-                if system_prompt:
-                    messages.append({"role": "system", "content": system_prompt})
-                messages.append({"role": "user", "content": prompt})
-                
-                payload = {
-                    "model": "deepseek-chat",
-                    "messages": messages,
-                    "max_tokens": 4000,
-                    "temperature": 0.1
-                }
-                
-                response = requests.post(
-                    f"{self.deepseek_base_url}/chat/completions",
-                    headers=headers,
-                    json=payload,
-                    timeout=60
-                )
-                
+        return with_retries(request, "DeepSeek")
+    
+    @cached_response(_deepseek_payload)
+    async def astream_deepseek(self, prompt: str, system_prompt: str = "") -> AsyncIterator[str]:
+        """Stream a DeepSeek completion as text chunks from its server-sent events"""
+        payload = {**self._deepseek_payload(prompt, system_prompt), "stream": True}
+        async with self._call_slots['deepseek']:
+            async with self.deepseek_http.stream("POST", "/chat/completions", json=payload) as response:
                 response.raise_for_status()
-                result = response.json()
-                
-                if result.get("choices") and len(result["choices"]) > 0:
-                    return result["choices"][0]["message"]["content"]
-                else:
-                    raise ValueError("Empty response from DeepSeek")
-                    
-            except Exception as e:
-                logger.warning(f"DeepSeek API attempt {attempt + 1} failed: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay * (attempt + 1))
-                else:
-                    raise
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    choices = json.loads(data).get("choices")
+                    if choices and choices[0].get("delta", {}).get("content"):
+                        yield choices[0]["delta"]["content"]
+    
+    async def acall_deepseek(self, prompt: str, system_prompt: str = "") -> str:
+        """Call DeepSeek API with retry logic without blocking the event loop"""
+        async def request() -> str:
+            return await join_stream(self.astream_deepseek(prompt, system_prompt), "DeepSeek")
+        
+        return await awith_retries(request, "DeepSeek")
+    
+    def warm_up(self, provider: str):
+        """Pre-establish a provider connection with a cheap model-listing request"""
+        try:
+            if provider == 'openai':
+                self.openai_client.models.list()
+            elif provider == 'anthropic':
+                self.anthropic_client.models.list(limit=1)
+            elif provider == 'gemini':
+                self.gemini_client.models.get(model=self.gemini_model)
+            elif provider == 'deepseek':
+                self.http_client.get(
+                    f"{self.deepseek_base_url}/models",
+                    headers={"Authorization": f"Bearer {self.deepseek_api_key}"}
+                )
+            else:
+                raise ValueError(f"Unknown provider: {provider}")
+        except Exception as e:
+            logger.debug(f"Connection warm-up for {provider} failed: {e}")
+    
+    async def awarm_up(self, provider: str):
+        """Pre-establish a connection in the async client pool used by the acall_* methods"""
+        try:
+            if provider == 'openai':
+                await self.async_openai_client.models.list()
+            elif provider == 'anthropic':
+                await self.async_anthropic_client.models.list(limit=1)
+            elif provider == 'gemini':
+                await self.gemini_client.aio.models.get(model=self.gemini_model)
+            elif provider == 'deepseek':
+                await self.deepseek_http.get("/models")
+            else:
+                raise ValueError(f"Unknown provider: {provider}")
+        except Exception as e:
+            logger.debug(f"Async connection warm-up for {provider} failed: {e}")
+    
+    def close(self):
+        """Close pooled HTTP connections"""
+        self.http_client.close()
+    
+    async def aclose(self):
+        """Close pooled HTTP connections, including the async clients'"""
+        self.http_client.close()
+        await self.deepseek_http.aclose()
+        await self.async_openai_client.close()
+        await self.async_anthropic_client.close()
@@ -7,13 +7,17 @@ Main orchestrator for the 4-stage LLM gauntlet
 import os
 import sys
 import json
+import time
+import asyncio
 import logging
 import traceback
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 
 from git_github_utils import GitHubManager
+from llm_clients import LLMClients, PROVIDERS
 from pipeline_stages import PipelineStages
 from report_generator import ReportGenerator
+from response_cache import ResponseCache
 from security_utils import SecurityUtils
 
 # Configure logging
@@ -23,14 +27,62 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Provider responses are kept here so re-runs on an unchanged PR skip identical LLM calls
+LLM_CACHE_DIR = ".llm_cache"
+
+# Environment the pipeline needs; it is read once when the pipeline is created
+REQUIRED_VARS = (
+    'GITHUB_TOKEN',
+    'GEMINI_API_KEY',
+    'OPENAI_API_KEY',
+    'ANTHROPIC_API_KEY',
+    'DEEPSEEK_API_KEY',
+    'PR_NUMBER',
+    'REPOSITORY'
+)
+
+# Status marks shown in the progress tracker comment
+STATUS_EMOJI = {
+    'running': '🔄',
+    'completed': '✅',
+    'failed': '❌',
+    'skipped': '⏭️'
+}
+
+# Minimum seconds between edits of the progress tracker comment
+TRACKER_MIN_INTERVAL = 1.0
+
+# Changed files with these extensions are analyzed; content is not fetched for any other file
+CODE_EXTENSIONS = frozenset({'.py', '.js', '.ts', '.java', '.cpp', '.c', '.cs', '.go', '.rs', '.php', '.rb', '.swift', '.kt'})
+
+def is_code_file(file_path: str) -> bool:
+    """True when a path has one of the analyzed code extensions"""
+    # Slicing from the last dot is one lookup; a path without a dot leaves a single character, never a match
+    return file_path[file_path.rfind('.'):].lower() in CODE_EXTENSIONS
+
 class MultiLLMPipeline:
     def __init__(self):
         """Initialize the Multi-LLM Pipeline"""
         self.github_manager = GitHubManager()
-        self.pipeline_stages = PipelineStages()
+        self.pipeline_stages = PipelineStages(
+            llm_clients=LLMClients(response_cache=ResponseCache(LLM_CACHE_DIR))
+        )
         self.report_generator = ReportGenerator()
         self.security_utils = SecurityUtils()
         
+        # Snapshot the environment once instead of reading it in every stage update
+        self.env = {var: os.environ.get(var) for var in REQUIRED_VARS}
+        pr_number = self.env['PR_NUMBER']
+        self.pr_number = int(pr_number) if pr_number and pr_number.isdigit() else None
+        
+        # One progress comment per run, edited in place as stages advance instead of a comment per update
+        self.tracker_comment_id: Optional[int] = None
+        self._tracker_intro = ""
+        self._stage_updates: Dict[str, Tuple[str, str]] = {}
+        self._tracker_dirty = asyncio.Event()
+        self._tracker_task: Optional[asyncio.Task] = None
+        self._tracker_write: Optional[asyncio.Task] = None
+        
         # Pipeline state
         self.pipeline_state = {
             'stage': 'initialization',
@@ -43,55 +95,36 @@ class MultiLLMPipeline:
     
     def validate_environment(self) -> bool:
         """Validate that all required environment variables are set"""
-        required_vars = [
-            'GITHUB_TOKEN',
-            'GEMINI_API_KEY', 
-            'OPENAI_API_KEY',
-            'ANTHROPIC_API_KEY',
-            'DEEPSEEK_API_KEY',
-            'PR_NUMBER',
-            'REPOSITORY'
-        ]
-        
-        missing_vars = []
-        for var in required_vars:
-            if not os.getenv(var):
-                missing_vars.append(var)
+        missing_vars = [var for var in REQUIRED_VARS if not self.env[var]]
         
         if missing_vars:
             logger.error(f"Missing required environment variables: {missing_vars}")
             return False
         
+        if self.pr_number is None:
+            logger.error(f"PR_NUMBER is not a valid pull request number: {self.env['PR_NUMBER']}")
+            return False
+        
         logger.info("Environment validation passed")
         return True
     
     def get_changed_files(self) -> List[Dict[str, Any]]:
         """Get list of changed files from the pull request"""
         try:
-            pr_number = int(os.getenv('PR_NUMBER'))
-            changed_files = self.github_manager.get_pr_changed_files(pr_number)
-            
-            # Filter for code files only
-            code_extensions = {'.py', '.js', '.ts', '.java', '.cpp', '.c', '.cs', '.go', '.rs', '.php', '.rb', '.swift', '.kt'}
+            # Content is only fetched for code files, once, alongside the file list
+            changed_files = self.github_manager.get_pr_changed_files(self.pr_number, content_filter=is_code_file)
             code_files = []
             
             for file_info in changed_files:
-                file_path = file_info['filename']
-                _, ext = os.path.splitext(file_path)
-                
-                if ext.lower() in code_extensions and file_info['status'] != 'removed':
-                    try:
-                        content = self.github_manager.get_file_content(file_path)
-                        if content:
-                            code_files.append({
-                                'path': file_path,
-                                'content': content,
-                                'status': file_info['status'],
-                                'additions': file_info.get('additions', 0),
-                                'deletions': file_info.get('deletions', 0)
-                            })
-                    except Exception as e:
-                        logger.warning(f"Could not retrieve content for {file_path}: {e}")
+                content = file_info.get('content')
+                if content:
+                    code_files.append({
+                        'path': file_info['filename'],
+                        'content': content,
+                        'status': file_info['status'],
+                        'additions': file_info.get('additions', 0),
+                        'deletions': file_info.get('deletions', 0)
+                    })
             
             logger.info(f"Found {len(code_files)} code files to analyze")
             return code_files
@@ -100,163 +133,192 @@ class MultiLLMPipeline:
             logger.error(f"Error getting changed files: {e}")
             return []
     
-    def post_stage_update(self, stage_name: str, status: str, details: str = ""):
-        """Post update comment for a pipeline stage"""
-        try:
-            pr_number = int(os.getenv('PR_NUMBER'))
-            
-            status_emoji = {
-                'running': '🔄',
-                'completed': '✅',
-                'failed': '❌',
-                'skipped': '⏭️'
-            }
-            
-            comment = f"""
-## {status_emoji.get(status, '🔄')} Multi-LLM Pipeline - Stage: {stage_name}
+    async def start_tracker(self, intro: str):
+        """Post the progress tracker comment and start the task that applies later stage updates"""
+        self._tracker_intro = intro
+        await self._write_tracker()
+        self._tracker_task = asyncio.create_task(self._tracker_flusher())
+    
+    def _render_tracker(self) -> str:
+        """Render the tracker comment: the intro, a status row per stage and each stage's details"""
+        rows = "\n".join(
+            f"| {stage_name} | {STATUS_EMOJI.get(status, '🔄')} {status.title()} |"
+            for stage_name, (status, _) in self._stage_updates.items()
+        )
+        sections = "\n\n".join(
+            f"### {stage_name}\n{details}"
+            for stage_name, (_, details) in self._stage_updates.items() if details
+        )
+        
+        return f"""{self._tracker_intro}
+## Progress
 
-**Status:** {status.title()}
-**Stage:** {stage_name}
+| Stage | Status |
+|-------|--------|
+{rows}
 
-{details}
+{sections}
 
 ---
 *Automated by Multi-LLM Code Quality Pipeline*
 """
-            
-            self.github_manager.post_comment(pr_number, comment)
-            
+    
+    async def _write_tracker(self):
+        """Create or edit the tracker comment from a worker thread so LLM streams keep flowing"""
+        body = self._render_tracker()
+        try:
+            if self.tracker_comment_id is None:
+                self.tracker_comment_id = await asyncio.to_thread(
+                    self.github_manager.create_comment, self.pr_number, body
+                )
+            else:
+                await asyncio.to_thread(self.github_manager.update_comment, self.tracker_comment_id, body)
         except Exception as e:
-            logger.error(f"Error posting stage update: {e}")
+            logger.error(f"Error updating progress tracker: {e}")
+    
+    async def _tracker_flusher(self):
+        """Apply recorded stage updates, coalesced into at most one edit per TRACKER_MIN_INTERVAL"""
+        while True:
+            await self._tracker_dirty.wait()
+            self._tracker_dirty.clear()
+            # Shielded so stopping the flusher never abandons an edit that is already being sent
+            self._tracker_write = asyncio.create_task(self._write_tracker())
+            await asyncio.shield(self._tracker_write)
+            await asyncio.sleep(TRACKER_MIN_INTERVAL)
+    
+    async def flush_tracker(self):
+        """Stop the tracker flusher and write out any stage update it has not sent yet"""
+        if self._tracker_task is not None:
+            self._tracker_task.cancel()
+            self._tracker_task = None
+        if self._tracker_write is not None:
+            await self._tracker_write
+            self._tracker_write = None
+        if self._tracker_dirty.is_set():
+            self._tracker_dirty.clear()
+            await self._write_tracker()
     
-    def run_stage_1_analysis(self, files: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Stage 1: Gemini Analysis"""
-        self.pipeline_state['stage'] = 'stage_1_analysis'
-        self.post_stage_update('1 - Gemini Analysis', 'running', 
-                             'Analyzing code for bugs, performance issues, and improvements...')
+    def post_stage_update(self, stage_name: str, status: str, details: str = ""):
+        """Record a pipeline stage's status; the tracker flusher writes it to the comment"""
+        self._stage_updates[stage_name] = (status, details)
+        self._tracker_dirty.set()
+    
+    @staticmethod
+    def _stage_status(results: Dict[str, Any]) -> str:
+        """Tracker status for a stage from its per-file results: failed if any file failed, skipped if none reached it"""
+        if not results:
+            return 'skipped'
+        if any(result.get('status') == 'failed' for result in results.values()):
+            return 'failed'
+        return 'completed'
+    
+    @staticmethod
+    def _analysis_details(results: Dict[str, Any]) -> str:
+        """Stage 1 summary for the stage comment"""
+        total_issues = sum(len(result.get('issues', [])) for result in results.values())
+        files_analyzed = len(results)
         
-        try:
-            results = self.pipeline_stages.stage_1_gemini_analysis(files)
-            self.pipeline_state['results']['stage_1'] = results
-            
-            # Create summary for comment
-            total_issues = sum(len(result.get('issues', [])) for result in results.values())
-            files_analyzed = len(results)
-            
-            details = f"""
+        return f"""
 **Analysis Complete:**
 - Files analyzed: {files_analyzed}
 - Issues identified: {total_issues}
 - Performance suggestions: Available in detailed report
 """
-            
-            self.post_stage_update('1 - Gemini Analysis', 'completed', details)
-            return results
-            
-        except Exception as e:
-            error_msg = f"Stage 1 failed: {str(e)}"
-            logger.error(error_msg)
-            self.pipeline_state['errors'].append(error_msg)
-            self.post_stage_update('1 - Gemini Analysis', 'failed', f"Error: {str(e)}")
-            raise
     
-    def run_stage_2_generation(self, analysis_results: Dict[str, Any], 
-                             original_files: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Stage 2: ChatGPT Code Generation"""
-        self.pipeline_state['stage'] = 'stage_2_generation'
-        self.post_stage_update('2 - ChatGPT Generation', 'running',
-                             'Generating improved code based on analysis...')
+    @staticmethod
+    def _generation_details(results: Dict[str, Any]) -> str:
+        """Stage 2 summary for the stage comment"""
+        files_improved = len(results)
+        total_changes = sum(len(result.get('changes', [])) for result in results.values())
         
-        try:
-            results = self.pipeline_stages.stage_2_chatgpt_generation(analysis_results, original_files)
-            self.pipeline_state['results']['stage_2'] = results
-            
-            # Create summary for comment
-            files_improved = len(results)
-            total_changes = sum(len(result.get('changes', [])) for result in results.values())
-            
-            details = f"""
+        return f"""
 **Code Generation Complete:**
 - Files improved: {files_improved}
 - Total changes made: {total_changes}
 - Improvements focus on: Bug fixes, performance, readability
 """
-            
-            self.post_stage_update('2 - ChatGPT Generation', 'completed', details)
-            return results
-            
-        except Exception as e:
-            error_msg = f"Stage 2 failed: {str(e)}"
-            logger.error(error_msg)
-            self.pipeline_state['errors'].append(error_msg)
-            self.post_stage_update('2 - ChatGPT Generation', 'failed', f"Error: {str(e)}")
-            raise
     
-    def run_stage_3_integration(self, generated_code: Dict[str, Any], 
-                              original_files: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Stage 3: Claude Integration"""
-        self.pipeline_state['stage'] = 'stage_3_integration'
-        self.post_stage_update('3 - Claude Integration', 'running',
-                             'Integrating improved code while maintaining consistency...')
+    @staticmethod
+    def _integration_details(results: Dict[str, Any]) -> str:
+        """Stage 3 summary for the stage comment"""
+        files_integrated = len(results)
         
-        try:
-            results = self.pipeline_stages.stage_3_claude_integration(generated_code, original_files)
-            self.pipeline_state['results']['stage_3'] = results
-            
-            # Create summary for comment
-            files_integrated = len(results)
-            
-            details = f"""
+        return f"""
 **Integration Complete:**
 - Files integrated: {files_integrated}
 - Style consistency: Maintained
 - Architecture alignment: Verified
 - Variable naming: Consistent
 """
-            
-            self.post_stage_update('3 - Claude Integration', 'completed', details)
-            return results
-            
-        except Exception as e:
-            error_msg = f"Stage 3 failed: {str(e)}"
-            logger.error(error_msg)
-            self.pipeline_state['errors'].append(error_msg)
-            self.post_stage_update('3 - Claude Integration', 'failed', f"Error: {str(e)}")
-            raise
     
-    def run_stage_4_verification(self, integrated_code: Dict[str, Any]) -> Dict[str, Any]:
-        """Stage 4: DeepSeek Verification"""
-        self.pipeline_state['stage'] = 'stage_4_verification'
-        self.post_stage_update('4 - DeepSeek Verification', 'running',
-                             'Performing final quality assurance and verification...')
+    @staticmethod
+    def _verification_details(results: Dict[str, Any]) -> str:
+        """Stage 4 summary for the stage comment"""
+        verification_passed = all(result.get('verification_passed', False) for result in results.values())
+        total_warnings = sum(len(result.get('warnings', [])) for result in results.values())
         
-        try:
-            results = self.pipeline_stages.stage_4_deepseek_verification(integrated_code)
-            self.pipeline_state['results']['stage_4'] = results
-            
-            # Create summary for comment
-            verification_passed = all(result.get('verification_passed', False) for result in results.values())
-            total_warnings = sum(len(result.get('warnings', [])) for result in results.values())
-            
-            status_text = "✅ PASSED" if verification_passed else "⚠️ WARNINGS"
-            
-            details = f"""
+        status_text = "✅ PASSED" if verification_passed else "⚠️ WARNINGS"
+        
+        return f"""
 **Verification Complete:**
 - Overall Status: {status_text}
 - Files verified: {len(results)}
 - Warnings found: {total_warnings}
 - Quality assurance: Complete
 """
-            
-            self.post_stage_update('4 - DeepSeek Verification', 'completed', details)
-            return results
-            
+    
+    async def run_file_pipeline(self, files: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Stages 1-4 per file: each file moves to the next stage as soon as it finishes the previous one"""
+        self.pipeline_state['stage'] = 'file_pipeline'
+        self.post_stage_update('1-4 - Per-file Pipeline', 'running',
+                             'Each file moves on to generation, integration and verification as soon as its analysis is ready...')
+        
+        file_map = {f['path']: f for f in files}
+        downstream: Dict[str, asyncio.Task] = {}
+        files_finished = 0
+        
+        async def advance(file_path: str, analysis_result: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+            nonlocal files_finished
+            result = await self.pipeline_stages.process_file_stages(file_path, analysis_result, file_map)
+            files_finished += 1
+            self.post_stage_update('1-4 - Per-file Pipeline', 'running', f"Files finished: {files_finished}/{len(files)}")
+            return result
+        
+        def start_downstream(file_path: str, analysis_result: Dict[str, Any]):
+            downstream[file_path] = asyncio.create_task(advance(file_path, analysis_result))
+        
+        try:
+            analysis_results = await self.pipeline_stages.stage_1_gemini_analysis(files, on_result=start_downstream)
+            file_results = dict(zip(downstream, await asyncio.gather(*downstream.values())))
+        
         except Exception as e:
-            error_msg = f"Stage 4 failed: {str(e)}"
+            for task in downstream.values():
+                task.cancel()
+            error_msg = f"Per-file pipeline failed: {str(e)}"
             logger.error(error_msg)
             self.pipeline_state['errors'].append(error_msg)
-            self.post_stage_update('4 - DeepSeek Verification', 'failed', f"Error: {str(e)}")
+            self.post_stage_update('1-4 - Per-file Pipeline', 'failed', f"Error: {str(e)}")
             raise
+        
+        # Regroup per-file results by stage, in the order files were analyzed
+        stage_results = {'stage_1': analysis_results, 'stage_2': {}, 'stage_3': {}, 'stage_4': {}}
+        for file_path in analysis_results:
+            for stage, result in file_results.get(file_path, {}).items():
+                stage_results[stage][file_path] = result
+        self.pipeline_state['results'].update(stage_results)
+        
+        stage_rows = (
+            ('1 - Gemini Analysis', 'stage_1', self._analysis_details),
+            ('2 - ChatGPT Generation', 'stage_2', self._generation_details),
+            ('3 - Claude Integration', 'stage_3', self._integration_details),
+            ('4 - DeepSeek Verification', 'stage_4', self._verification_details)
+        )
+        statuses = {stage: self._stage_status(stage_results[stage]) for _, stage, _ in stage_rows}
+        overall = 'failed' if 'failed' in statuses.values() else 'completed'
+        self.post_stage_update('1-4 - Per-file Pipeline', overall, f"Files finished: {files_finished}/{len(files)}")
+        for stage_name, stage, details in stage_rows:
+            self.post_stage_update(stage_name, statuses[stage], details(stage_results[stage]))
+        return stage_results['stage_4']
     
     def generate_final_report(self) -> str:
         """Generate comprehensive final report"""
@@ -272,8 +334,6 @@ class MultiLLMPipeline:
     def post_final_report(self, report: str):
         """Post the final comprehensive report"""
         try:
-            pr_number = int(os.getenv('PR_NUMBER'))
-            
             final_comment = f"""
 # 🎯 Multi-LLM Pipeline Complete - Final Report
 
@@ -296,7 +356,7 @@ class MultiLLMPipeline:
 *🤖 Automated by Multi-LLM Code Quality Pipeline | Powered by Gemini, ChatGPT, Claude & DeepSeek*
 """
             
-            self.github_manager.post_comment(pr_number, final_comment)
+            self.github_manager.post_comment(self.pr_number, final_comment)
             
         except Exception as e:
             logger.error(f"Error posting final report: {e}")
@@ -304,8 +364,6 @@ class MultiLLMPipeline:
     def handle_pipeline_failure(self, stage: str, error: str):
         """Handle pipeline failure with rollback capability"""
         try:
-            pr_number = int(os.getenv('PR_NUMBER'))
-            
             failure_comment = f"""
 # ❌ Multi-LLM Pipeline Failed
 
@@ -330,15 +388,13 @@ If this issue persists, please check:
 *🔧 Pipeline Support | Multi-LLM Code Quality Pipeline*
 """
             
-            self.github_manager.post_comment(pr_number, failure_comment)
+            self.github_manager.post_comment(self.pr_number, failure_comment)
             
         except Exception as e:
             logger.error(f"Error posting failure report: {e}")
     
-    def run(self):
-        """Run the complete multi-LLM pipeline"""
-        import time
-        
+    async def run(self):
+        """Run the complete multi-LLM pipeline; each file advances through the stages on its own"""
         self.pipeline_state['start_time'] = time.time()
         
         try:
@@ -347,7 +403,6 @@ If this issue persists, please check:
                 sys.exit(1)
             
             # Post initial comment
-            pr_number = int(os.getenv('PR_NUMBER'))
             initial_comment = """
 # 🚀 Multi-LLM Code Quality Pipeline Started
 
@@ -361,30 +416,29 @@ Your pull request is being processed through our 4-stage AI-powered code quality
 **Estimated Time**: 2-5 minutes depending on code complexity
 
 ---
-*⏳ Processing... Updates will be posted as each stage completes*
+*⏳ Processing... This comment is updated as each stage progresses*
 """
-            self.github_manager.post_comment(pr_number, initial_comment)
+            # Open provider connections while the PR is being read
+            llm_clients = self.pipeline_stages.llm_clients
+            warm_up = asyncio.gather(*(llm_clients.awarm_up(provider) for provider in PROVIDERS))
+            
+            await self.start_tracker(initial_comment)
             
             # Get changed files
-            changed_files = self.get_changed_files()
+            changed_files = await asyncio.to_thread(self.get_changed_files)
+            await warm_up
             if not changed_files:
                 logger.warning("No code files found to analyze")
                 self.post_stage_update('Analysis', 'skipped', 'No code files found in pull request')
+                await self.flush_tracker()
                 return
             
             logger.info(f"Starting pipeline for {len(changed_files)} files")
             
-            # Stage 1: Gemini Analysis
-            analysis_results = self.run_stage_1_analysis(changed_files)
-            
-            # Stage 2: ChatGPT Generation
-            generation_results = self.run_stage_2_generation(analysis_results, changed_files)
-            
-            # Stage 3: Claude Integration
-            integration_results = self.run_stage_3_integration(generation_results, changed_files)
+            # Stages 1-4: files flow through the stages independently instead of waiting at each stage
+            verification_results = await self.run_file_pipeline(changed_files)
             
-            # Stage 4: DeepSeek Verification
-            verification_results = self.run_stage_4_verification(integration_results)
+            await self.flush_tracker()
             
             # Generate and post final report
             final_report = self.generate_final_report()
@@ -402,6 +456,7 @@ Your pull request is being processed through our 4-stage AI-powered code quality
             self.pipeline_state['status'] = 'failed'
             self.pipeline_state['end_time'] = time.time()
             
+            await self.flush_tracker()
             self.handle_pipeline_failure(
                 self.pipeline_state['stage'], 
                 str(e)
@@ -413,7 +468,7 @@ def main():
     """Main entry point"""
     try:
         pipeline = MultiLLMPipeline()
-        pipeline.run()
+        asyncio.run(pipeline.run())
     except Exception as e:
         logger.error(f"Critical error in main: {e}")
         logger.error(traceback.format_exc())
@@ -5,125 +5,313 @@ Handles the 4-stage LLM gauntlet process
 
 import json
 import time
-import os
+import asyncio
 import logging
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from fast_json import StreamingObjectParser
 from llm_clients import LLMClients
 from security_utils import SecurityUtils
 from prompt_config import PromptConfigManager
 
 logger = logging.getLogger(__name__)
 
+# Stage 1 sends several files per Gemini call, packed up to this many estimated prompt tokens
+ANALYSIS_BATCH_TOKENS = 60000
+
+# Rough characters-per-token ratio for source code, used to size analysis batches
+CHARS_PER_TOKEN = 4
+
+# File extension -> language name shown in stage prompts
+LANGUAGE_BY_EXTENSION = {
+    '.py': 'Python',
+    '.js': 'JavaScript',
+    '.ts': 'TypeScript',
+    '.java': 'Java',
+    '.cpp': 'C++',
+    '.c': 'C',
+    '.cs': 'C#',
+    '.go': 'Go',
+    '.rs': 'Rust',
+    '.php': 'PHP',
+    '.rb': 'Ruby',
+    '.swift': 'Swift',
+    '.kt': 'Kotlin',
+    '.scala': 'Scala',
+    '.sh': 'Shell',
+    '.ps1': 'PowerShell',
+    '.r': 'R',
+    '.m': 'MATLAB',
+    '.pl': 'Perl',
+    '.lua': 'Lua',
+    '.dart': 'Dart',
+    '.elm': 'Elm'
+}
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the token count of a piece of text"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
 class PipelineStages:
-    def __init__(self, prompt_config_file: str = "prompt_config.json"):
-        """Initialize pipeline stages"""
-        self.llm_clients = LLMClients()
+    def __init__(self, prompt_config_file: str = "prompt_config.json",
+                 llm_clients: Optional[LLMClients] = None):
+        """Initialize pipeline stages, optionally sharing existing LLM clients"""
+        self.llm_clients = llm_clients if llm_clients is not None else LLMClients()
         self.security_utils = SecurityUtils()
         self.prompt_config = PromptConfigManager(prompt_config_file)
         
         # Get current prompts for active project type
         self.prompts = self.prompt_config.get_active_prompts()
     
-    def stage_1_gemini_analysis(self, files: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def reload_prompts(self):
+        """Reload the prompt configuration from disk and refresh active prompts"""
+        self.prompt_config.reload()
+        self.prompts = self.prompt_config.get_active_prompts()
+    
+    async def stage_1_gemini_analysis(self, files: List[Dict[str, Any]],
+                                      on_result: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
         """
         Stage 1: Gemini Deep Code Analysis
-        Analyzes code for bugs, performance issues, and improvements
+        Analyzes code for bugs, performance issues, and improvements, packing files into batched calls;
+        on_result is called with each file's result as soon as it arrives in the stream
         """
         logger.info("Starting Stage 1: Gemini Analysis")
-        results = {}
         
         system_instruction = self.prompts["stage_1_system_instruction"]
         
+        batches = self._pack_batches(files, ANALYSIS_BATCH_TOKENS)
+        outcomes = await asyncio.gather(*(
+            self._analyze_batch(batch, system_instruction, on_result) for batch in batches
+        ))
+        analyzed = {}
+        for outcome in outcomes:
+            analyzed.update(outcome)
+        # Report files in their original order regardless of how they were packed
+        results = {}
         for file_info in files:
             file_path = file_info.get('path', 'unknown_file')
-            try:
-                file_content = file_info['content']
-                
-                # Sanitize input
-                sanitized_content = self.security_utils.sanitize_code_input(file_content)
-                
-                prompt = f"""Analyze this code file for issues and improvements:
-
-**File**: {file_path}
+            if file_path in analyzed:
+                results[file_path] = analyzed[file_path]
+        
+        logger.info(f"Stage 1 completed: {len(results)} files processed in {len(batches)} calls")
+        return results
+    
+    def _pack_batches(self, files: List[Dict[str, Any]], token_budget: int) -> List[List[Dict[str, Any]]]:
+        """Greedily pack files into batches of at most token_budget estimated tokens, largest first"""
+        batches: List[List[Dict[str, Any]]] = []
+        batch_tokens: List[int] = []
+        sized = sorted(files, key=lambda f: estimate_tokens(f.get('content') or ''), reverse=True)
+        for file_info in sized:
+            tokens = estimate_tokens(file_info.get('content') or '')
+            for index, used in enumerate(batch_tokens):
+                if used + tokens <= token_budget:
+                    batches[index].append(file_info)
+                    batch_tokens[index] += tokens
+                    break
+            else:
+                # Files over the budget get a batch of their own
+                batches.append([file_info])
+                batch_tokens.append(tokens)
+        return batches
+    
+    async def _analyze_and_report(self, file_info: Dict[str, Any], system_instruction: str,
+                                  on_result: Optional[Callable[[str, Dict[str, Any]], None]]) -> Tuple[str, Dict[str, Any]]:
+        """Run Stage 1 analysis for one file and report its result"""
+        file_path, result = await self._analyze_file(file_info, system_instruction)
+        if on_result:
+            on_result(file_path, result)
+        return file_path, result
+    
+    async def _analyze_batch(self, batch: List[Dict[str, Any]], system_instruction: str,
+                             on_result: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Dict[str, Any]]:
+        """Run Stage 1 analysis for a batch of files in one streamed call; files missing from the reply are analyzed individually"""
+        if len(batch) == 1:
+            file_path, result = await self._analyze_and_report(batch[0], system_instruction, on_result)
+            return {file_path: result}
+        
+        batch_paths = {file_info.get('path', 'unknown_file') for file_info in batch}
+        results = {}
+        prompt = None
+        try:
+            sections = []
+            for file_info in batch:
+                file_path = file_info.get('path', 'unknown_file')
+                sanitized_content = self.security_utils.sanitize_code_input(file_info['content'])
+                sections.append(f"""===FILE {file_path}===
 **Language**: {self._detect_language(file_path)}
 
-**Code**:
 ```
 {sanitized_content}
-```
+```""")
+            
+            files_block = "\n\n".join(sections)
+            prompt = f"""Analyze each of these code files for issues and improvements.
 
-Please provide your analysis in the specified JSON format."""
-                
-                # Call Gemini API
-                response = self.llm_clients.call_gemini(prompt, system_instruction)
-                
-                # Sanitize and validate response
-                sanitized_response = self.security_utils.sanitize_api_response(response)
-                
-                if not self.security_utils.validate_llm_response(sanitized_response, "json"):
-                    logger.warning(f"Invalid response from Gemini for {file_path}")
-                    results[file_path] = {
-                        'status': 'failed',
-                        'error': 'Invalid response format'
-                    }
-                    continue
-                
-                try:
-                    # Parse JSON response
-                    analysis = json.loads(sanitized_response)
+Return a single JSON object keyed by file path, where each value is that file's analysis in the specified JSON format.
+
+{files_block}"""
+            
+            # Stream one Gemini call for the whole batch, taking each file's analysis as soon as it closes
+            parser = StreamingObjectParser()
+            async for chunk in self.llm_clients.astream_gemini(prompt, system_instruction, "json"):
+                for file_path, analysis in parser.feed(chunk):
+                    if file_path not in batch_paths or file_path in results or not isinstance(analysis, dict):
+                        continue
+                    
+                    # Sanitize each member as the whole response would have been
+                    sanitized_member = self.security_utils.sanitize_api_response(json.dumps(analysis))
                     results[file_path] = {
                         'status': 'completed',
-                        'analysis': analysis,
+                        'analysis': json.loads(sanitized_member),
                         'timestamp': time.time()
                     }
                     logger.info(f"Completed Gemini analysis for {file_path}")
-                    
-                except json.JSONDecodeError as e:
-                    logger.error(f"JSON parsing error for {file_path}: {e}")
-                    results[file_path] = {
-                        'status': 'failed',
-                        'error': f'JSON parsing error: {str(e)}'
-                    }
+                    if on_result:
+                        on_result(file_path, results[file_path])
+        
+        except Exception as e:
+            logger.error(f"Error analyzing batch of {len(batch)} files: {e}")
+        
+        missing = [file_info for file_info in batch if file_info.get('path', 'unknown_file') not in results]
+        if missing:
+            if prompt is not None:
+                # A cached batch reply that omitted files would otherwise be replayed as is
+                self.llm_clients.forget_response('gemini', prompt, system_instruction, "json")
+            logger.warning(f"Batched Gemini analysis omitted {len(missing)} files, analyzing them individually")
+            outcomes = await asyncio.gather(*(
+                self._analyze_and_report(file_info, system_instruction, on_result) for file_info in missing
+            ))
+            results.update(outcomes)
+        
+        return results
+    
+    async def _analyze_file(self, file_info: Dict[str, Any], system_instruction: str) -> Tuple[str, Dict[str, Any]]:
+        """Run Stage 1 analysis for one file"""
+        file_path = file_info.get('path', 'unknown_file')
+        try:
+            file_content = file_info['content']
+            
+            # Sanitize input
+            sanitized_content = self.security_utils.sanitize_code_input(file_content)
+            
+            prompt = f"""Analyze this code file for issues and improvements:
+
+**File**: {file_path}
+**Language**: {self._detect_language(file_path)}
+
+**Code**:
+```
+{sanitized_content}
+```
+
+Please provide your analysis in the specified JSON format."""
+            
+            # Call Gemini API
+            response = await self.llm_clients.acall_gemini(prompt, system_instruction)
+            
+            # Sanitize and validate response
+            sanitized_response = self.security_utils.sanitize_api_response(response)
+            
+            if not self.security_utils.validate_llm_response(sanitized_response, "json"):
+                logger.warning(f"Invalid response from Gemini for {file_path}")
+                self.llm_clients.forget_response('gemini', prompt, system_instruction)
+                result = {
+                    'status': 'failed',
+                    'error': 'Invalid response format'
+                }
+                return file_path, result
+            
+            try:
+                # Parse JSON response
+                analysis = json.loads(sanitized_response)
+                result = {
+                    'status': 'completed',
+                    'analysis': analysis,
+                    'timestamp': time.time()
+                }
+                logger.info(f"Completed Gemini analysis for {file_path}")
                 
-            except Exception as e:
-                logger.error(f"Error analyzing {file_path}: {e}")
-                results[file_path] = {
+            except json.JSONDecodeError as e:
+                logger.error(f"JSON parsing error for {file_path}: {e}")
+                result = {
                     'status': 'failed',
-                    'error': str(e)
+                    'error': f'JSON parsing error: {str(e)}'
                 }
+            
+        except Exception as e:
+            logger.error(f"Error analyzing {file_path}: {e}")
+            result = {
+                'status': 'failed',
+                'error': str(e)
+            }
         
-        logger.info(f"Stage 1 completed: {len(results)} files processed")
-        return results
+        return file_path, result
     
-    def stage_2_chatgpt_generation(self, analysis_results: Dict[str, Any], 
-                                 original_files: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def stage_2_sketch(self, files: List[Dict[str, Any]]) -> str:
+        """
+        Stage 2 sketch: a first-pass ChatGPT draft of improvements for all files,
+        produced from the code alone so it can run alongside Stage 1
+        """
+        logger.info("Starting Stage 2 sketch: ChatGPT draft")
+        
+        sections = [
+            f"**File**: {f['path']}\n**Language**: {self._detect_language(f['path'])}\n```\n{f['content']}\n```"
+            for f in files
+        ]
+        prompt = f"""Sketch the improvements you would make to these files.
+For each file, list the concrete changes (bugs to fix, performance and readability
+improvements) in a few short bullet points. Do not rewrite the files.
+
+{chr(10).join(sections)}"""
+        
+        response = await self.llm_clients.acall_chatgpt(prompt, self.prompts["stage_2_system_prompt"])
+        return self.security_utils.sanitize_api_response(response)
+    
+    async def stage_2_chatgpt_generation(self, analysis_results: Dict[str, Any], 
+                                 original_files: List[Dict[str, Any]],
+                                 sketch: str = "") -> Dict[str, Any]:
         """
         Stage 2: ChatGPT Code Generation
-        Generates improved code based on Gemini's analysis
+        Generates improved code based on Gemini's analysis, one concurrent call per file;
+        a draft sketch from the parallel pass, when given, is refined rather than ignored
         """
         logger.info("Starting Stage 2: ChatGPT Generation")
-        results = {}
         
         # Create file mapping for easy lookup
         file_map = {f['path']: f for f in original_files}
         
         system_prompt = self.prompts["stage_2_system_prompt"]
         
-        for file_path, analysis_result in analysis_results.items():
-            try:
-                if analysis_result.get('status') != 'completed':
-                    logger.warning(f"Skipping {file_path} - analysis not completed")
-                    continue
-                
-                original_file = file_map.get(file_path)
-                if not original_file:
-                    logger.warning(f"Original file not found for {file_path}")
-                    continue
-                
-                analysis = analysis_result['analysis']
-                original_code = original_file['content']
-                
-                prompt = f"""Generate improved code based on this analysis:
+        outcomes = await asyncio.gather(*(
+            self._generate_file(file_path, analysis_result, file_map, system_prompt, sketch)
+            for file_path, analysis_result in analysis_results.items()
+        ))
+        results = {path: result for path, result in outcomes if result is not None}
+        
+        logger.info(f"Stage 2 completed: {len(results)} files processed")
+        return results
+    
+    async def _generate_file(self, file_path: str, analysis_result: Dict[str, Any],
+                             file_map: Dict[str, Dict[str, Any]], system_prompt: str,
+                             sketch: str = "") -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Run Stage 2 generation for one analyzed file; the result is None when the file is skipped"""
+        try:
+            if analysis_result.get('status') != 'completed':
+                logger.warning(f"Skipping {file_path} - analysis not completed")
+                return file_path, None
+            
+            original_file = file_map.get(file_path)
+            if not original_file:
+                logger.warning(f"Original file not found for {file_path}")
+                return file_path, None
+            
+            analysis = analysis_result['analysis']
+            original_code = original_file['content']
+            sketch_section = f"""
+**Draft Sketch** (a first pass made without the analysis; refine it, keep what the analysis supports):
+{sketch}
+""" if sketch else ""
+            
+            prompt = f"""Generate improved code based on this analysis:
 
 **File**: {file_path}
 **Language**: {self._detect_language(file_path)}
@@ -135,7 +323,7 @@ Please provide your analysis in the specified JSON format."""
 
 **Analysis Results**:
 {json.dumps(analysis, indent=2)}
-
+{sketch_section}
 **Instructions**:
 - Address all issues identified in the analysis
 - Maintain the original functionality
@@ -144,81 +332,90 @@ Please provide your analysis in the specified JSON format."""
 - Ensure code follows best practices
 
 Please generate the improved code in the specified JSON format."""
+            
+            # Call ChatGPT API
+            response = await self.llm_clients.acall_chatgpt(prompt, system_prompt, "json")
+            
+            # Sanitize and validate response
+            sanitized_response = self.security_utils.sanitize_api_response(response)
+            
+            if not self.security_utils.validate_llm_response(sanitized_response, "json"):
+                logger.warning(f"Invalid response from ChatGPT for {file_path}")
+                result = {
+                    'status': 'failed',
+                    'error': 'Invalid response format'
+                }
+                return file_path, result
+            
+            try:
+                # Parse JSON response
+                generation = json.loads(sanitized_response)
+                result = {
+                    'status': 'completed',
+                    'generated_code': generation.get('improved_code', ''),
+                    'changes': generation.get('changes', []),
+                    'issues_addressed': generation.get('issues_addressed', []),
+                    'summary': generation.get('summary', ''),
+                    'timestamp': time.time()
+                }
+                logger.info(f"Completed ChatGPT generation for {file_path}")
                 
-                # Call ChatGPT API
-                response = self.llm_clients.call_chatgpt(prompt, system_prompt, "json")
-                
-                # Sanitize and validate response
-                sanitized_response = self.security_utils.sanitize_api_response(response)
-                
-                if not self.security_utils.validate_llm_response(sanitized_response, "json"):
-                    logger.warning(f"Invalid response from ChatGPT for {file_path}")
-                    results[file_path] = {
-                        'status': 'failed',
-                        'error': 'Invalid response format'
-                    }
-                    continue
-                
-                try:
-                    # Parse JSON response
-                    generation = json.loads(sanitized_response)
-                    results[file_path] = {
-                        'status': 'completed',
-                        'generated_code': generation.get('improved_code', ''),
-                        'changes': generation.get('changes', []),
-                        'issues_addressed': generation.get('issues_addressed', []),
-                        'summary': generation.get('summary', ''),
-                        'timestamp': time.time()
-                    }
-                    logger.info(f"Completed ChatGPT generation for {file_path}")
-                    
-                except json.JSONDecodeError as e:
-                    logger.error(f"JSON parsing error for {file_path}: {e}")
-                    results[file_path] = {
-                        'status': 'failed',
-                        'error': f'JSON parsing error: {str(e)}'
-                    }
-                
-            except Exception as e:
-                logger.error(f"Error generating code for {file_path}: {e}")
-                results[file_path] = {
+            except json.JSONDecodeError as e:
+                logger.error(f"JSON parsing error for {file_path}: {e}")
+                result = {
                     'status': 'failed',
-                    'error': str(e)
+                    'error': f'JSON parsing error: {str(e)}'
                 }
+            
+        except Exception as e:
+            logger.error(f"Error generating code for {file_path}: {e}")
+            result = {
+                'status': 'failed',
+                'error': str(e)
+            }
         
-        logger.info(f"Stage 2 completed: {len(results)} files processed")
-        return results
+        return file_path, result
     
-    def stage_3_claude_integration(self, generated_code: Dict[str, Any], 
+    async def stage_3_claude_integration(self, generated_code: Dict[str, Any], 
                                  original_files: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Stage 3: Claude Integration
-        Integrates generated code while maintaining consistency
+        Integrates generated code while maintaining consistency, one concurrent call per file
         """
         logger.info("Starting Stage 3: Claude Integration")
-        results = {}
         
         # Create file mapping for easy lookup
         file_map = {f['path']: f for f in original_files}
         
         system_prompt = self.prompts["stage_3_system_prompt"]
         
-        for file_path, generation_result in generated_code.items():
-            try:
-                if generation_result.get('status') != 'completed':
-                    logger.warning(f"Skipping {file_path} - generation not completed")
-                    continue
-                
-                original_file = file_map.get(file_path)
-                if not original_file:
-                    logger.warning(f"Original file not found for {file_path}")
-                    continue
-                
-                generated_code_content = generation_result['generated_code']
-                original_code = original_file['content']
-                changes = generation_result.get('changes', [])
-                
-                prompt = f"""Integrate this improved code while maintaining consistency:
+        outcomes = await asyncio.gather(*(
+            self._integrate_file(file_path, generation_result, file_map, system_prompt)
+            for file_path, generation_result in generated_code.items()
+        ))
+        results = {path: result for path, result in outcomes if result is not None}
+        
+        logger.info(f"Stage 3 completed: {len(results)} files processed")
+        return results
+    
+    async def _integrate_file(self, file_path: str, generation_result: Dict[str, Any],
+                              file_map: Dict[str, Dict[str, Any]], system_prompt: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Run Stage 3 integration for one generated file; the result is None when the file is skipped"""
+        try:
+            if generation_result.get('status') != 'completed':
+                logger.warning(f"Skipping {file_path} - generation not completed")
+                return file_path, None
+            
+            original_file = file_map.get(file_path)
+            if not original_file:
+                logger.warning(f"Original file not found for {file_path}")
+                return file_path, None
+            
+            generated_code_content = generation_result['generated_code']
+            original_code = original_file['content']
+            changes = generation_result.get('changes', [])
+            
+            prompt = f"""Integrate this improved code while maintaining consistency:
 
 **File**: {file_path}
 **Language**: {self._detect_language(file_path)}
@@ -245,72 +442,81 @@ Please generate the improved code in the specified JSON format."""
 - Keep existing comments that are still relevant
 
 Please provide the final integrated code in the specified JSON format."""
+            
+            # Call Claude API
+            response = await self.llm_clients.acall_claude(prompt, system_prompt)
+            
+            # Sanitize and validate response
+            sanitized_response = self.security_utils.sanitize_api_response(response)
+            
+            if not self.security_utils.validate_llm_response(sanitized_response, "json"):
+                logger.warning(f"Invalid response from Claude for {file_path}")
+                result = {
+                    'status': 'failed',
+                    'error': 'Invalid response format'
+                }
+                return file_path, result
+            
+            try:
+                # Parse JSON response
+                integration = json.loads(sanitized_response)
+                result = {
+                    'status': 'completed',
+                    'integrated_code': integration.get('integrated_code', ''),
+                    'integration_notes': integration.get('integration_notes', []),
+                    'style_adjustments': integration.get('style_adjustments', []),
+                    'compatibility_checks': integration.get('compatibility_checks', ''),
+                    'summary': integration.get('summary', ''),
+                    'timestamp': time.time()
+                }
+                logger.info(f"Completed Claude integration for {file_path}")
                 
-                # Call Claude API
-                response = self.llm_clients.call_claude(prompt, system_prompt)
-                
-                # Sanitize and validate response
-                sanitized_response = self.security_utils.sanitize_api_response(response)
-                
-                if not self.security_utils.validate_llm_response(sanitized_response, "json"):
-                    logger.warning(f"Invalid response from Claude for {file_path}")
-                    results[file_path] = {
-                        'status': 'failed',
-                        'error': 'Invalid response format'
-                    }
-                    continue
-                
-                try:
-                    # Parse JSON response
-                    integration = json.loads(sanitized_response)
-                    results[file_path] = {
-                        'status': 'completed',
-                        'integrated_code': integration.get('integrated_code', ''),
-                        'integration_notes': integration.get('integration_notes', []),
-                        'style_adjustments': integration.get('style_adjustments', []),
-                        'compatibility_checks': integration.get('compatibility_checks', ''),
-                        'summary': integration.get('summary', ''),
-                        'timestamp': time.time()
-                    }
-                    logger.info(f"Completed Claude integration for {file_path}")
-                    
-                except json.JSONDecodeError as e:
-                    logger.error(f"JSON parsing error for {file_path}: {e}")
-                    results[file_path] = {
-                        'status': 'failed',
-                        'error': f'JSON parsing error: {str(e)}'
-                    }
-                
-            except Exception as e:
-                logger.error(f"Error integrating code for {file_path}: {e}")
-                results[file_path] = {
+            except json.JSONDecodeError as e:
+                logger.error(f"JSON parsing error for {file_path}: {e}")
+                result = {
                     'status': 'failed',
-                    'error': str(e)
+                    'error': f'JSON parsing error: {str(e)}'
                 }
+            
+        except Exception as e:
+            logger.error(f"Error integrating code for {file_path}: {e}")
+            result = {
+                'status': 'failed',
+                'error': str(e)
+            }
         
-        logger.info(f"Stage 3 completed: {len(results)} files processed")
-        return results
+        return file_path, result
     
-    def stage_4_deepseek_verification(self, integrated_code: Dict[str, Any]) -> Dict[str, Any]:
+    async def stage_4_deepseek_verification(self, integrated_code: Dict[str, Any]) -> Dict[str, Any]:
         """
         Stage 4: DeepSeek Verification
-        Final verification and quality assurance
+        Final verification and quality assurance, one concurrent call per file
         """
         logger.info("Starting Stage 4: DeepSeek Verification")
-        results = {}
         
         system_prompt = self.prompts["stage_4_system_prompt"]
         
-        for file_path, integration_result in integrated_code.items():
-            try:
-                if integration_result.get('status') != 'completed':
-                    logger.warning(f"Skipping {file_path} - integration not completed")
-                    continue
-                
-                integrated_code_content = integration_result['integrated_code']
-                integration_notes = integration_result.get('integration_notes', [])
-                
-                prompt = f"""Perform final verification of this integrated code:
+        outcomes = await asyncio.gather(*(
+            self._verify_file(file_path, integration_result, system_prompt)
+            for file_path, integration_result in integrated_code.items()
+        ))
+        results = {path: result for path, result in outcomes if result is not None}
+        
+        logger.info(f"Stage 4 completed: {len(results)} files processed")
+        return results
+    
+    async def _verify_file(self, file_path: str, integration_result: Dict[str, Any],
+                           system_prompt: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Run Stage 4 verification for one integrated file; the result is None when the file is skipped"""
+        try:
+            if integration_result.get('status') != 'completed':
+                logger.warning(f"Skipping {file_path} - integration not completed")
+                return file_path, None
+            
+            integrated_code_content = integration_result['integrated_code']
+            integration_notes = integration_result.get('integration_notes', [])
+            
+            prompt = f"""Perform final verification of this integrated code:
 
 **File**: {file_path}
 **Language**: {self._detect_language(file_path)}
@@ -332,82 +538,81 @@ Please provide the final integrated code in the specified JSON format."""
 - Confirm best practices compliance
 
 Rate the overall quality from 1-10 and provide detailed verification results in the specified JSON format."""
+            
+            # Call DeepSeek API
+            response = await self.llm_clients.acall_deepseek(prompt, system_prompt)
+            
+            # Sanitize and validate response
+            sanitized_response = self.security_utils.sanitize_api_response(response)
+            
+            if not self.security_utils.validate_llm_response(sanitized_response, "json"):
+                logger.warning(f"Invalid response from DeepSeek for {file_path}")
+                self.llm_clients.forget_response('deepseek', prompt, system_prompt)
+                result = {
+                    'status': 'failed',
+                    'error': 'Invalid response format'
+                }
+                return file_path, result
+            
+            try:
+                # Parse JSON response
+                verification = json.loads(sanitized_response)
+                result = {
+                    'status': 'completed',
+                    'verification_passed': verification.get('verification_passed', False),
+                    'overall_quality_score': verification.get('overall_quality_score', 0),
+                    'correctness_check': verification.get('correctness_check', ''),
+                    'performance_assessment': verification.get('performance_assessment', ''),
+                    'security_review': verification.get('security_review', ''),
+                    'warnings': verification.get('warnings', []),
+                    'recommendations': verification.get('recommendations', []),
+                    'final_assessment': verification.get('final_assessment', ''),
+                    'regression_risks': verification.get('regression_risks', []),
+                    'timestamp': time.time()
+                }
+                logger.info(f"Completed DeepSeek verification for {file_path}")
                 
-                # Call DeepSeek API
-                response = self.llm_clients.call_deepseek(prompt, system_prompt)
-                
-                # Sanitize and validate response
-                sanitized_response = self.security_utils.sanitize_api_response(response)
-                
-                if not self.security_utils.validate_llm_response(sanitized_response, "json"):
-                    logger.warning(f"Invalid response from DeepSeek for {file_path}")
-                    results[file_path] = {
-                        'status': 'failed',
-                        'error': 'Invalid response format'
-                    }
-                    continue
-                
-                try:
-                    # Parse JSON response
-                    verification = json.loads(sanitized_response)
-                    results[file_path] = {
-                        'status': 'completed',
-                        'verification_passed': verification.get('verification_passed', False),
-                        'overall_quality_score': verification.get('overall_quality_score', 0),
-                        'correctness_check': verification.get('correctness_check', ''),
-                        'performance_assessment': verification.get('performance_assessment', ''),
-                        'security_review': verification.get('security_review', ''),
-                        'warnings': verification.get('warnings', []),
-                        'recommendations': verification.get('recommendations', []),
-                        'final_assessment': verification.get('final_assessment', ''),
-                        'regression_risks': verification.get('regression_risks', []),
-                        'timestamp': time.time()
-                    }
-                    logger.info(f"Completed DeepSeek verification for {file_path}")
-                    
-                except json.JSONDecodeError as e:
-                    logger.error(f"JSON parsing error for {file_path}: {e}")
-                    results[file_path] = {
-                        'status': 'failed',
-                        'error': f'JSON parsing error: {str(e)}'
-                    }
-                
-            except Exception as e:
-                logger.error(f"Error verifying code for {file_path}: {e}")
-                results[file_path] = {
+            except json.JSONDecodeError as e:
+                logger.error(f"JSON parsing error for {file_path}: {e}")
+                result = {
                     'status': 'failed',
-                    'error': str(e)
+                    'error': f'JSON parsing error: {str(e)}'
                 }
+            
+        except Exception as e:
+            logger.error(f"Error verifying code for {file_path}: {e}")
+            result = {
+                'status': 'failed',
+                'error': str(e)
+            }
         
-        logger.info(f"Stage 4 completed: {len(results)} files processed")
+        return file_path, result
+    
+    async def process_file_stages(self, file_path: str, analysis_result: Dict[str, Any],
+                                  file_map: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Run Stages 2-4 for one analyzed file, stopping after the first stage that skips it"""
+        results = {}
+        
+        _, generation = await self._generate_file(
+            file_path, analysis_result, file_map, self.prompts["stage_2_system_prompt"]
+        )
+        if generation is None:
+            return results
+        results['stage_2'] = generation
+        
+        _, integration = await self._integrate_file(
+            file_path, generation, file_map, self.prompts["stage_3_system_prompt"]
+        )
+        if integration is None:
+            return results
+        results['stage_3'] = integration
+        
+        _, verification = await self._verify_file(file_path, integration, self.prompts["stage_4_system_prompt"])
+        if verification is not None:
+            results['stage_4'] = verification
         return results
     
     def _detect_language(self, file_path: str) -> str:
         """Detect programming language from file extension"""
-        extension_map = {
-            '.py': 'Python',
-            '.js': 'JavaScript',
-            '.ts': 'TypeScript',
-            '.java': 'Java',
-            '.cpp': 'C++',
-            '.c': 'C',
-            '.cs': 'C#',
-            '.go': 'Go',
-            '.rs': 'Rust',
-            '.php': 'PHP',
-            '.rb': 'Ruby',
-            '.swift': 'Swift',
-            '.kt': 'Kotlin',
-            '.scala': 'Scala',
-            '.sh': 'Shell',
-            '.ps1': 'PowerShell',
-            '.r': 'R',
-            '.m': 'MATLAB',
-            '.pl': 'Perl',
-            '.lua': 'Lua',
-            '.dart': 'Dart',
-            '.elm': 'Elm'
-        }
-        
-        _, ext = os.path.splitext(file_path.lower())
-        return extension_map.get(ext, 'Unknown')
+        # Slicing from the last dot is one lookup; a path without a dot leaves a single character, never a match
+        return LANGUAGE_BY_EXTENSION.get(file_path[file_path.rfind('.'):].lower(), 'Unknown')
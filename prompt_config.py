@@ -3,14 +3,18 @@ Customizable System Prompt Configuration for Multi-LLM Pipeline
 Allows users to customize AI prompts based on project type and requirements
 """
 
-import json
 import os
 import logging
 from typing import Dict, Any, Optional
 from enum import Enum
 
+import fast_json
+
 logger = logging.getLogger(__name__)
 
+# "full" runs all four stages; "analysis_only" stops after the Gemini analysis
+WORKFLOW_PROFILES = ("full", "analysis_only")
+
 class ProjectType(Enum):
     """Predefined project types with optimized prompts"""
     GENERAL = "general"
@@ -25,17 +29,18 @@ class ProjectType(Enum):
     EMBEDDED = "embedded"
 
 class PromptConfigManager:
-    def __init__(self, config_file: str = "prompt_config.json"):
-        """Initialize prompt configuration manager"""
+    def __init__(self, config_file: str = "prompt_config.json", autosave: bool = True):
+        """Initialize prompt configuration manager; with autosave off, edits wait for save()"""
         self.config_file = config_file
+        self.autosave = autosave
+        self._dirty = False
         self.config = self._load_or_create_config()
     
     def _load_or_create_config(self) -> Dict[str, Any]:
         """Load existing config or create default configuration"""
         if os.path.exists(self.config_file):
             try:
-                with open(self.config_file, 'r') as f:
-                    config = json.load(f)
+                config = fast_json.load_file(self.config_file)
                 logger.info(f"Loaded prompt configuration from {self.config_file}")
                 return config
             except Exception as e:
@@ -46,6 +51,10 @@ class PromptConfigManager:
         self._save_config(config)
         return config
     
+    def reload(self):
+        """Re-read the configuration file"""
+        self.config = self._load_or_create_config()
+    
     def _create_default_config(self) -> Dict[str, Any]:
         """Create default prompt configurations for all project types"""
         return {
@@ -329,10 +338,25 @@ Provide detailed security analysis with exploit scenarios and mitigation strateg
         }
     
     def _save_config(self, config: Dict[str, Any]):
-        """Save configuration to file"""
+        """Save configuration to file, or mark it dirty when autosave is off"""
+        if not self.autosave:
+            self._dirty = True
+            return
+        
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(config, f, indent=2)
+            fast_json.dump_file(config, self.config_file)
+            logger.info(f"Saved prompt configuration to {self.config_file}")
+        except Exception as e:
+            logger.error(f"Error saving config file: {e}")
+    
+    def save(self):
+        """Write pending changes made with autosave disabled"""
+        if not self._dirty:
+            return
+        
+        try:
+            fast_json.dump_file(self.config, self.config_file)
+            self._dirty = False
             logger.info(f"Saved prompt configuration to {self.config_file}")
         except Exception as e:
             logger.error(f"Error saving config file: {e}")
@@ -346,6 +370,17 @@ Provide detailed security analysis with exploit scenarios and mitigation strateg
         else:
             raise ValueError(f"Project type {project_type.value} not found in configuration")
     
+    def get_workflow_profile(self, project_type: Optional[str] = None) -> str:
+        """Get the workflow profile for a project type (default: active type)"""
+        project_type = project_type or self.config["active_project_type"]
+        project_config = self.config["project_types"].get(project_type, {})
+        profile = project_config.get("workflow_profile", "full")
+        
+        if profile not in WORKFLOW_PROFILES:
+            logger.warning(f"Unknown workflow profile '{profile}' for {project_type}, using 'full'")
+            return "full"
+        return profile
+    
     def get_active_prompts(self) -> Dict[str, str]:
         """Get prompts for the currently active project type"""
         active_type = self.config["active_project_type"]
@@ -413,8 +448,7 @@ Provide detailed security analysis with exploit scenarios and mitigation strateg
     def export_prompts(self, filename: str):
         """Export current prompt configuration to a file"""
         try:
-            with open(filename, 'w') as f:
-                json.dump(self.config, f, indent=2)
+            fast_json.dump_file(self.config, filename)
             logger.info(f"Exported prompts to {filename}")
         except Exception as e:
             logger.error(f"Error exporting prompts: {e}")
@@ -422,8 +456,7 @@ Provide detailed security analysis with exploit scenarios and mitigation strateg
     def import_prompts(self, filename: str):
         """Import prompt configuration from a file"""
         try:
-            with open(filename, 'r') as f:
-                imported_config = json.load(f)
+            imported_config = fast_json.load_file(filename)
             
             # Validate and merge
             if "project_types" in imported_config:
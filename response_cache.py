@@ -0,0 +1,143 @@
+"""
+Content-addressed cache for LLM stage responses
+Lets identical PR re-runs (CI retries, rebases) skip repeated LLM calls
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import fast_json
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 86400  # 24 hours
+HASH_CHUNK_SIZE = 64 * 1024
+
+# Entries kept in process memory; older ones are still served from disk
+DEFAULT_MAX_ENTRIES = 1024
+
+
+def _update_chunked(hasher: Any, payload: bytes):
+    """Feed a payload to a hasher in 64 KB chunks so large files stream through"""
+    view = memoryview(payload)
+    for start in range(0, len(view), HASH_CHUNK_SIZE):
+        hasher.update(view[start:start + HASH_CHUNK_SIZE])
+
+
+def cache_key(stage: str, files: List[Dict[str, Any]], prompt_version: str) -> str:
+    """Build a cache key from the stage name, file contents and prompt version"""
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(stage.encode())
+    for file_data in files:
+        hasher.update(str(file_data.get('path') or file_data.get('filename') or '').encode())
+        hasher.update(b'\0')
+        _update_chunked(hasher, (file_data.get('content') or '').encode())
+        hasher.update(b'\0')
+    hasher.update(prompt_version.encode())
+    return hasher.hexdigest()
+
+
+def request_key(request: Dict[str, Any]) -> str:
+    """Build a cache key for a provider request from its model, prompts and sampling settings"""
+    return hashlib.blake2b(json.dumps(request, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """In-memory LRU response cache with optional JSON persistence per entry"""
+    
+    def __init__(self, cache_dir: Optional[str] = None, default_ttl: int = DEFAULT_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        """Initialize the cache; entries are persisted when cache_dir is given"""
+        self.cache_dir = cache_dir
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+    
+    def _entry_path(self, key: str) -> str:
+        """Path of the on-disk entry for a key"""
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def _load_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """Load a persisted entry from disk"""
+        try:
+            return fast_json.load_file(self._entry_path(key))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Could not read cache entry {key}: {e}")
+            return None
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for a key, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None and self.cache_dir:
+            entry = self._load_entry(key)
+            if entry is not None:
+                self._remember(key, entry)
+        
+        if entry is None or entry['expires_at'] < time.time():
+            if entry is not None:
+                self.delete(key)
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry['value']
+    
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        """Keep an entry in memory, evicting the least recently used beyond max_entries"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def set(self, key: str, value: Any, expire: Optional[int] = None):
+        """Store a value for a key with a TTL in seconds"""
+        ttl = expire if expire is not None else self.default_ttl
+        entry = {'value': value, 'expires_at': time.time() + ttl}
+        self._remember(key, entry)
+        
+        if self.cache_dir:
+            try:
+                fast_json.dump_file(entry, self._entry_path(key), pretty=False)
+            except Exception as e:
+                logger.warning(f"Could not persist cache entry {key}: {e}")
+    
+    def delete(self, key: str):
+        """Remove a key from the cache"""
+        self._entries.pop(key, None)
+        if self.cache_dir:
+            try:
+                os.remove(self._entry_path(key))
+            except FileNotFoundError:
+                pass
+    
+    def clear(self):
+        """Remove all cached entries"""
+        for key in list(self._entries):
+            self.delete(key)
+        if self.cache_dir:
+            for filename in os.listdir(self.cache_dir):
+                if filename.endswith('.json'):
+                    self.delete(filename[:-len('.json')])
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups > 0 else 0
+        }
@@ -5,6 +5,7 @@ Test Multi-LLM Pipeline with Real Repository Content
 
 import os
 import sys
+import asyncio
 import logging
 from typing import Dict, Any, List
 
@@ -189,7 +190,7 @@ class DataManager:
     
     return sample_files
 
-def main():
+async def main():
     print("="*80)
     print("Testing Multi-LLM Pipeline with JanusAI-style Code")
     print("="*80)
@@ -205,7 +206,7 @@ def main():
         
         # Run Stage 1: Gemini Analysis
         print("\n🔍 Stage 1: Gemini Analysis - Analyzing AI/ML code...")
-        analysis_results = pipeline_stages.stage_1_gemini_analysis(sample_files)
+        analysis_results = await pipeline_stages.stage_1_gemini_analysis(sample_files)
         
         # Count issues found
         total_issues = 0
@@ -219,21 +220,21 @@ def main():
         
         # Run Stage 2: ChatGPT Generation
         print("\n🛠️ Stage 2: ChatGPT Generation - Generating improvements...")
-        generation_results = pipeline_stages.stage_2_chatgpt_generation(analysis_results, sample_files)
+        generation_results = await pipeline_stages.stage_2_chatgpt_generation(analysis_results, sample_files)
         
         improved_files = sum(1 for r in generation_results.values() if r.get('status') == 'completed')
         print(f"Successfully improved {improved_files} files")
         
         # Run Stage 3: Claude Integration  
         print("\n🔗 Stage 3: Claude Integration - Integrating improvements...")
-        integration_results = pipeline_stages.stage_3_claude_integration(generation_results, sample_files)
+        integration_results = await pipeline_stages.stage_3_claude_integration(generation_results, sample_files)
         
         integrated_files = sum(1 for r in integration_results.values() if r.get('status') == 'completed')
         print(f"Successfully integrated {integrated_files} files")
         
         # Run Stage 4: DeepSeek Verification
         print("\n✅ Stage 4: DeepSeek Verification - Final quality check...")
-        verification_results = pipeline_stages.stage_4_deepseek_verification(integration_results)
+        verification_results = await pipeline_stages.stage_4_deepseek_verification(integration_results)
         
         passed_verification = sum(1 for r in verification_results.values() if r.get('verification_passed', False))
         print(f"Verification passed: {passed_verification}/{len(verification_results)} files")
@@ -262,4 +263,4 @@ def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())